@@ -4,7 +4,18 @@ Unified Evidence Scoring Engine v3.0
 Implements the rubric combining scientific accuracy, evidence base, expression, and completeness & safety.
 """
 from typing import Dict, Any, List, Tuple
-import statistics, datetime
+import statistics, datetime, base64
+import numpy as np
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
 
 LABEL_THRESHOLDS = [(85, "True"), (85, "Mostly True"), (60, "Mixed/Context"), (30, "Unsupported"), (0, "False")]
 # We will select specific labels later; for now map >=85 to "Mostly True" by default.
@@ -38,35 +49,174 @@ def _design_rank(design: str) -> int:
     # default
     return 3
 
-def _has_rct_or_sr(studies: List[Dict[str, Any]]) -> bool:
-    for s in studies:
-        d = (s.get("design") or "").lower()
-        if any(k in d for k in ["systematic","meta","random"]):
-            return True
-    return False
+def _study_aggregates(studies: List[Dict[str, Any]]) -> Tuple[int, float, bool, bool]:
+    """Single pass over studies: (best design rank, consistency, has RCT/SR, any primary outcomes).
 
-def _consistency(studies: List[Dict[str, Any]]) -> float:
-    """Return fraction of majority direction among increase/decrease/no_increase (exclude 'mixed'/'not_reported')."""
+    Consistency is the fraction of the majority direction among increase/decrease/no_increase
+    (exclude 'mixed'/'not_reported'); 0.5 when none are reported.
+    """
+    best_rank = 0
+    has_rct_sr = False
+    any_primary = False
     counts = {"increase":0, "decrease":0, "no_increase":0}
     for s in studies:
+        design = s.get("design")
+        best_rank = max(best_rank, _design_rank(design))
+        if not has_rct_sr:
+            d = (design or "").lower()
+            has_rct_sr = "systematic" in d or "meta" in d or "random" in d
+        if not any_primary and s.get("primary_outcomes"):
+            any_primary = True
         ed = s.get("effect_direction")
         if ed in counts:
             counts[ed] += 1
     total = sum(counts.values())
-    if total == 0:
-        return 0.5
-    return max(counts.values())/total
+    cons = max(counts.values())/total if total else 0.5
+    return best_rank, cons, has_rct_sr, any_primary
 
 def _year_now() -> int:
-    return datetime.datetime.now().year
+    return datetime.date.today().year
+
+
+# --- Flat encoding of payloads (shared by score / score_batch) ---
+# Categorical fields are encoded as small ints; unknown values map to the last id.
+CLAIM_TYPE_IDS = {"intervention":0, "diagnostic":1, "exposure":2, "mechanistic":3, "policy":4}
+ALIGNMENT_IDS = {"supports":0, "partially_supports":1, "contradicts":2, "insufficient":3}
+GRADE_IDS = {"high":0, "moderate":1, "low":2, "very_low":3}
+SEMANTIC_IDS = {"exact":0, "minor":1, "major":2, "wrong":3}
+CT_OTHER, AL_OTHER, GR_OTHER, SEM_OTHER = 5, 4, 4, 4
+
+# Boolean flags packed into one uint32 per payload
+F_CI, F_ABSRISK, F_RR_CONFUSED, F_UNIT_ERR = 1<<0, 1<<1, 1<<2, 1<<3
+COMPLETENESS_KEYS = ["targets","dose","effect","harms","contraind","heterogeneity"]
+F_COMP_SHIFT = 4  # bits 4..9
+F_COUNTER, F_BIAS = 1<<10, 1<<11
+F_AE, F_HIGH_RISK, F_GUIDANCE = 1<<12, 1<<13, 1<<14
+F_HAS_STUDIES, F_PRIMARY_OUTCOMES, F_RCT_SR, F_HAS_GUIDELINE = 1<<15, 1<<16, 1<<17, 1<<18
+PENALTY_KEYS = ["fabricated","retracted_as_major","predatory_major","major_safety_omission",
+                "causation_misuse","cherry_pick","guideline_misquote","too_old_only",
+                "scale_exaggeration","term_misuse","overgeneralization","fear_appeal"]
+F_PEN_SHIFT = 19  # bits 19..30
+F_FABRICATED = 1 << F_PEN_SHIFT
+F_RETRACTED_OR_PREDATORY = (1 << (F_PEN_SHIFT+1)) | (1 << (F_PEN_SHIFT+2))
+
+F_PENALTY_ANY = ((1 << len(PENALTY_KEYS)) - 1) << F_PEN_SHIFT
+
+# (output name, mask, points) in output order; one static table replaces the old add_pen closure.
+# retracted_as_major / predatory_major share a single 50-point item, as in the original rubric.
+PENALTY_TABLE = [
+    ("fabricated", F_FABRICATED, 100),
+    ("retracted_or_predatory_major", F_RETRACTED_OR_PREDATORY, 50),
+] + [(k, 1 << (F_PEN_SHIFT+i), pts) for i, (k, pts) in enumerate(
+    [("major_safety_omission",15), ("causation_misuse",10), ("cherry_pick",10), ("guideline_misquote",7),
+     ("too_old_only",6), ("scale_exaggeration",4), ("term_misuse",3), ("overgeneralization",3), ("fear_appeal",2)],
+    start=3)]
+BONUS_TABLE = [("uncertainty_transparency",3), ("nnt_nnh",3), ("external_validation",2), ("triangulation",2)]
+PENALTY_MASKS = np.array([mask for _, mask, _ in PENALTY_TABLE], dtype=np.int64)
+PENALTY_POINTS = np.array([pts for _, _, pts in PENALTY_TABLE], dtype=np.int64)
+
+# Dense lookup tables indexed by small ints (replace the per-call dict literals of the original score())
+SEMANTIC_POINTS = np.array([15, 12, 6, 0, 6], dtype=np.int8)            # by SEMANTIC_IDS (last = default 6)
+RANK_POINTS = np.array([1, 3, 5, 7, 7, 9, 11, 13, 15], dtype=np.int8)   # by design rank 0..8
+GRADE_TONE = np.array([10, 9, 8, 7, 8], dtype=np.int8)                  # by GRADE_IDS (last = default 8)
+EXAGGERATION_POINTS = np.array([10, 8, 6, 4, 2, 0], dtype=np.int8)      # by exaggeration_level 0..5
+COVERAGE_POINTS = np.array([0, 0, 2, 0, 4, 6, 7], dtype=np.int8)        # by number of covered items 0..6
+LABELS = np.array(["Harmful", "Misleading", "Unsupported", "Mixed/Context", "Mostly True", "True"])
+LABEL_BINS = [10, 30, 60, 85, 90]
+CONFIDENCE = np.array(["high", "medium", "low"])
+
+def _encode_flags(payload: Dict[str, Any], has_studies: bool, has_rct_sr: bool, any_primary: bool) -> int:
+    st = payload.get("stats_integrity_flags", {})
+    comp = payload.get("completeness_checks", {})
+    bal = payload.get("balance_flags", {})
+    saf = payload.get("safety_flags", {})
+    p = payload.get("penalties_flags", {})
+    mask = 0
+    if st.get("ci_present", False): mask |= F_CI
+    if st.get("abs_risk_present", False): mask |= F_ABSRISK
+    if st.get("rr_abs_confused", False): mask |= F_RR_CONFUSED
+    if st.get("unit_errors", False): mask |= F_UNIT_ERR
+    for i, k in enumerate(COMPLETENESS_KEYS):
+        if comp.get(k, False): mask |= 1 << (F_COMP_SHIFT+i)
+    if bal.get("mentions_counterevidence", False): mask |= F_COUNTER
+    if bal.get("bias_to_benefit", False): mask |= F_BIAS
+    if saf.get("adverse_events_quantified", False): mask |= F_AE
+    if saf.get("high_risk_groups", False): mask |= F_HIGH_RISK
+    if saf.get("clinical_guidance", False): mask |= F_GUIDANCE
+    if has_studies: mask |= F_HAS_STUDIES
+    if any_primary: mask |= F_PRIMARY_OUTCOMES
+    if has_rct_sr: mask |= F_RCT_SR
+    if payload.get("guideline_year", None) is not None: mask |= F_HAS_GUIDELINE
+    for i, k in enumerate(PENALTY_KEYS):
+        if p.get(k, False): mask |= 1 << (F_PEN_SHIFT+i)
+    return mask
+
+# Bonus values live at the tail of the prepared row
+N_BONUS = len(BONUS_TABLE)
+
+def prepare(payload: Dict[str, Any], current_year: int = None) -> Tuple:
+    """Flatten a payload dict into a fixed-shape tuple of ints/floats for _score_core."""
+    if current_year is None:
+        current_year = _year_now()
+    studies = payload.get("included_studies", [])
+    best_rank, cons, has_rct_sr, any_primary = _study_aggregates(studies)
+    numeric_diffs = payload.get("numeric_diffs") or []
+    bonus_flags = payload.get("bonus_flags", {})
+    guide_year = payload.get("guideline_year", None)
+    return (
+        1 if numeric_diffs else 0,
+        float(max(numeric_diffs)) if numeric_diffs else 0.0,
+        SEMANTIC_IDS.get(payload.get("semantic_exact_if_non_numeric","exact"), SEM_OTHER),
+        CLAIM_TYPE_IDS.get(payload["claim_type"], CT_OTHER),
+        ALIGNMENT_IDS.get(payload["alignment_to_claim"], AL_OTHER),
+        GRADE_IDS.get(payload["GRADE_certainty"], GR_OTHER),
+        best_rank,
+        float(cons),
+        float(payload.get("citation_verifiability_rate",0)),
+        float(payload.get("newest_key_evidence_year", current_year-20)),
+        float(guide_year) if guide_year is not None else 0.0,
+        int(payload.get("language_assertiveness_score",0)),
+        int(payload.get("exaggeration_level",0)),
+        _encode_flags(payload, len(studies) > 0, has_rct_sr, any_primary),
+        int(current_year),
+    ) + tuple(float(bonus_flags.get(k,0)) for k, _ in BONUS_TABLE)
+
+@njit(cache=True, fastmath=True)
+def _total_label_confidence(base, bonus, flags, grade_id, cons, ver):
+    """Apply penalties and bucket the total into label / confidence ids."""
+    # --- Penalties ---
+    penalties = 0
+    if (flags & F_PENALTY_ANY) != 0:
+        for i in range(len(PENALTY_MASKS)):
+            if (flags & PENALTY_MASKS[i]) != 0:
+                penalties += PENALTY_POINTS[i]
+
+    total = max(0, min(100, base + bonus - penalties))
+    if total >= 90: label_id = 5
+    elif total >= 85: label_id = 4
+    elif total >= 60: label_id = 3
+    elif total >= 30: label_id = 2
+    elif total >= 10: label_id = 1
+    else: label_id = 0
+
+    # Confidence: 0 high / 1 medium / 2 low
+    if grade_id <= 1 and cons >= 0.7 and ver >= 0.8: conf_id = 0
+    elif grade_id == 2 or grade_id == 3 or cons < 0.5 or ver < 0.3: conf_id = 2
+    else: conf_id = 1
+    return total, label_id, conf_id
+
+@njit(cache=True, fastmath=True)
+def _score_core(has_numeric, max_err, semantic_id, claim_type_id, alignment_id, grade_id,
+                best_rank, cons, ver, key_year, guide_year, assertiveness, ex_level, flags, current_year,
+                bonus0, bonus1, bonus2, bonus3):
+    """Numeric rubric core. Returns a flat tuple of ints (see postprocess for the layout)."""
+    fabricated = (flags & F_FABRICATED) != 0
+    # retracted/predatory major evidence forces A <= 20 and B1 <= 7
+    retracted = (flags & F_RETRACTED_OR_PREDATORY) != 0
 
-def score(payload: Dict[str, Any]) -> Dict[str, Any]:
     # --- A: Scientific Accuracy (facts, causality, stats) ---
     # A1 facts
-    numeric_diffs = payload.get("numeric_diffs") or []
-    semantic = payload.get("semantic_exact_if_non_numeric","exact")
-    if numeric_diffs:
-        max_err = max(numeric_diffs)
+    if has_numeric:
         if max_err <= 0.02: A1 = 15
         elif max_err <= 0.05: A1 = 12
         elif max_err <= 0.10: A1 = 9
@@ -74,250 +224,290 @@ def score(payload: Dict[str, Any]) -> Dict[str, Any]:
         elif max_err <= 0.30: A1 = 3
         else: A1 = 0
     else:
-        A1_map = {"exact":15, "minor":12, "major":6, "wrong":0}
-        A1 = A1_map.get(semantic, 6)
+        A1 = int(SEMANTIC_POINTS[semantic_id])
 
     # A2 causality
-    claim_type = payload["claim_type"]
-    alignment = payload["alignment_to_claim"]
-    studies = payload.get("included_studies", [])
-    has_rct_sr = _has_rct_or_sr(studies)
-    if claim_type in ["intervention","diagnostic"]:
-        if has_rct_sr: A2 = 15
-        else: A2 = 9  # avoid causal assertion
-    elif claim_type == "exposure":
-        # allow 12 if quasi-experimental hinted via alignment supports & consistency high
-        cons = _consistency(studies)
-        if cons >= 0.7 and alignment in ["supports","partially_supports"]:
-            A2 = 12
-        else:
-            A2 = 9
-    elif claim_type in ["mechanistic","policy"]:
-        A2 = 6 if alignment in ["supports","partially_supports"] else 4
+    is_id = claim_type_id <= 1  # intervention / diagnostic
+    supports = alignment_id <= 1  # supports / partially_supports
+    has_rct_sr = (flags & F_RCT_SR) != 0
+    if is_id:
+        A2 = 15 if has_rct_sr else 9  # avoid causal assertion
+    elif claim_type_id == 2:  # exposure
+        A2 = 12 if (cons >= 0.7 and supports) else 9
+    elif claim_type_id == 3 or claim_type_id == 4:  # mechanistic / policy
+        A2 = 6 if supports else 4
     else:
         A2 = 6
 
     # A3 stats
-    stats_flags = payload.get("stats_integrity_flags", {})
-    ci = stats_flags.get("ci_present", False)
-    absrisk = stats_flags.get("abs_risk_present", False)
-    confuse = stats_flags.get("rr_abs_confused", False)
-    unit_err = stats_flags.get("unit_errors", False)
     A3 = 10
-    if not ci: A3 -= 2
-    if not absrisk: A3 -= 3
-    if confuse: A3 -= 3
-    if unit_err: A3 -= 2
-    A3 = _cap(A3, 0, 10)
+    if (flags & F_CI) == 0: A3 -= 2
+    if (flags & F_ABSRISK) == 0: A3 -= 3
+    if (flags & F_RR_CONFUSED) != 0: A3 -= 3
+    if (flags & F_UNIT_ERR) != 0: A3 -= 2
+    A3 = max(0, min(10, A3))
 
     # Cap by alignment & GRADE
     cap_A = 40
-    grade = payload["GRADE_certainty"]
-    cap_applied_A = False
-    if alignment in ["contradicts","insufficient"] and grade in ["high","moderate"]:
+    cap_applied_A = 0
+    if (alignment_id == 2 or alignment_id == 3) and grade_id <= 1:
         A1, A2, A3 = min(A1,6), min(A2,6), min(A3,4)
-        cap_A = min(cap_A, 20); cap_applied_A = True
-    if grade == "very_low":
-        cap_A = min(cap_A, 20); cap_applied_A = True
+        cap_A = 20; cap_applied_A = 1
+    if grade_id == 3:  # very_low
+        cap_A = 20; cap_applied_A = 1
+    if retracted:
+        cap_A = min(cap_A, 20)
     A_total = min(cap_A, A1 + A2 + A3)
 
     # --- B: Evidence Base ---
-    # B1 quality (take the best-ranked design present)
-    best_rank = 0
-    for s in studies:
-        if s.get("retraction_status") in ["retracted","expression_of_concern"]:
-            # keep rank but will penalize later
-            pass
-        best_rank = max(best_rank, _design_rank(s.get("design","")))
-    # Map rank to points (0..15)
-    rank_to_points = {8:15, 7:13, 6:11, 5:9, 4:7, 3:7, 2:5, 1:3, 0:1}
-    B1 = rank_to_points.get(best_rank, 0)
-
-    # Cap B1 if no RCT/SR for intervention/diagnostic
-    cap_applied_B = False
-    if payload["claim_type"] in ["intervention","diagnostic"] and not has_rct_sr:
-        B1 = min(B1, 11); cap_applied_B = True
-
-    # B2 appropriateness + verifiability + recency
-    # Appropriateness heuristic: directness if outcomes present and alignment not "insufficient"
-    appropriateness = 6 if (len(studies)>0 and any((s.get("primary_outcomes") for s in studies)) and alignment!="insufficient") else (4 if len(studies)>0 else 2)
-    # Verifiability
-    ver_rate = float(payload.get("citation_verifiability_rate",0))
-    ver_score = 2 if ver_rate >= 0.8 else (1 if ver_rate >= 0.3 else 0)
-    # Recency
-    current_year = datetime.datetime.now().year
-    key_year = payload.get("newest_key_evidence_year", current_year-20)
-    # Guidelines
-    guide_year = payload.get("guideline_year", None)
+    B1 = int(RANK_POINTS[best_rank])
+    cap_applied_B = 0
+    if is_id and not has_rct_sr:
+        B1 = min(B1, 11); cap_applied_B = 1
+    if retracted:
+        B1 = min(B1, 7)
+    has_studies = (flags & F_HAS_STUDIES) != 0
+    if has_studies and (flags & F_PRIMARY_OUTCOMES) != 0 and alignment_id != 3:
+        appropriateness = 6
+    elif has_studies:
+        appropriateness = 4
+    else:
+        appropriateness = 2
+    ver_score = 2 if ver >= 0.8 else (1 if ver >= 0.3 else 0)
     rec_score = 0
     if key_year >= current_year - 10: rec_score += 1
-    elif key_year >= current_year - 15: rec_score += 0
-    else: rec_score += 0
-    if guide_year is not None:
-        if guide_year >= current_year - 5: rec_score += 1
-        elif guide_year >= current_year - 8: rec_score += 0
-        else: rec_score += 0
-    B2 = int(appropriateness + ver_score + rec_score)
-    if B2 > 10: B2 = 10
-
+    if (flags & F_HAS_GUIDELINE) != 0 and guide_year >= current_year - 5: rec_score += 1
+    B2 = min(10, appropriateness + ver_score + rec_score)
     B_total = B1 + B2
 
     # --- C: Expression ---
-    # C1 certainty tone
-    grade_map = {"high":10, "moderate":9, "low":8, "very_low":7}
-    base_tone = grade_map.get(grade, 8)
-    tone = base_tone + int(payload.get("language_assertiveness_score",0))
-    C1 = _cap(tone, 0, 10)
-
-    # C2 avoid exaggeration
-    ex_level = int(payload.get("exaggeration_level",0)) # 0 best, 5 worst
-    C2 = {0:10,1:8,2:6,3:4,4:2,5:0}.get(ex_level, 6)
-
+    C1 = max(0, min(10, int(GRADE_TONE[grade_id]) + assertiveness))
+    C2 = int(EXAGGERATION_POINTS[ex_level]) if 0 <= ex_level <= 5 else 6
     C_total = C1 + C2
 
     # --- D: Completeness & Safety ---
-    comp = payload.get("completeness_checks", {})
-    covered = sum(1 for k in ["targets","dose","effect","harms","contraind","heterogeneity"] if comp.get(k, False))
-    D1 = {6:7,5:6,4:4,2:2}.get(covered, 0)
+    covered = 0
+    for i in range(6):
+        covered += (flags >> (F_COMP_SHIFT + i)) & 1
+    D1 = int(COVERAGE_POINTS[covered])
+    counter = (flags & F_COUNTER) != 0
+    bias = (flags & F_BIAS) != 0
+    if counter and not bias: D2 = 4
+    elif counter: D2 = 3
+    elif bias: D2 = 1
+    else: D2 = 0
+    D3 = 0
+    if (flags & F_AE) != 0: D3 += 2
+    if (flags & F_HIGH_RISK) != 0: D3 += 1
+    if (flags & F_GUIDANCE) != 0: D3 += 1
+    D3 = min(4, D3)
+    D_total = D1 + D2 + D3
 
-    bal = payload.get("balance_flags", {})
-    if bal.get("mentions_counterevidence", False) and not bal.get("bias_to_benefit", False):
-        D2 = 4
-    elif bal.get("mentions_counterevidence", False):
-        D2 = 3
-    elif bal.get("bias_to_benefit", False):
-        D2 = 1
-    else:
-        D2 = 0
+    # --- Bonus ---
+    p0 = min(3, int(bonus0)) if bonus0 > 0 else 0
+    p1 = min(3, int(bonus1)) if bonus1 > 0 else 0
+    p2 = min(2, int(bonus2)) if bonus2 > 0 else 0
+    p3 = min(2, int(bonus3)) if bonus3 > 0 else 0
+    base = A_total + B_total + C_total + D_total
+
+    # fabricated: total/label/confidence are fixed, so skip penalties and bucketing
+    total = 0
+    label_id = 0
+    conf_id = 0
+    if not fabricated:
+        total, label_id, conf_id = _total_label_confidence(
+            base, min(10, p0 + p1 + p2 + p3), flags, grade_id, cons, ver)
+
+    return (int(A1), int(A2), int(A3), int(cap_applied_A), int(A_total),
+            int(B1), int(B2), int(cap_applied_B), int(B_total),
+            int(C1), int(C2), int(C_total),
+            int(D1), int(D2), int(D3), int(D_total),
+            int(base), int(p0), int(p1), int(p2), int(p3), int(total), int(label_id), int(conf_id), int(retracted))
+
+# --- Compact breakdown ---
+# breakdown_packed = base64( A1 A2 A3 B1 B2 C1 C2 D1 D2 D3 | caps ), one uint8 each (all subscores are 0..15);
+# caps: bit0 = A cap applied, bit1 = B cap applied. Decode with unpack_breakdown().
+PACKED_FIELDS = ("A1", "A2", "A3", "B1", "B2", "C1", "C2", "D1", "D2", "D3")
+
+def pack_breakdown(subscores: Tuple[int, ...], cap_applied_A: bool, cap_applied_B: bool) -> str:
+    return base64.b64encode(bytes(subscores) + bytes([int(cap_applied_A) | (int(cap_applied_B) << 1)])).decode("ascii")
+
+def unpack_breakdown(packed: str) -> Dict[str, Any]:
+    raw = base64.b64decode(packed)
+    out = dict(zip(PACKED_FIELDS, raw[:len(PACKED_FIELDS)]))
+    out["cap_applied_A"] = bool(raw[-1] & 1)
+    out["cap_applied_B"] = bool(raw[-1] & 2)
+    return out
+
+def postprocess(row: Tuple, out: Tuple, compact: bool = False) -> Dict[str, Any]:
+    """Rebuild the result dict from a prepared row and the _score_core output."""
+    (A1, A2, A3, cap_applied_A, A_total, B1, B2, cap_applied_B, B_total, C1, C2, C_total,
+     D1, D2, D3, D_total, base, p0, p1, p2, p3, total, label_id, conf_id, capA) = out
+    flags = row[13]
+    fabricated = bool(flags & F_FABRICATED)
+    if compact:
+        return {
+          "breakdown_packed": pack_breakdown((A1, A2, A3, B1, B2, C1, C2, D1, D2, D3),
+                                             cap_applied_A or (fabricated and capA), cap_applied_B),
+          "total_score": 0 if fabricated else total,
+          "label": "False" if fabricated else str(LABELS[label_id]),
+          "confidence": "high" if fabricated else str(CONFIDENCE[conf_id])
+        }
+    bonus_vals = row[-N_BONUS:]
+    bonus_items = [{"type":k, "points":pts} for (k, _), v, pts in zip(BONUS_TABLE, bonus_vals, (p0, p1, p2, p3)) if v > 0]
+    penalty_items = [{"type":k, "points":-pts} for k, mask, pts in PENALTY_TABLE if flags & mask] if flags & F_PENALTY_ANY else []
+    return {
+      "score_breakdown": {
+        "A_scientific_accuracy": {"facts": A1, "causality": A2, "stats": A3, "cap_applied": bool(cap_applied_A or (fabricated and capA)), "subtotal": A_total},
+        "B_evidence_base": {"quality": B1, "appropriateness_verifiability_recency": B2, "cap_applied": bool(cap_applied_B), "subtotal": B_total},
+        "C_expression": {"certainty_tone": C1, "no_exaggeration": C2, "subtotal": C_total},
+        # the fabricated branch has always reported "safety" in lower case
+        "D_completeness_safety": {"coverage": D1, "balance": D2, ("safety" if fabricated else "Safety"): D3, "subtotal": D_total}
+      },
+      "base": base,
+      "bonus": bonus_items,
+      "penalties": penalty_items,
+      "total_score": 0 if fabricated else total,
+      "label": "False" if fabricated else str(LABELS[label_id]),
+      "confidence": "high" if fabricated else str(CONFIDENCE[conf_id])
+    }
 
-    saf = payload.get("safety_flags", {})
-    saf_points = 0
-    if saf.get("adverse_events_quantified", False): saf_points += 2
-    elif any(saf.get(k, False) for k in ["adverse_events_quantified"]): pass
-    if saf.get("high_risk_groups", False): saf_points += 1
-    if saf.get("clinical_guidance", False): saf_points += 1
-    D3 = min(4, saf_points)
+def score(payload: Dict[str, Any], compact: bool = False) -> Dict[str, Any]:
+    """Score one payload. compact=True returns breakdown_packed instead of the nested score_breakdown."""
+    row = prepare(payload)
+    return postprocess(row, _score_core(*row), compact)
 
-    D_total = D1 + D2 + D3
+if _NUMBA_AVAILABLE:
+    # compile once at import (cached on disk) so the first request does not pay the JIT cost
+    _score_core(0, 0.0, 0, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0, 2000, 0.0, 0.0, 0.0, 0.0)
+
+# --- Batch scoring (struct-of-arrays) ---
+def _to_columns(payloads: List[Dict[str, Any]], current_year: int) -> Dict[str, np.ndarray]:
+    """Transpose a list of payload dicts into per-field NumPy columns."""
+    rows = [prepare(payload, current_year) for payload in payloads]
+    cols = list(zip(*rows))
+    return {
+        "has_numeric": np.array(cols[0], dtype=bool),
+        "max_err": np.array(cols[1], dtype=np.float64),
+        "semantic_id": np.array(cols[2], dtype=np.int8),
+        "claim_type_id": np.array(cols[3], dtype=np.int8),
+        "alignment_id": np.array(cols[4], dtype=np.int8),
+        "grade_id": np.array(cols[5], dtype=np.int8),
+        "best_rank": np.array(cols[6], dtype=np.int8),
+        "consistency": np.array(cols[7], dtype=np.float64),
+        "ver_rate": np.array(cols[8], dtype=np.float64),
+        "key_year": np.array(cols[9], dtype=np.float64),
+        "guide_year": np.array(cols[10], dtype=np.float64),
+        "assertiveness": np.array(cols[11], dtype=np.int64),
+        "exaggeration": np.array(cols[12], dtype=np.int64),
+        "flags": np.array(cols[13], dtype=np.uint32),
+        "bonus": np.array(cols[-N_BONUS:], dtype=np.float64).reshape(N_BONUS, len(rows)),
+    }
 
-    base = int(A_total + B_total + C_total + D_total)
+def score_batch(payloads: List[Dict[str, Any]], compact: bool = False) -> List[Dict[str, Any]]:
+    """Score many payloads at once; returns the same dicts as [score(p, compact) for p in payloads]."""
+    if not payloads:
+        return []
+    current_year = _year_now()  # one clock read for the whole batch
+    c = _to_columns(payloads, current_year)
+    flags = c["flags"].astype(np.int64)
+    has = lambda bit: (flags & bit) != 0
+    ct, al, gr = c["claim_type_id"], c["alignment_id"], c["grade_id"]
+    is_id = ct <= CLAIM_TYPE_IDS["diagnostic"]
+    supports = al <= ALIGNMENT_IDS["partially_supports"]
+    has_rct_sr = has(F_RCT_SR)
+
+    # A
+    err = c["max_err"]
+    A1 = np.where(c["has_numeric"],
+                  np.select([err<=0.02, err<=0.05, err<=0.10, err<=0.20, err<=0.30], [15,12,9,6,3], 0),
+                  SEMANTIC_POINTS[c["semantic_id"]].astype(np.int64))
+    A2 = np.select([is_id, ct==CLAIM_TYPE_IDS["exposure"], (ct==CLAIM_TYPE_IDS["mechanistic"]) | (ct==CLAIM_TYPE_IDS["policy"])],
+                   [np.where(has_rct_sr, 15, 9),
+                    np.where((c["consistency"]>=0.7) & supports, 12, 9),
+                    np.where(supports, 6, 4)], 6)
+    A3 = np.clip(10 - 2*~has(F_CI) - 3*~has(F_ABSRISK) - 3*has(F_RR_CONFUSED) - 2*has(F_UNIT_ERR), 0, 10)
+    strong = (al==ALIGNMENT_IDS["contradicts"]) | (al==ALIGNMENT_IDS["insufficient"])
+    strong &= gr <= GRADE_IDS["moderate"]
+    A1, A2, A3 = np.where(strong, np.minimum(A1,6), A1), np.where(strong, np.minimum(A2,6), A2), np.where(strong, np.minimum(A3,4), A3)
+    cap_applied_A = strong | (gr==GRADE_IDS["very_low"])
+    A_total = np.minimum(np.where(cap_applied_A, 20, 40), A1 + A2 + A3)
+
+    # B
+    cap_applied_B = is_id & ~has_rct_sr
+    rank_points = RANK_POINTS[c["best_rank"]].astype(np.int64)
+    B1 = np.where(cap_applied_B, np.minimum(rank_points, 11), rank_points)
+    appropriateness = np.where(has(F_HAS_STUDIES) & has(F_PRIMARY_OUTCOMES) & (al!=ALIGNMENT_IDS["insufficient"]), 6,
+                               np.where(has(F_HAS_STUDIES), 4, 2))
+    ver = c["ver_rate"]
+    ver_score = np.where(ver>=0.8, 2, np.where(ver>=0.3, 1, 0))
+    rec_score = (c["key_year"] >= current_year-10).astype(np.int64) + (has(F_HAS_GUIDELINE) & (c["guide_year"] >= current_year-5))
+    B2 = np.minimum(10, appropriateness + ver_score + rec_score)
+
+    # C
+    C1 = np.clip(GRADE_TONE[gr].astype(np.int64) + c["assertiveness"], 0, 10)
+    ex = c["exaggeration"]
+    C2 = np.where((ex>=0) & (ex<=5), EXAGGERATION_POINTS[np.clip(ex,0,5)].astype(np.int64), 6)
+    C_total = C1 + C2
 
-    # --- Bonus ---
-    bonus_flags = payload.get("bonus_flags", {})
-    bonus = 0
-    bonus_items = []
-    if bonus_flags.get("uncertainty_transparency",0) > 0:
-        pts = min(3, int(bonus_flags["uncertainty_transparency"])); bonus += pts; bonus_items.append({"type":"uncertainty_transparency","points":pts})
-    if bonus_flags.get("nnt_nnh",0) > 0:
-        pts = min(3, int(bonus_flags["nnt_nnh"])); bonus += pts; bonus_items.append({"type":"nnt_nnh","points":pts})
-    if bonus_flags.get("external_validation",0) > 0:
-        pts = min(2, int(bonus_flags["external_validation"])); bonus += pts; bonus_items.append({"type":"external_validation","points":pts})
-    if bonus_flags.get("triangulation",0) > 0:
-        pts = min(2, int(bonus_flags["triangulation"])); bonus += pts; bonus_items.append({"type":"triangulation","points":pts})
-    bonus = min(10, bonus)
+    # D
+    covered = sum(((flags >> (F_COMP_SHIFT+i)) & 1) for i in range(len(COMPLETENESS_KEYS)))
+    D1 = COVERAGE_POINTS[covered].astype(np.int64)
+    counter, bias = has(F_COUNTER), has(F_BIAS)
+    D2 = np.select([counter & ~bias, counter, bias], [4, 3, 1], 0)
+    D3 = np.minimum(4, 2*has(F_AE) + has(F_HIGH_RISK) + has(F_GUIDANCE))
+    D_total = D1 + D2 + D3
 
-    # --- Penalties ---
-    p = payload.get("penalties_flags", {})
-    penalties = 0
-    penalty_items = []
-    def add_pen(name, pts):
-        nonlocal penalties, penalty_items
-        penalties += abs(pts); penalty_items.append({"type":name, "points":-abs(pts)})
-
-    # major
-    if p.get("fabricated", False):
-        add_pen("fabricated", 100)
-    if p.get("retracted_as_major", False) or p.get("predatory_major", False):
-        add_pen("retracted_or_predatory_major", 50)
-    if p.get("major_safety_omission", False):
-        add_pen("major_safety_omission", 15)
-    # medium
-    if p.get("causation_misuse", False):
-        add_pen("causation_misuse", 10)
-    if p.get("cherry_pick", False):
-        add_pen("cherry_pick", 10)
-    if p.get("guideline_misquote", False):
-        add_pen("guideline_misquote", 7)
-    if p.get("too_old_only", False):
-        add_pen("too_old_only", 6)
-    # minor
-    if p.get("scale_exaggeration", False):
-        add_pen("scale_exaggeration", 4)
-    if p.get("term_misuse", False):
-        add_pen("term_misuse", 3)
-    if p.get("overgeneralization", False):
-        add_pen("overgeneralization", 3)
-    if p.get("fear_appeal", False):
-        add_pen("fear_appeal", 2)
+    # Bonus / penalties
+    bonus_vals = c["bonus"]
+    caps = np.array([cap for _, cap in BONUS_TABLE])[:, None]
+    bonus_pts = np.where(bonus_vals > 0, np.minimum(caps, np.trunc(bonus_vals)), 0).astype(np.int64)
+    bonus = np.minimum(10, bonus_pts.sum(axis=0))
+    penalties = sum(np.where(has(mask), pts, 0) for _, mask, pts in PENALTY_TABLE)
 
     # forced caps when major penalties
-    capA = capB = False
-    if p.get("retracted_as_major", False) or p.get("predatory_major", False):
-        # lower caps
-        capA = True
-        if A_total > 20:
-            A_total = 20
-        if B1 > 7:
-            B1 = 7
-            B_total = B1 + B2
-        base = int(A_total + B_total + C_total + D_total)
-
-    if p.get("fabricated", False):
-        total_score = 0
-        label = "False"
-        confidence = "high"
-        return {
+    rp = has(F_RETRACTED_OR_PREDATORY)
+    A_total = np.where(rp, np.minimum(A_total, 20), A_total)
+    B1 = np.where(rp, np.minimum(B1, 7), B1)
+    B_total = B1 + B2
+    base = A_total + B_total + C_total + D_total
+
+    total = np.clip(base + bonus - penalties, 0, 100)
+    labels = LABELS[np.digitize(total, LABEL_BINS)]
+    cons = c["consistency"]
+    conf = CONFIDENCE[np.select([(gr <= GRADE_IDS["moderate"]) & (cons>=0.7) & (ver>=0.8),
+                                 (gr == GRADE_IDS["low"]) | (gr == GRADE_IDS["very_low"]) | (cons<0.5) | (ver<0.3)], [0, 2], 1)]
+    fabricated = has(F_FABRICATED)
+
+    caps_A = cap_applied_A | (fabricated & rp)
+    if compact:
+        packed = np.column_stack([A1, A2, A3, B1, B2, C1, C2, D1, D2, D3,
+                                  caps_A.astype(np.int64) | (cap_applied_B.astype(np.int64) << 1)]).astype(np.uint8)
+        return [{
+          "breakdown_packed": base64.b64encode(packed[i].tobytes()).decode("ascii"),
+          "total_score": 0 if fabricated[i] else int(total[i]),
+          "label": "False" if fabricated[i] else str(labels[i]),
+          "confidence": "high" if fabricated[i] else str(conf[i])
+        } for i in range(len(payloads))]
+
+    results = []
+    for i in range(len(payloads)):
+        f = int(flags[i])
+        bonus_items = [{"type":k, "points":int(bonus_pts[j,i])} for j, (k, _) in enumerate(BONUS_TABLE) if bonus_vals[j,i] > 0]
+        penalty_items = [{"type":k, "points":-pts} for k, mask, pts in PENALTY_TABLE if f & mask]
+        fab = bool(fabricated[i])
+        results.append({
           "score_breakdown": {
-            "A_scientific_accuracy": {"facts": A1, "causality": A2, "stats": A3, "cap_applied": cap_applied_A or capA, "subtotal": int(A_total)},
-            "B_evidence_base": {"quality": B1, "appropriateness_verifiability_recency": int(B2), "cap_applied": cap_applied_B or capB, "subtotal": int(B_total)},
-            "C_expression": {"certainty_tone": int(C1), "no_exaggeration": int(C2), "subtotal": int(C_total)},
-            "D_completeness_safety": {"coverage": int(D1), "balance": int(D2), "safety": int(D3), "subtotal": int(D_total)}
+            "A_scientific_accuracy": {"facts": int(A1[i]), "causality": int(A2[i]), "stats": int(A3[i]), "cap_applied": bool(caps_A[i]), "subtotal": int(A_total[i])},
+            "B_evidence_base": {"quality": int(B1[i]), "appropriateness_verifiability_recency": int(B2[i]), "cap_applied": bool(cap_applied_B[i]), "subtotal": int(B_total[i])},
+            "C_expression": {"certainty_tone": int(C1[i]), "no_exaggeration": int(C2[i]), "subtotal": int(C_total[i])},
+            "D_completeness_safety": {"coverage": int(D1[i]), "balance": int(D2[i]), ("safety" if fab else "Safety"): int(D3[i]), "subtotal": int(D_total[i])}
           },
-          "base": int(base),
+          "base": int(base[i]),
           "bonus": bonus_items,
           "penalties": penalty_items,
-          "total_score": int(total_score),
-          "label": label,
-          "confidence": confidence
-        }
-
-    total = max(0, min(100, base + bonus - penalties))
-
-    # Label
-    if total >= 90:
-        label = "True"
-    elif total >= 85:
-        label = "Mostly True"
-    elif total >= 60:
-        label = "Mixed/Context"
-    elif total >= 30:
-        label = "Unsupported"
-    elif total >= 10:
-        label = "Misleading"
-    else:
-        label = "Harmful"
-
-    # Confidence
-    cons = _consistency(studies)
-    ver = float(payload.get("citation_verifiability_rate",0))
-    if grade in ["high","moderate"] and cons >= 0.7 and ver >= 0.8:
-        confidence = "high"
-    elif grade in ["low","very_low"] or cons < 0.5 or ver < 0.3:
-        confidence = "low"
-    else:
-        confidence = "medium"
-
-    return {
-      "score_breakdown": {
-        "A_scientific_accuracy": {"facts": int(A1), "causality": int(A2), "stats": int(A3), "cap_applied": cap_applied_A, "subtotal": int(A_total)},
-        "B_evidence_base": {"quality": int(B1), "appropriateness_verifiability_recency": int(B2), "cap_applied": cap_applied_B, "subtotal": int(B_total)},
-        "C_expression": {"certainty_tone": int(C1), "no_exaggeration": int(C2), "subtotal": int(C_total)},
-        "D_completeness_safety": {"coverage": int(D1), "balance": int(D2), "Safety": int(D3), "subtotal": int(D_total)}
-      },
-      "base": int(base),
-      "bonus": bonus_items,
-      "penalties": penalty_items,
-      "total_score": int(total),
-      "label": label,
-      "confidence": confidence
-    }
+          "total_score": 0 if fab else int(total[i]),
+          "label": "False" if fab else str(labels[i]),
+          "confidence": "high" if fab else str(conf[i])
+        })
+    return results
@@ -1,28 +1,163 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException
 from datetime import datetime
+from collections import OrderedDict
+from functools import lru_cache
+import copy
+import hashlib
+import json
 import time
 import asyncio
+import threading
+from typing import List, Optional, Tuple
 from src.models.claim import ClaimRequest, ClaimResponse, AxisScore, Rationale, EvidenceItem, ClaimReviewMetadata, ClaimReviewSchema, ErrorResponse, ErrorDetail
-from src.database import get_db
 from src.config import settings
 from src.core.extract import extract_main_claim
 from src.utils.pubmed import search_evidence
-from src.core.scoring import calculate_evidence_score
+from src.core.scoring import calculate_evidence_score, calculate_evidence_scores
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 router = APIRouter()
 
+# リクエストごとに参照する設定値はimport時に固定
+MAX_CLAIM_LENGTH = settings.max_claim_length
+
+# バッチ評価で受け付ける主張の最大件数と、主張抽出・エビデンス検索の同時実行数
+MAX_BATCH_CLAIMS = 20
+BATCH_SEARCH_CONCURRENCY = 4
+
+_redis_client = None
+
+
+def _claim_hash(claim_text: str) -> str:
+    """キャッシュキー用の主張テキストのハッシュ"""
+    return hashlib.sha1(claim_text.encode("utf-8")).hexdigest()
+
+
+# ttl_bucketはcache_ttlごとに変わるため、プロセス内キャッシュもTTL経過で自然に失効する
+@lru_cache(maxsize=1024)
+def _extract_cached(text_hash: str, claim_text: str, ttl_bucket: int) -> dict:
+    return extract_main_claim(claim_text)
+
+
+# PubMed検索結果のプロセス内LRU（(主張ハッシュ, ttl_bucket) → エビデンス）
+SEARCH_CACHE_SIZE = 1024
+_search_cache: "OrderedDict[Tuple[str, int], list]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+def _search_cached(text_hash: str, claim_text: str, ttl_bucket: int) -> Tuple[list, bool]:
+    """(エビデンス, キャッシュヒット) を返す。検索失敗（空結果）はキャッシュしない"""
+    key = (text_hash, ttl_bucket)
+    with _search_cache_lock:
+        cached = _search_cache.get(key)
+        if cached is not None:
+            _search_cache.move_to_end(key)
+            return cached, True
+    
+    evidence_list = search_evidence(claim_text, max_results=5)
+    if evidence_list:
+        with _search_cache_lock:
+            _search_cache[key] = evidence_list
+            _search_cache.move_to_end(key)
+            while len(_search_cache) > SEARCH_CACHE_SIZE:
+                _search_cache.popitem(last=False)
+    return evidence_list, False
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = aioredis.from_url(settings.redis_url)
+    return _redis_client
+
+
+async def _gather_extract_and_search(extract, search) -> list:
+    """主張抽出（CPU）とPubMed検索（I/O）は互いに独立なのでスレッドで並行実行"""
+    return await asyncio.gather(asyncio.to_thread(extract), asyncio.to_thread(search))
+
+
+async def _extract_and_search(claim_text: str, text_hash: str) -> tuple:
+    """主張抽出とエビデンス検索（キャッシュ有効時はハッシュで再利用）。(抽出結果, エビデンス, キャッシュヒット) を返す"""
+    def extract():
+        return extract_main_claim(claim_text)
+    
+    def search():
+        return search_evidence(claim_text, max_results=5)
+    
+    if not settings.enable_cache:
+        claim_extract, evidence_list = await _gather_extract_and_search(extract, search)
+        return claim_extract, evidence_list, False
+    
+    if settings.redis_url and aioredis:
+        key = f"claim:{text_hash}"
+        try:
+            cached = await _get_redis().get(key)
+            if cached:
+                data = json.loads(cached)
+                return data["extracted_claim"], data["evidence_list"], True
+        except Exception as e:
+            print(f"キャッシュ取得エラー: {e}")
+        
+        claim_extract, evidence_list = await _gather_extract_and_search(extract, search)
+        # 検索失敗（空結果）はキャッシュしない
+        if evidence_list:
+            try:
+                payload = json.dumps({"extracted_claim": claim_extract, "evidence_list": evidence_list}, ensure_ascii=False)
+                await _get_redis().setex(key, settings.cache_ttl, payload)
+            except Exception as e:
+                print(f"キャッシュ保存エラー: {e}")
+        return claim_extract, evidence_list, False
+    
+    # Redisなし：プロセス内LRU（呼び出し側で変更されても壊れないようコピーを返す）
+    ttl_bucket = int(time.time() // settings.cache_ttl)
+    claim_extract, (evidence_list, cache_hit) = await _gather_extract_and_search(
+        lambda: _extract_cached(text_hash, claim_text, ttl_bucket),
+        lambda: _search_cached(text_hash, claim_text, ttl_bucket)
+    )
+    return copy.deepcopy(claim_extract), copy.deepcopy(evidence_list), cache_hit
+
+
+def _structure_result(score_result: dict, claim_extract: dict, evidence_list: list, cache_hit: bool) -> dict:
+    """スコア計算結果をAPIレスポンス用の辞書に構造化"""
+    axis_scores = {
+        "clarity": score_result["scores"].clarity,
+        "evidence_quality": score_result["scores"].evidence_quality,
+        "consensus": score_result["scores"].consensus,
+        "biological_plausibility": score_result["scores"].biological_plausibility,
+        "transparency": score_result["scores"].transparency,
+        "context_distortion": score_result["scores"].context_distortion,
+        "harm_potential": score_result["scores"].harm_potential,
+        "virality": score_result["scores"].virality,
+        "correction_response": score_result["scores"].correction_response
+    }
+    
+    return {
+        "total_score": score_result["total_score"],
+        "label": score_result["label"],
+        "axis_scores": axis_scores,
+        "rationales": score_result["rationales"],
+        "evidence_list": evidence_list,
+        "extracted_claim": claim_extract,
+        "cache_hit": cache_hit
+    }
+
 
 async def process_claim_comprehensive(claim_text: str, source_url: str = None) -> dict:
     """
     包括的な主張評価：extract→evidence→scoring の統合処理
     """
     try:
-        # Step 1: 主張抽出
-        claim_extract = extract_main_claim(claim_text)
-        
-        # Step 2: エビデンス検索（PubMed）
-        evidence_list = search_evidence(claim_text, max_results=5)
+        # Step 1-2: 主張抽出・エビデンス検索（PubMed）
+        text_hash = _claim_hash(claim_text)
+        # 処理時間の上限（processing_timeout）を超えた場合はフォールバックへ
+        claim_extract, evidence_list, cache_hit = await asyncio.wait_for(
+            _extract_and_search(claim_text, text_hash),
+            timeout=settings.processing_timeout
+        )
         
         # Step 3: 包括的スコア計算
         score_result = calculate_evidence_score(
@@ -32,34 +167,66 @@ async def process_claim_comprehensive(claim_text: str, source_url: str = None) -
             source_url=source_url
         )
         
-        # 結果の構造化
-        axis_scores = {
-            "clarity": score_result["scores"].clarity,
-            "evidence_quality": score_result["scores"].evidence_quality,
-            "consensus": score_result["scores"].consensus,
-            "biological_plausibility": score_result["scores"].biological_plausibility,
-            "transparency": score_result["scores"].transparency,
-            "context_distortion": score_result["scores"].context_distortion,
-            "harm_potential": score_result["scores"].harm_potential,
-            "virality": score_result["scores"].virality,
-            "correction_response": score_result["scores"].correction_response
-        }
-        
-        return {
-            "total_score": score_result["total_score"],
-            "label": score_result["label"],
-            "axis_scores": axis_scores,
-            "rationales": score_result["rationales"],
-            "evidence_list": evidence_list,
-            "extracted_claim": claim_extract
-        }
+        return _structure_result(score_result, claim_extract, evidence_list, cache_hit)
         
+    except asyncio.TimeoutError:
+        print(f"包括的評価タイムアウト: {settings.processing_timeout}秒を超過")
+        return await fallback_scoring(claim_text)
     except Exception as e:
         # エラー時はフォールバック（簡易スコア）
         print(f"包括的評価エラー: {e}")
         return await fallback_scoring(claim_text)
 
 
+async def process_claims_batch(claim_texts: List[str], source_urls: List[Optional[str]]) -> List[dict]:
+    """
+    複数主張の包括的評価：抽出・検索は同時実行数を制限して並行、スコア計算（NLI）は全主張まとめて1回
+    """
+    # セマフォはイベントループに結びつくためリクエストごとに作る
+    semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+    
+    async def extract_and_search(claim_text: str):
+        async with semaphore:
+            return await asyncio.wait_for(
+                _extract_and_search(claim_text, _claim_hash(claim_text)),
+                timeout=settings.processing_timeout
+            )
+    
+    searched = await asyncio.gather(
+        *(extract_and_search(claim_text) for claim_text in claim_texts), return_exceptions=True
+    )
+    
+    # 抽出・検索に失敗した主張だけフォールバックにする
+    results: List[Optional[dict]] = [None] * len(claim_texts)
+    succeeded = []
+    for i, item in enumerate(searched):
+        if isinstance(item, asyncio.TimeoutError):
+            print(f"包括的評価タイムアウト（{i + 1}件目）: {settings.processing_timeout}秒を超過")
+        elif isinstance(item, BaseException):
+            print(f"包括的評価エラー（{i + 1}件目）: {item}")
+        else:
+            succeeded.append(i)
+    
+    if succeeded:
+        try:
+            score_results = calculate_evidence_scores(
+                claim_dicts=[searched[i][0] for i in succeeded],
+                evidence_lists=[searched[i][1] for i in succeeded],
+                original_texts=[claim_texts[i] for i in succeeded],
+                source_urls=[source_urls[i] for i in succeeded]
+            )
+            for i, score_result in zip(succeeded, score_results):
+                claim_extract, evidence_list, cache_hit = searched[i]
+                results[i] = _structure_result(score_result, claim_extract, evidence_list, cache_hit)
+        except Exception as e:
+            print(f"包括的評価エラー: {e}")
+    
+    return [
+        result if result is not None else await fallback_scoring(claim_text)
+        for result, claim_text in zip(results, claim_texts)
+    ]
+
+
 async def fallback_scoring(claim_text: str) -> dict:
     """フォールバック用の簡易スコア計算"""
     text_length = len(claim_text)
@@ -106,15 +273,105 @@ async def fallback_scoring(claim_text: str) -> dict:
             }
         ],
         "evidence_list": [],
-        "extracted_claim": {"text": claim_text, "confidence": 0.1, "type": "general"}
+        "extracted_claim": {"text": claim_text, "confidence": 0.1, "type": "general"},
+        "cache_hit": False
     }
 
 
+def _validate_claim_text(claim_text: str):
+    """主張文の入力検証（不正な場合はHTTPException）"""
+    if len(claim_text.strip()) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_INPUT", "message": "主張文が空です"}
+        )
+    
+    if len(claim_text) > MAX_CLAIM_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "CLAIM_TOO_LONG", "message": f"主張文が長すぎます（最大{MAX_CLAIM_LENGTH}文字）"}
+        )
+
+
+def _build_response(request: ClaimRequest, score_result: dict, processing_time: float) -> ClaimResponse:
+    """評価結果からClaimResponseを構築"""
+    # エビデンスリストの変換（NLI結果を含む）
+    analyzed_evidence = score_result.get("analyzed_evidence", score_result.get("evidence_list", []))
+    
+    # 要約はabstractを1回だけ取得して200文字で切り詰める
+    evidence_items = [
+        EvidenceItem(
+            source=evidence.get("pmid", "不明"),
+            title=evidence.get("title", ""),
+            stance=evidence.get("stance", "neutral"),  # NLI結果を使用
+            relevance_score=evidence.get("stance_confidence", evidence.get("relevance_score", 0.5)),
+            summary=(abstract := evidence.get("abstract", "") or "")[:200] + ("..." if len(abstract) > 200 else "")
+        )
+        for evidence in analyzed_evidence[:3]
+    ]
+    
+    # フォールバック：エビデンスがない場合
+    if not evidence_items:
+        evidence_items.append(EvidenceItem(
+            source="検索結果なし",
+            title="関連するエビデンスが見つかりませんでした",
+            stance="neutral",
+            relevance_score=0.0,
+            summary="PubMed検索で関連する研究が見つからなかったか、検索システムエラーが発生しました。"
+        ))
+    
+    # 理由リストの変換
+    rationale_items = []
+    for rationale in score_result.get("rationales", []):
+        rationale_items.append(Rationale(
+            axis=rationale.get("axis", "unknown"),
+            score=rationale.get("score", 0),
+            reasoning=rationale.get("reasoning", "")
+        ))
+    
+    # レスポンス構築（評価時刻は1回だけ取得して使い回す）
+    now = datetime.now()
+    response = ClaimResponse(
+        total_score=score_result["total_score"],
+        label=score_result["label"],
+        axis_scores=AxisScore(**score_result["axis_scores"]),
+        rationales=rationale_items,
+        evidence_top3=evidence_items,
+        metadata=ClaimReviewMetadata(
+            processing_time=processing_time,
+            timestamp=now,
+            model_version="integrated-0.2.0",
+            confidence=score_result.get("extracted_claim", {}).get("confidence", 0.5),
+            cache_hit=score_result.get("cache_hit", False)
+        ),
+        claim_review=ClaimReviewSchema(
+            claimReviewed=request.claim_text,
+            reviewRating={
+                "@type": "Rating",
+                "ratingValue": score_result["total_score"],
+                "bestRating": 100,
+                "worstRating": 0,
+                "alternateName": score_result["label"]
+            },
+            itemReviewed={
+                "@type": "Claim",
+                "text": request.claim_text,
+                "url": request.source_url or ""
+            },
+            url="http://localhost:8000/api/v1/score",
+            datePublished=now.isoformat(),
+            author={
+                "@type": "Organization",
+                "name": "Evidence Checker"
+            }
+        )
+    )
+    
+    return response
+
+
 @router.post("/score", response_model=ClaimResponse)
-async def evaluate_claim(
-    request: ClaimRequest,
-    db: Session = Depends(get_db)
-):
+async def evaluate_claim(request: ClaimRequest):
     """
     主張の信頼性を9軸ルーブリックで評価
     """
@@ -122,17 +379,7 @@ async def evaluate_claim(
     
     try:
         # 入力検証
-        if len(request.claim_text.strip()) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail={"code": "INVALID_INPUT", "message": "主張文が空です"}
-            )
-        
-        if len(request.claim_text) > settings.max_claim_length:
-            raise HTTPException(
-                status_code=400,
-                detail={"code": "CLAIM_TOO_LONG", "message": f"主張文が長すぎます（最大{settings.max_claim_length}文字）"}
-            )
+        _validate_claim_text(request.claim_text)
         
         # 包括的なスコア計算
         score_result = await process_claim_comprehensive(request.claim_text, request.source_url)
@@ -140,75 +387,47 @@ async def evaluate_claim(
         # 処理時間計算
         processing_time = time.time() - start_time
         
-        # エビデンスリストの変換（NLI結果を含む）
-        evidence_items = []
-        analyzed_evidence = score_result.get("analyzed_evidence", score_result.get("evidence_list", []))
-        
-        for evidence in analyzed_evidence[:3]:
-            evidence_items.append(EvidenceItem(
-                source=evidence.get("pmid", "不明"),
-                title=evidence.get("title", ""),
-                stance=evidence.get("stance", "neutral"),  # NLI結果を使用
-                relevance_score=evidence.get("stance_confidence", evidence.get("relevance_score", 0.5)),
-                summary=evidence.get("abstract", "")[:200] + "..." if len(evidence.get("abstract", "")) > 200 else evidence.get("abstract", "")
-            ))
-        
-        # フォールバック：エビデンスがない場合
-        if not evidence_items:
-            evidence_items.append(EvidenceItem(
-                source="検索結果なし",
-                title="関連するエビデンスが見つかりませんでした",
-                stance="neutral",
-                relevance_score=0.0,
-                summary="PubMed検索で関連する研究が見つからなかったか、検索システムエラーが発生しました。"
-            ))
+        return _build_response(request, score_result, processing_time)
         
-        # 理由リストの変換
-        rationale_items = []
-        for rationale in score_result.get("rationales", []):
-            rationale_items.append(Rationale(
-                axis=rationale.get("axis", "unknown"),
-                score=rationale.get("score", 0),
-                reasoning=rationale.get("reasoning", "")
-            ))
-        
-        # レスポンス構築
-        response = ClaimResponse(
-            total_score=score_result["total_score"],
-            label=score_result["label"],
-            axis_scores=AxisScore(**score_result["axis_scores"]),
-            rationales=rationale_items,
-            evidence_top3=evidence_items,
-            metadata=ClaimReviewMetadata(
-                processing_time=processing_time,
-                timestamp=datetime.now(),
-                model_version="integrated-0.2.0",
-                confidence=score_result.get("extracted_claim", {}).get("confidence", 0.5)
-            ),
-            claim_review=ClaimReviewSchema(
-                claimReviewed=request.claim_text,
-                reviewRating={
-                    "@type": "Rating",
-                    "ratingValue": score_result["total_score"],
-                    "bestRating": 100,
-                    "worstRating": 0,
-                    "alternateName": score_result["label"]
-                },
-                itemReviewed={
-                    "@type": "Claim",
-                    "text": request.claim_text,
-                    "url": request.source_url or ""
-                },
-                url="http://localhost:8000/api/v1/score",
-                datePublished=datetime.now().isoformat(),
-                author={
-                    "@type": "Organization",
-                    "name": "Evidence Checker"
-                }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"code": "INTERNAL_ERROR", "message": f"内部エラーが発生しました: {str(e)}"}
+        )
+
+
+@router.post("/batch-score", response_model=List[ClaimResponse])
+async def evaluate_claims_batch(claims: List[ClaimRequest]):
+    """
+    複数の主張をまとめて評価（NLIの推論を全主張で1回にまとめる）
+    """
+    start_time = time.time()
+    
+    try:
+        # 入力検証
+        if not claims or len(claims) > MAX_BATCH_CLAIMS:
+            raise HTTPException(
+                status_code=400,
+                detail={"code": "INVALID_INPUT", "message": f"主張は1〜{MAX_BATCH_CLAIMS}件で指定してください"}
             )
+        for request in claims:
+            _validate_claim_text(request.claim_text)
+        
+        # 包括的なスコア計算
+        score_results = await process_claims_batch(
+            [request.claim_text for request in claims],
+            [request.source_url for request in claims]
         )
         
-        return response
+        # 処理時間はバッチ全体の所要時間
+        processing_time = time.time() - start_time
+        
+        return [
+            _build_response(request, score_result, processing_time)
+            for request, score_result in zip(claims, score_results)
+        ]
         
     except HTTPException:
         raise
@@ -216,4 +435,4 @@ async def evaluate_claim(
         raise HTTPException(
             status_code=500,
             detail={"code": "INTERNAL_ERROR", "message": f"内部エラーが発生しました: {str(e)}"}
-        )
\ No newline at end of file
+        )
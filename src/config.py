@@ -1,5 +1,7 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Optional
+
+__all__ = ["settings"]
 
 
 class Settings(BaseSettings):
@@ -10,24 +12,37 @@ class Settings(BaseSettings):
     app_name: str = "Evidence Checker API"
     app_version: str = "0.1.0"
     api_v1_prefix: str = "/api/v1"
+    cors_origins: List[str] = ["*"]  # 許可するオリジン。本番ではフロントエンドのオリジンを列挙する（例: CORS_ORIGINS='["https://example.com"]'）
     
     # External APIs
     ncbi_email: Optional[str] = None
     ncbi_api_key: Optional[str] = None
+    openai_api_key: Optional[str] = None
+    gemini_api_key: Optional[str] = None
+    deepseek_api_key: Optional[str] = None
+    normalization_api: str = "openai"  # 医学用語正規化で優先するAPI（openai / gemini / deepseek / fallback）
+    literature_search_api: str = "openai"  # 検索クエリ生成・関連度評価で優先するAPI
+    warmup_apis: bool = False  # 起動時にLLM APIへ接続確認を送り、初回リクエストのTLS確立を先に済ませる
     
     # Processing
     max_claim_length: int = 5000
     processing_timeout: int = 3
     max_concurrent_requests: int = 10
+    nli_torch_compile: bool = False  # NLIモデルをtorch.compileする（初回推論時にコンパイル時間がかかる）
+    nli_onnx_int8: bool = False  # CPU推論でint8量子化ONNXモデルを使う（optimum・onnxruntimeが必要）
+    nli_onnx_quantization: str = "avx512_vnni"  # 量子化の対象CPU（arm64 / avx2 / avx512 / avx512_vnni）
+    nli_model_dir: str = "./.cache/models"  # 量子化ONNXモデルの保存先
+    nli_num_threads: int = 0  # NLI推論のtorchスレッド数（0でtorchの既定値＝物理コア数。複数ワーカー時はコア数÷ワーカー数）
+    nli_max_seq_length: int = 256  # NLIモデルに渡す最大トークン数（超過分は切り捨て。0でモデルの既定値）
     
     # Cache
     enable_cache: bool = False
     redis_url: Optional[str] = None
     cache_ttl: int = 3600
+    llm_cache_dir: str = "./.cache"  # LLM応答（正規化・クエリ生成・関連度評価）のディスクキャッシュ
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # .envの読み込みはimport時の1回だけ。共有インスタンスは変更不可
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", frozen=True)
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,19 +1,37 @@
 import spacy
 import re
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # GiNZAモデルの初期化（グローバルで一度だけロード）
+# 下流では文分割（sent.text）しか使わないため、係り受け解析・固有表現抽出は無効化しsentencizerで分割する
 try:
     nlp = spacy.load("ja_ginza")
+    nlp.select_pipes(disable=[name for name in ("parser", "ner", "bunsetu_recognizer") if name in nlp.pipe_names])
+    nlp.add_pipe("sentencizer")
 except OSError:
     # GiNZAモデルがない場合のフォールバック
     nlp = None
 
+# 効果量（%・倍）の検出パターン
+EFFECT_SIZE_PATTERN = re.compile(r'\d+[%％]|倍')
+# 正規表現フォールバック時の文分割
+SENTENCE_SPLIT_PATTERN = re.compile(r'[。！？\n]')
+
+# 抽出結果を保持するテキスト数（同じ主張の再評価では解析を省く）
+EXTRACT_CACHE_SIZE = 4096
+
 
-@dataclass
+@dataclass(frozen=True)
 class ExtractedClaim:
-    """抽出された主張の情報"""
+    """抽出された主張の情報（キャッシュした結果を共有するため不変）"""
     text: str
     confidence: float
     claim_type: str  # "causal", "effect", "safety", "general"
@@ -26,6 +44,10 @@ class ExtractedClaim:
 class ClaimExtractor:
     """日本語テキストから医学・健康関連の主張を抽出するクラス"""
     
+    # 抽出結果のLRU（テキスト → 主張のタプル）。パターンは全インスタンス共通のためクラスで共有する
+    _claims_cache: "OrderedDict[str, Tuple[ExtractedClaim, ...]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    
     def __init__(self):
         self.nlp = nlp
         
@@ -49,6 +71,14 @@ class ClaimExtractor:
             r"(.+?)を使用すると(.+?)のリスクが(増加|減少|高まる|下がる)"
         ]
         
+        # パターンを一度だけコンパイルし、種類ごとに1回のsearchで判定できる結合パターンも用意
+        self._causal_re = [re.compile(p) for p in self.causal_patterns]
+        self._effect_re = [re.compile(p) for p in self.effect_patterns]
+        self._safety_re = [re.compile(p) for p in self.safety_patterns]
+        self._causal_union = self._compile_union("c", self.causal_patterns)
+        self._effect_union = self._compile_union("e", self.effect_patterns)
+        self._safety_union = self._compile_union("s", self.safety_patterns)
+        
         # 医学・健康関連キーワード
         self.medical_keywords = {
             "病気", "疾患", "症状", "治療", "薬", "サプリメント", "ビタミン", "ミネラル",
@@ -56,48 +86,96 @@ class ClaimExtractor:
             "高血圧", "コレステロール", "血糖値", "血圧", "健康", "医療", "医学",
             "診断", "検査", "予防", "ワクチン", "接種", "食事", "運動", "睡眠"
         }
+        
+        # キーワード判定は1パスで済むようAho-Corasickオートマトンを構築（未導入時は結合正規表現）
+        if ahocorasick:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for keyword in self.medical_keywords:
+                self._keyword_automaton.add_word(keyword, keyword)
+            self._keyword_automaton.make_automaton()
+            self._keyword_pattern = None
+        else:
+            self._keyword_automaton = None
+            self._keyword_pattern = re.compile(
+                "|".join(re.escape(k) for k in sorted(self.medical_keywords, key=len, reverse=True))
+            )
     
     def extract_claims(self, text: str) -> List[ExtractedClaim]:
         """テキストから主張を抽出"""
-        if not self.nlp:
-            # GiNZAが利用できない場合は正規表現のみで処理
-            return self._extract_with_regex(text)
+        cached = self._cached_claims(text)
+        if cached is not None:
+            return list(cached)
         
-        claims = []
+        # 文書全体にキーワードが無ければ文分割・解析自体を省略
+        if not self._contains_medical_keywords(text):
+            claims = []
+        elif not self.nlp:
+            # GiNZAが利用できない場合は正規表現のみで処理
+            claims = self._extract_with_regex(text)
+        else:
+            # spaCyによる解析（文単位で処理）
+            doc = self.nlp(text)
+            claims = self._claims_from_sentences(sent.text for sent in doc.sents)
         
-        # spaCyによる解析
-        doc = self.nlp(text)
+        self._remember_claims(text, claims)
+        return claims
+    
+    def extract_claims_batch(self, texts: List[str], batch_size: int = 32) -> List[List[ExtractedClaim]]:
+        """複数テキストから主張を抽出（spaCyはnlp.pipeでまとめて処理）"""
+        results: List[List[ExtractedClaim]] = [[] for _ in texts]
+        targets = []
+        for i, text in enumerate(texts):
+            cached = self._cached_claims(text)
+            if cached is not None:
+                results[i] = list(cached)
+            elif self._contains_medical_keywords(text):
+                targets.append(i)
+            else:
+                self._remember_claims(text, results[i])
         
-        # 文単位で処理
-        for sent in doc.sents:
-            sent_text = sent.text.strip()
-            if len(sent_text) < 10:  # 短すぎる文はスキップ
-                continue
-                
-            # 医学・健康関連キーワードが含まれているかチェック
-            if not self._contains_medical_keywords(sent_text):
-                continue
-            
-            # パターンマッチングで主張を抽出
-            claim = self._extract_claim_from_sentence(sent_text)
-            if claim:
-                claims.append(claim)
+        if not self.nlp:
+            for i in targets:
+                results[i] = self._extract_with_regex(texts[i])
+                self._remember_claims(texts[i], results[i])
+            return results
         
-        return claims
+        docs = self.nlp.pipe((texts[i] for i in targets), batch_size=batch_size)
+        for i, doc in zip(targets, docs):
+            results[i] = self._claims_from_sentences(sent.text for sent in doc.sents)
+            self._remember_claims(texts[i], results[i])
+        return results
+    
+    def _cached_claims(self, text: str) -> Optional[Tuple[ExtractedClaim, ...]]:
+        with self._cache_lock:
+            claims = self._claims_cache.get(text)
+            if claims is not None:
+                self._claims_cache.move_to_end(text)
+            return claims
+    
+    def _remember_claims(self, text: str, claims: List[ExtractedClaim]) -> None:
+        with self._cache_lock:
+            self._claims_cache[text] = tuple(claims)
+            self._claims_cache.move_to_end(text)
+            if len(self._claims_cache) > EXTRACT_CACHE_SIZE:
+                self._claims_cache.popitem(last=False)
     
     def _extract_with_regex(self, text: str) -> List[ExtractedClaim]:
         """正規表現のみで主張を抽出（フォールバック）"""
+        return self._claims_from_sentences(SENTENCE_SPLIT_PATTERN.split(text))
+    
+    def _claims_from_sentences(self, sentences: Iterable[str]) -> List[ExtractedClaim]:
+        """文ごとにキーワード判定・パターンマッチングを行い主張を集める"""
         claims = []
-        sentences = re.split(r'[。！？\n]', text)
-        
         for sentence in sentences:
             sentence = sentence.strip()
-            if len(sentence) < 10:
+            if len(sentence) < 10:  # 短すぎる文はスキップ
                 continue
-                
+            
+            # 医学・健康関連キーワードが含まれているかチェック
             if not self._contains_medical_keywords(sentence):
                 continue
             
+            # パターンマッチングで主張を抽出
             claim = self._extract_claim_from_sentence(sentence)
             if claim:
                 claims.append(claim)
@@ -106,51 +184,69 @@ class ClaimExtractor:
     
     def _contains_medical_keywords(self, text: str) -> bool:
         """医学・健康関連キーワードが含まれているかチェック"""
-        return any(keyword in text for keyword in self.medical_keywords)
+        if self._keyword_automaton is not None:
+            return next(self._keyword_automaton.iter(text), None) is not None
+        return self._keyword_pattern.search(text) is not None
+    
+    @staticmethod
+    def _compile_union(prefix: str, patterns: List[str]) -> re.Pattern:
+        """複数パターンを名前付きグループの選択肢として1つに結合"""
+        return re.compile("|".join(f"(?P<{prefix}{i}>{p})" for i, p in enumerate(patterns)))
+    
+    @staticmethod
+    def _first_match(union: re.Pattern, compiled: List[re.Pattern], sentence: str) -> Optional[re.Match]:
+        """リスト順で最初にマッチするパターンのMatchを返す（結合パターンで事前判定）"""
+        hit = union.search(sentence)
+        if not hit:
+            return None
+        # 結合パターンで当たった番号より前のパターンだけ個別に確認すれば元の優先順位と一致する
+        index = int(hit.lastgroup[1:])
+        for pattern in compiled[:index + 1]:
+            match = pattern.search(sentence)
+            if match:
+                return match
+        return None
     
     def _extract_claim_from_sentence(self, sentence: str) -> Optional[ExtractedClaim]:
         """文から主張を抽出"""
         # 因果関係パターン
-        for pattern in self.causal_patterns:
-            match = re.search(pattern, sentence)
-            if match:
-                return ExtractedClaim(
-                    text=sentence,
-                    confidence=0.8,
-                    claim_type="causal",
-                    subject=match.group(1).strip(),
-                    predicate=match.group(3).strip() if len(match.groups()) >= 3 else None,
-                    object=match.group(2).strip()
-                )
+        match = self._first_match(self._causal_union, self._causal_re, sentence)
+        if match:
+            return ExtractedClaim(
+                text=sentence,
+                confidence=0.8,
+                claim_type="causal",
+                subject=match.group(1).strip(),
+                predicate=match.group(3).strip() if len(match.groups()) >= 3 else None,
+                object=match.group(2).strip()
+            )
         
         # 効果パターン
-        for pattern in self.effect_patterns:
-            match = re.search(pattern, sentence)
-            if match:
-                effect_size = None
-                groups = match.groups()
-                for group in groups:
-                    if re.search(r'\d+[%％]|倍', str(group)):
-                        effect_size = group
-                        break
-                
-                return ExtractedClaim(
-                    text=sentence,
-                    confidence=0.7,
-                    claim_type="effect",
-                    effect_size=effect_size
-                )
+        match = self._first_match(self._effect_union, self._effect_re, sentence)
+        if match:
+            effect_size = None
+            groups = match.groups()
+            for group in groups:
+                if EFFECT_SIZE_PATTERN.search(str(group)):
+                    effect_size = group
+                    break
+            
+            return ExtractedClaim(
+                text=sentence,
+                confidence=0.7,
+                claim_type="effect",
+                effect_size=effect_size
+            )
         
         # 安全性パターン
-        for pattern in self.safety_patterns:
-            match = re.search(pattern, sentence)
-            if match:
-                return ExtractedClaim(
-                    text=sentence,
-                    confidence=0.6,
-                    claim_type="safety",
-                    subject=match.group(1).strip()
-                )
+        match = self._first_match(self._safety_union, self._safety_re, sentence)
+        if match:
+            return ExtractedClaim(
+                text=sentence,
+                confidence=0.6,
+                claim_type="safety",
+                subject=match.group(1).strip()
+            )
         
         # 一般的な医学・健康主張（キーワードベース）
         if self._contains_medical_keywords(sentence):
@@ -164,7 +260,10 @@ class ClaimExtractor:
     
     def get_main_claim(self, text: str) -> Optional[ExtractedClaim]:
         """テキストからメインの主張を1つ抽出"""
-        claims = self.extract_claims(text)
+        return self._select_main(self.extract_claims(text))
+    
+    @staticmethod
+    def _select_main(claims: List[ExtractedClaim]) -> Optional[ExtractedClaim]:
         if not claims:
             return None
         
@@ -172,11 +271,8 @@ class ClaimExtractor:
         return max(claims, key=lambda c: c.confidence)
 
 
-def extract_main_claim(text: str) -> Dict:
-    """メイン関数：テキストからメインの主張を抽出"""
-    extractor = ClaimExtractor()
-    claim = extractor.get_main_claim(text)
-    
+def _format(claim: Optional[ExtractedClaim], text: str) -> Dict:
+    """抽出結果をAPI用の辞書に変換"""
     if claim:
         return {
             "text": claim.text,
@@ -196,4 +292,19 @@ def extract_main_claim(text: str) -> Dict:
             "predicate": None,
             "object": None,
             "effect_size": None
-        }
\ No newline at end of file
+        }
+
+
+# 構築後は読み取り専用のため、nlpと同様にモジュール全体で共有
+_EXTRACTOR = ClaimExtractor()
+
+
+def extract_main_claim(text: str) -> Dict:
+    """メイン関数：テキストからメインの主張を抽出"""
+    return _format(_EXTRACTOR.get_main_claim(text), text)
+
+
+def extract_main_claims_batch(texts: List[str]) -> List[Dict]:
+    """複数テキストのメイン主張をまとめて抽出（バッチ用）"""
+    claims_per_text = _EXTRACTOR.extract_claims_batch(texts)
+    return [_format(_EXTRACTOR._select_main(claims), text) for claims, text in zip(claims_per_text, texts)]
@@ -5,20 +5,170 @@ Stage 1の医学用語正規化結果を活用して、PubMed検索を最適化
 OpenAI APIによる検索クエリ最適化とフィルタリング機能を提供。
 """
 
+import asyncio
 import json
 import logging
+import os
+from collections import Counter
+from datetime import datetime
+from itertools import islice, zip_longest
+from string import Template
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from openai import OpenAI
+import msgspec
+import orjson
 
 from src.config import settings
-from src.core.medical_normalizer_v2 import MedicalTermNormalizer, NormalizedClaim
+from src.core.medical_normalizer_v2 import NormalizedClaim, log_prompt_cache_usage, normalizer as shared_normalizer
 from src.utils.pubmed import PubMedSearcher, PubMedArticle
+from src.utils.cache import TwoTierCache, make_cache_key
+from src.utils import io_loop
 
 logger = logging.getLogger(__name__)
 
+# 検索信頼度で高品質とみなす研究タイプ
+HIGH_QUALITY_STUDY_TYPES = frozenset({"meta-analysis", "randomized_controlled_trial"})
 
-@dataclass
+# 論文ごとの個別関連度評価の同時実行数
+RELEVANCE_CONCURRENCY = 5
+
+
+class _RelevanceMessage(msgspec.Struct):
+    """関連度評価のAPI応答（欠けた項目は既定値）"""
+    relevance_score: float = 0.5
+    relevance_reasoning: str = "評価不可"
+    evidence_strength: str = "insufficient"
+    supports_claim: Optional[bool] = None
+
+
+class _BatchRelevanceItem(_RelevanceMessage, kw_only=True):
+    """一括評価応答の1要素"""
+    idx: int
+
+
+class _BatchRelevanceMessage(msgspec.Struct):
+    """一括評価のAPI応答"""
+    evaluations: List[_BatchRelevanceItem] = []
+
+
+# 応答JSONを中間dictを作らずに直接Structへデコードする
+_RELEVANCE_DECODER = msgspec.json.Decoder(_RelevanceMessage)
+_BATCH_RELEVANCE_DECODER = msgspec.json.Decoder(_BatchRelevanceMessage)
+
+# プロンプト
+# 固定部分はsystemメッセージ、userメッセージは主張・論文の可変部分のみ（理由はlog_prompt_cache_usage参照）
+QUERY_SYSTEM_PROMPT = """PubMed検索の専門家として、効果的な検索戦略を提案してください。
+
+与えられた正規化された医学主張について、PubMed検索用の効果的なクエリを3つ生成してください。
+
+以下の観点から多角的なクエリを作成:
+1. 直接的な介入-結果関係の研究
+2. 系統的レビュー・メタ解析
+3. 最新の臨床研究
+
+重要な要求:
+- MeSH用語を適切に使用
+- 研究の質を向上させるフィルターを含める
+- 英語の正確な医学用語を使用
+- 各クエリは異なる検索戦略を採用
+
+JSON形式で出力:
+{"queries": ["query1", "query2", "query3"]}"""
+
+_RELEVANCE_CRITERIA = """評価基準:
+- 1.0: 主張に直接関連し、高品質な研究
+- 0.8: 主張に関連し、信頼できる研究
+- 0.6: 部分的に関連、参考になる
+- 0.4: 間接的に関連
+- 0.2: わずかに関連
+- 0.0: 関連なし"""
+
+RELEVANCE_SYSTEM_PROMPT = """医学文献の関連度評価の専門家として、客観的で厳格な評価を行ってください。
+
+与えられた医学論文が、指定された主張にどの程度関連しているか評価してください。
+
+以下の形式でJSON評価を出力:
+{
+    "relevance_score": 0.0から1.0の数値,
+    "relevance_reasoning": "関連度の理由（50文字以内）",
+    "evidence_strength": "strong/moderate/weak/insufficient",
+    "supports_claim": true/false/null
+}
+
+""" + _RELEVANCE_CRITERIA
+
+BATCH_RELEVANCE_SYSTEM_PROMPT = """医学文献の関連度評価の専門家として、客観的で厳格な評価を行ってください。
+
+与えられた医学論文リストの各論文が、指定された主張にどの程度関連しているか評価してください。
+
+以下の形式でJSON評価を出力（論文ごとに1要素、idxは論文リストのidx）:
+{
+    "evaluations": [
+        {
+            "idx": 0,
+            "relevance_score": 0.0から1.0の数値,
+            "relevance_reasoning": "関連度の理由（50文字以内）",
+            "evidence_strength": "strong/moderate/weak/insufficient",
+            "supports_claim": true/false/null
+        }
+    ]
+}
+
+""" + _RELEVANCE_CRITERIA
+
+QUERY_PROMPT = Template("""正規化結果:
+- 医学用語: $medical_terms
+- 基本クエリ: $search_query
+- 医学分野: $medical_field
+- 介入: $intervention
+- 結果: $outcome
+- 対象集団: $population""")
+
+_CLAIM_SECTION = """主張の正規化結果:
+- 医学用語: $medical_terms
+- 検索クエリ: $search_query
+- 医学分野: $medical_field
+- 介入: $intervention
+- 結果: $outcome"""
+
+BATCH_RELEVANCE_PROMPT = Template(_CLAIM_SECTION + """
+
+論文リスト:
+$articles""")
+
+RELEVANCE_PROMPT = Template(_CLAIM_SECTION + """
+
+論文情報:
+- タイトル: $title
+- アブストラクト: $abstract
+- 研究タイプ: $study_type
+- ジャーナル: $journal""")
+
+
+def _merge_pmids(pmid_lists: List[List[str]], limit: int) -> List[str]:
+    """
+    クエリごとのPMIDリスト（各々関連度順）を重複なしで統合
+    
+    各クエリの上位から順番に1件ずつ取り出して並べるため、件数の上限内で全クエリの上位論文が含まれる。
+    """
+    interleaved = (pmid for rank in zip_longest(*pmid_lists) for pmid in rank if pmid is not None)
+    return list(islice(dict.fromkeys(interleaved), limit))
+
+
+def _claim_fields(normalized: NormalizedClaim) -> Dict[str, str]:
+    """プロンプトに埋め込む正規化結果の各項目"""
+    return {
+        "medical_terms": ", ".join(normalized.medical_terms),
+        "search_query": normalized.search_query,
+        "medical_field": normalized.medical_field,
+        "intervention": normalized.intervention,
+        "outcome": normalized.outcome,
+        "population": normalized.population,
+    }
+
+
+
+@dataclass(slots=True, frozen=True)
 class LiteratureSearchResult:
     """文献検索結果データ"""
     original_claim: str
@@ -30,7 +180,7 @@ class LiteratureSearchResult:
     api_used: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ArticleRelevance:
     """論文関連度評価"""
     article: PubMedArticle
@@ -51,19 +201,22 @@ class LiteratureSearcher:
             preferred_api: 使用するAPI ("openai", "gemini", "deepseek", "fallback")
         """
         self.preferred_api = preferred_api or settings.literature_search_api
-        self.normalizer = MedicalTermNormalizer()
+        # 正規化器はモジュール共通のインスタンスを使い、APIクライアントの重複生成を避ける
+        self.normalizer = shared_normalizer
         self.pubmed_searcher = PubMedSearcher()
+        # クエリ生成・関連度評価のLLM応答キャッシュ（プロンプト単位）
+        self._cache = TwoTierCache(os.path.join(settings.llm_cache_dir, "literature"), expire=settings.cache_ttl)
         
-        # OpenAI クライアント初期化
-        self.openai_client = None
-        if settings.openai_api_key:
-            try:
-                self.openai_client = OpenAI(api_key=settings.openai_api_key)
-                logger.info("✅ LiteratureSearcher: OpenAI API初期化完了")
-            except Exception as e:
-                logger.warning(f"❌ LiteratureSearcher: OpenAI API初期化失敗: {e}")
+        # OpenAI クライアント（正規化器と共有し、接続プールを一本化）
+        self.openai_client = self.normalizer.clients.get("openai")
+        if self.openai_client:
+            logger.info("✅ LiteratureSearcher: OpenAI APIクライアント共有")
     
     def search_literature(self, claim_text: str, max_articles: int = 10) -> LiteratureSearchResult:
+        """包括的な文献検索を実行（同期版。引数・戻り値はasearch_literatureと同じ）"""
+        return io_loop.run_sync(self._search_literature(claim_text, max_articles))
+    
+    async def asearch_literature(self, claim_text: str, max_articles: int = 10) -> LiteratureSearchResult:
         """
         包括的な文献検索を実行
         
@@ -74,29 +227,31 @@ class LiteratureSearcher:
         Returns:
             LiteratureSearchResult: 検索結果
         """
+        return await io_loop.run(self._search_literature(claim_text, max_articles))
+    
+    async def _search_literature(self, claim_text: str, max_articles: int) -> LiteratureSearchResult:
+        """文献検索の本体（APIクライアント用の専用ループ上で実行）"""
         logger.info(f"🔍 文献検索開始: {claim_text[:50]}...")
         
         # Step 1: 医学用語正規化
-        normalized = self.normalizer.normalize_claim(claim_text)
+        normalized = await self.normalizer.anormalize_claim(claim_text)
         logger.info(f"📋 正規化完了: {normalized.search_query}")
         
         # Step 2: 検索クエリの生成・最適化
-        search_queries = self._generate_optimized_queries(normalized)
+        search_queries = await self._generate_optimized_queries(normalized)
         logger.info(f"🔧 検索クエリ生成: {len(search_queries)}個")
         
-        # Step 3: PubMed検索実行
-        all_articles = []
-        for query in search_queries:
-            articles = self.pubmed_searcher.search_articles(query, max_articles // len(search_queries))
-            all_articles.extend(articles)
-        
-        # 重複除去
-        unique_articles = self._remove_duplicates(all_articles)
+        # Step 3: PubMed検索実行（ESearchはクエリ間で並行し、PMIDを統合して上位のみ1回のEFetchで取得）
+        pmid_lists = await asyncio.gather(*(
+            self.pubmed_searcher.asearch_pmids(query, max_articles) for query in search_queries
+        ))
+        pmids = _merge_pmids(pmid_lists, max_articles)
+        unique_articles = await self.pubmed_searcher.afetch_details(pmids)
         logger.info(f"📚 検索結果: {len(unique_articles)}件の論文")
         
         # Step 4: 関連度評価とフィルタリング
         if self.openai_client and len(unique_articles) > 0:
-            filtered_articles = self._evaluate_article_relevance(normalized, unique_articles[:max_articles])
+            filtered_articles = await self._evaluate_article_relevance(normalized, unique_articles[:max_articles])
         else:
             filtered_articles = unique_articles[:max_articles]
         
@@ -115,7 +270,7 @@ class LiteratureSearcher:
             api_used=normalized.api_used
         )
     
-    def _generate_optimized_queries(self, normalized: NormalizedClaim) -> List[str]:
+    async def _generate_optimized_queries(self, normalized: NormalizedClaim) -> List[str]:
         """正規化結果から最適化された検索クエリを生成"""
         
         if not self.openai_client:
@@ -123,58 +278,30 @@ class LiteratureSearcher:
             return self._generate_fallback_queries(normalized)
         
         try:
-            prompt = f"""
-以下の正規化された医学主張について、PubMed検索用の効果的なクエリを3つ生成してください。
-
-正規化結果:
-- 医学用語: {', '.join(normalized.medical_terms)}
-- 基本クエリ: {normalized.search_query}
-- 医学分野: {normalized.medical_field}
-- 介入: {normalized.intervention}
-- 結果: {normalized.outcome}
-- 対象集団: {normalized.population}
-
-以下の観点から多角的なクエリを作成:
-1. 直接的な介入-結果関係の研究
-2. 系統的レビュー・メタ解析
-3. 最新の臨床研究
-
-重要な要求:
-- MeSH用語を適切に使用
-- 研究の質を向上させるフィルターを含める
-- 英語の正確な医学用語を使用
-- 各クエリは異なる検索戦略を採用
-
-JSON配列形式で出力:
-["query1", "query2", "query3"]
-"""
+            prompt = QUERY_PROMPT.substitute(_claim_fields(normalized))
+            
+            cache_key = make_cache_key("queries", QUERY_SYSTEM_PROMPT, prompt)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
             
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "PubMed検索の専門家として、効果的な検索戦略を提案してください。"},
+                    {"role": "system", "content": QUERY_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,
-                max_tokens=500
+                max_tokens=500,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # JSON部分を抽出
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "[" in content and "]" in content:
-                start = content.find("[")
-                end = content.rfind("]") + 1
-                json_str = content[start:end]
-            else:
-                json_str = content
-            
-            queries = json.loads(json_str)
+            log_prompt_cache_usage(response)
+            queries = orjson.loads(response.choices[0].message.content).get("queries")
             
             if isinstance(queries, list) and len(queries) > 0:
                 logger.info(f"✅ OpenAI APIによるクエリ最適化成功: {len(queries)}個")
+                self._cache.set(cache_key, queries)
                 return queries
             else:
                 raise ValueError("Invalid query format")
@@ -204,109 +331,129 @@ JSON配列形式で出力:
         
         return queries[:3] if queries else [normalized.search_query or "medical research"]
     
-    def _remove_duplicates(self, articles: List[PubMedArticle]) -> List[PubMedArticle]:
-        """重複論文を除去"""
-        seen_pmids = set()
-        unique_articles = []
-        
-        for article in articles:
-            if article.pmid not in seen_pmids:
-                seen_pmids.add(article.pmid)
-                unique_articles.append(article)
-        
-        return unique_articles
-    
-    def _evaluate_article_relevance(self, normalized: NormalizedClaim, articles: List[PubMedArticle]) -> List[PubMedArticle]:
+    async def _evaluate_article_relevance(self, normalized: NormalizedClaim, articles: List[PubMedArticle]) -> List[PubMedArticle]:
         """OpenAI APIを使用して論文の関連度を評価"""
         
         if not self.openai_client or not articles:
             return articles
         
+        # 個別評価（OpenAI呼び出し）の同時実行数は5まで
+        semaphore = asyncio.Semaphore(RELEVANCE_CONCURRENCY)
+        
+        async def evaluate(article: PubMedArticle) -> Optional[ArticleRelevance]:
+            async with semaphore:
+                try:
+                    return await self._evaluate_single_article(normalized, article)
+                except Exception as e:
+                    logger.warning(f"⚠️ 論文評価エラー: {e}")
+                    return None
+        
+        # 最初の10件を1回のAPI呼び出しでまとめて評価し、評価できなかった論文のみ個別に並行評価
+        targets = articles[:10]
+        relevances = await self._evaluate_articles_batch(normalized, targets) or [None] * len(targets)
+        missing = [i for i, relevance in enumerate(relevances) if relevance is None]
+        if missing:
+            individual = await asyncio.gather(*(evaluate(targets[i]) for i in missing))
+            for i, relevance in zip(missing, individual):
+                relevances[i] = relevance
+        
         evaluated_articles = []
+        for article, relevance in zip(targets, relevances):
+            if relevance is None:
+                evaluated_articles.append(article)  # エラー時は保持
+            elif relevance.relevance_score >= 0.6:  # 関連度60%以上のみ保持
+                evaluated_articles.append(article)
+                logger.debug(f"✅ 論文採用: {article.title[:50]}... (関連度: {relevance.relevance_score:.2f})")
+            else:
+                logger.debug(f"❌ 論文除外: {article.title[:50]}... (関連度: {relevance.relevance_score:.2f})")
+        
+        return evaluated_articles
+    
+    async def _evaluate_articles_batch(self, normalized: NormalizedClaim, articles: List[PubMedArticle]) -> Optional[List[Optional[ArticleRelevance]]]:
+        """
+        複数論文の関連度を1回のAPI呼び出しで評価
         
-        for article in articles[:10]:  # 最初の10件を評価
+        Returns:
+            論文順の評価結果（応答に含まれなかった論文はNone）。呼び出し・解析に失敗した場合はNone
+        """
+        article_list = [
+            {"idx": i, "title": article.title, "abstract": article.abstract[:500], "study_type": article.study_type}
+            for i, article in enumerate(articles)
+        ]
+        
+        prompt = BATCH_RELEVANCE_PROMPT.substitute(
+            _claim_fields(normalized), articles=json.dumps(article_list, ensure_ascii=False)
+        )
+        
+        cache_key = make_cache_key("relevance_batch", BATCH_RELEVANCE_SYSTEM_PROMPT, prompt)
+        evaluations = self._cache.get(cache_key)
+        
+        if evaluations is None:
             try:
-                relevance = self._evaluate_single_article(normalized, article)
-                if relevance.relevance_score >= 0.6:  # 関連度60%以上のみ保持
-                    evaluated_articles.append(article)
-                    logger.debug(f"✅ 論文採用: {article.title[:50]}... (関連度: {relevance.relevance_score:.2f})")
-                else:
-                    logger.debug(f"❌ 論文除外: {article.title[:50]}... (関連度: {relevance.relevance_score:.2f})")
-                    
+                response = await self.openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": BATCH_RELEVANCE_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=1200,
+                    response_format={"type": "json_object"}
+                )
+                
+                log_prompt_cache_usage(response)
+                result = _BATCH_RELEVANCE_DECODER.decode(response.choices[0].message.content)
+                
+                evaluations = {}
+                for item in result.evaluations:
+                    if 0 <= item.idx < len(articles):
+                        evaluation = msgspec.structs.asdict(item)
+                        del evaluation["idx"]
+                        evaluations[str(item.idx)] = evaluation
             except Exception as e:
-                logger.warning(f"⚠️ 論文評価エラー: {e}")
-                evaluated_articles.append(article)  # エラー時は保持
+                logger.warning(f"⚠️ 一括関連度評価失敗（個別評価に切り替え）: {e}")
+                return None
+            
+            if len(evaluations) == len(articles):
+                self._cache.set(cache_key, evaluations)
         
-        return evaluated_articles
+        return [
+            ArticleRelevance(article=article, **evaluations[str(i)]) if str(i) in evaluations else None
+            for i, article in enumerate(articles)
+        ]
     
-    def _evaluate_single_article(self, normalized: NormalizedClaim, article: PubMedArticle) -> ArticleRelevance:
+    async def _evaluate_single_article(self, normalized: NormalizedClaim, article: PubMedArticle) -> ArticleRelevance:
         """単一論文の関連度を評価"""
         
-        prompt = f"""
-以下の医学論文が、指定された主張にどの程度関連しているか評価してください。
-
-主張の正規化結果:
-- 医学用語: {', '.join(normalized.medical_terms)}
-- 検索クエリ: {normalized.search_query}
-- 医学分野: {normalized.medical_field}
-- 介入: {normalized.intervention}
-- 結果: {normalized.outcome}
-
-論文情報:
-- タイトル: {article.title}
-- アブストラクト: {article.abstract[:800]}
-- 研究タイプ: {article.study_type}
-- ジャーナル: {article.journal}
-
-以下の形式でJSON評価を出力:
-{{
-    "relevance_score": 0.0から1.0の数値,
-    "relevance_reasoning": "関連度の理由（50文字以内）",
-    "evidence_strength": "strong/moderate/weak/insufficient",
-    "supports_claim": true/false/null
-}}
-
-評価基準:
-- 1.0: 主張に直接関連し、高品質な研究
-- 0.8: 主張に関連し、信頼できる研究
-- 0.6: 部分的に関連、参考になる
-- 0.4: 間接的に関連
-- 0.2: わずかに関連
-- 0.0: 関連なし
-"""
+        prompt = RELEVANCE_PROMPT.substitute(
+            _claim_fields(normalized),
+            title=article.title,
+            abstract=article.abstract_truncated,
+            study_type=article.study_type,
+            journal=article.journal
+        )
+        
+        cache_key = make_cache_key("relevance", RELEVANCE_SYSTEM_PROMPT, prompt)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return ArticleRelevance(article=article, **cached)
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "医学文献の関連度評価の専門家として、客観的で厳格な評価を行ってください。"},
+                    {"role": "system", "content": RELEVANCE_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=300
+                max_tokens=300,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # JSON抽出
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0]
-            elif "{" in content and "}" in content:
-                start = content.find("{")
-                end = content.rfind("}") + 1
-                json_str = content[start:end]
-            else:
-                json_str = content
-            
-            result = json.loads(json_str)
-            
-            return ArticleRelevance(
-                article=article,
-                relevance_score=result.get("relevance_score", 0.5),
-                relevance_reasoning=result.get("relevance_reasoning", "評価不可"),
-                evidence_strength=result.get("evidence_strength", "insufficient"),
-                supports_claim=result.get("supports_claim")
-            )
+            log_prompt_cache_usage(response)
+            evaluation = msgspec.structs.asdict(_RELEVANCE_DECODER.decode(response.choices[0].message.content))
+            self._cache.set(cache_key, evaluation)
+            return ArticleRelevance(article=article, **evaluation)
             
         except Exception as e:
             logger.warning(f"論文関連度評価エラー: {e}")
@@ -324,20 +471,16 @@ JSON配列形式で出力:
         if not articles:
             return f"「{normalized.search_query}」に関する論文が見つかりませんでした。"
         
-        # 研究タイプの分布
-        study_types = {}
-        for article in articles:
-            study_type = article.study_type or "other"
-            study_types[study_type] = study_types.get(study_type, 0) + 1
-        
-        # 新しい研究の割合
+        # 研究タイプの分布と新しい研究の数（1回の走査で集計）
+        # ※ 新しい研究は先頭論文に出版日がある場合のみ数える
+        count_recent = articles[0].publication_date is not None
+        current_year = datetime.now().year
+        study_types = Counter()
         recent_count = 0
-        if articles[0].publication_date:
-            from datetime import datetime
-            current_year = datetime.now().year
-            for article in articles:
-                if article.publication_date and (current_year - article.publication_date.year) <= 5:
-                    recent_count += 1
+        for article in articles:
+            study_types[article.study_type or "other"] += 1
+            if count_recent and article.publication_date and (current_year - article.publication_date.year) <= 5:
+                recent_count += 1
         
         study_type_summary = ", ".join([f"{k}: {v}件" for k, v in study_types.items()])
         
@@ -365,10 +508,7 @@ JSON配列形式で出力:
             confidence += 0.1
         
         # 研究の質による評価
-        high_quality_count = 0
-        for article in articles:
-            if article.study_type in ["meta-analysis", "randomized_controlled_trial"]:
-                high_quality_count += 1
+        high_quality_count = sum(1 for article in articles if article.study_type in HIGH_QUALITY_STUDY_TYPES)
         
         if high_quality_count >= 2:
             confidence += 0.3
@@ -6,23 +6,141 @@ PubMed検索に適した中立的なクエリを生成する。
 OpenAI, Gemini, DeepSeek APIに対応。
 """
 
-import json
 import logging
-from typing import Dict, List, Optional
-from dataclasses import dataclass
-from openai import OpenAI
+import os
+import re
+import asyncio
+import time
+from string import Template
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+import orjson
+from openai import AsyncOpenAI
 
 try:
     import google.generativeai as genai
 except ImportError:
     genai = None
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from src.config import settings
+from src.utils.cache import TwoTierCache, make_cache_key
+from src.utils.llm_json import extract_json
+from src.utils import io_loop
 
 logger = logging.getLogger(__name__)
 
+# フォールバック正規化用の日本語キーワード → 英語医学用語
+FALLBACK_MEDICAL_KEYWORDS: Dict[str, List[str]] = {
+    "ビタミンD": ["vitamin D", "cholecalciferol"],
+    "免疫": ["immune", "immunity", "immunomodulation"],
+    "心臓": ["cardiac", "cardiovascular", "heart"],
+    "血圧": ["blood pressure", "hypertension"],
+    "コレステロール": ["cholesterol", "lipid"],
+    "糖尿病": ["diabetes", "glucose", "insulin"],
+    "運動": ["exercise", "physical activity"],
+    "食事": ["diet", "nutrition", "dietary"],
+    "オメガ3": ["omega-3", "n-3 fatty acids"],
+    "緑茶": ["green tea", "catechins", "EGCG"],
+}
+
+# 全キーワードを1パスで検出するマッチャー（結果を辞書順に並べるため、キーワード→辞書内の順序で引く）
+_FALLBACK_TERMS = list(FALLBACK_MEDICAL_KEYWORDS)
+_FALLBACK_ORDER = {term: order for order, term in enumerate(_FALLBACK_TERMS)}
+# pyahocorasickが未導入の環境では、長い語を優先した正規表現の選択で同じく1パスで検出する
+_FALLBACK_PATTERN = re.compile("|".join(re.escape(k) for k in sorted(_FALLBACK_TERMS, key=len, reverse=True)))
+if ahocorasick:
+    _FALLBACK_AUTOMATON = ahocorasick.Automaton()
+    for _term, _order in _FALLBACK_ORDER.items():
+        _FALLBACK_AUTOMATON.add_word(_term, _order)
+    _FALLBACK_AUTOMATON.make_automaton()
+else:
+    _FALLBACK_AUTOMATON = None
+
+# 優先APIだけを先に呼び出す猶予（秒）。この間に応答がなければ他のAPIも並行して呼び出す
+PREFERRED_API_HEAD_START = 1.0
+
+# 正規化結果をメモリ上に保持する件数（再投稿・再評価される主張を想定）
+NORMALIZATION_CACHE_SIZE = 4096
+
+# API接続テスト結果の再利用期間（秒）。テストは実際にAPIを呼ぶため、監視・画面表示ごとには呼ばない
+API_TEST_TTL = 60
+
+# 正規化用プロンプト
+# 指示・出力形式・指針などの固定部分はsystemメッセージにまとめ、userメッセージは主張文のみとする（log_prompt_cache_usage参照）。
+NORMALIZATION_INSTRUCTIONS_JA = """与えられた日本語の健康・医学に関する主張を分析し、医学研究に適した形式に正規化してください。
+
+以下の情報をJSON形式で出力してください：
+
+{
+    "medical_terms": ["専門的な医学用語のリスト"],
+    "search_query": "PubMed検索用の英語クエリ（中立的な表現）",
+    "key_concepts": ["評価対象となる核心概念"],
+    "medical_field": "関連医学分野（例：cardiology, immunology, nutrition）",
+    "intervention": "介入・要因（例：vitamin D, exercise, drug name）",
+    "outcome": "結果・効果（例：immune function, mortality, disease risk）",
+    "population": "対象集団（例：adults, elderly, patients）",
+    "confidence": 0.0から1.0の数値（正規化の信頼度）
+}
+
+重要な指針：
+1. 検索クエリは中立的な表現を使用（"効果がある"→"effect", "良い"→"association"）
+2. 医学用語は正確で具体的なものを選択
+3. PubMed検索に適したキーワードを含める
+4. バイアスのない客観的な表現に変換"""
+
+NORMALIZATION_INSTRUCTIONS_EN = """Analyze the given health/medical claim and normalize it for medical research.
+
+Output the following information in JSON format:
+
+{
+    "medical_terms": ["list of specific medical terms"],
+    "search_query": "neutral PubMed search query",
+    "key_concepts": ["core concepts for evaluation"],
+    "medical_field": "relevant medical field",
+    "intervention": "intervention or factor",
+    "outcome": "outcome or effect",
+    "population": "target population",
+    "confidence": "confidence score from 0.0 to 1.0"
+}
+
+Guidelines:
+1. Use neutral terminology for search queries
+2. Convert subjective terms to objective medical language
+3. Include relevant MeSH terms where appropriate
+4. Focus on evidence-based terminology"""
+
+NORMALIZATION_SYSTEM_PROMPT_JA = (
+    "あなたは医学研究の専門家です。健康に関する一般的な表現を科学的で中立的な医学用語に正規化することが得意です。\n\n"
+    + NORMALIZATION_INSTRUCTIONS_JA
+)
+
+NORMALIZATION_SYSTEM_PROMPT_EN = (
+    "You are a medical research expert specializing in normalizing health claims into scientific terminology.\n\n"
+    + NORMALIZATION_INSTRUCTIONS_EN
+)
+
+NORMALIZATION_PROMPT_JA = Template('主張: "$claim_text"')
+NORMALIZATION_PROMPT_EN = Template('Claim: "$claim_text"')
 
-@dataclass
+
+def log_prompt_cache_usage(response) -> None:
+    """OpenAI互換APIのプロンプトキャッシュ利用状況をデバッグ出力
+    
+    固定部分をsystemメッセージに置くとmessagesの先頭がバイト単位で同一になり、
+    OpenAI側の自動プロンプトキャッシュの対象になる（正規化・文献検索の各プロンプト共通）。
+    """
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is not None:
+        logger.debug(f"💾 プロンプトキャッシュ: {details.cached_tokens}/{usage.prompt_tokens} tokens")
+
+
+@dataclass(slots=True, frozen=True)
 class NormalizedClaim:
     """正規化された主張データ"""
     original_text: str
@@ -35,6 +153,7 @@ class NormalizedClaim:
     population: Optional[str] = None
     confidence: float = 0.0
     api_used: str = "fallback"
+    cache_hit: bool = False
 
 
 class MedicalTermNormalizer:
@@ -49,11 +168,25 @@ class MedicalTermNormalizer:
         """
         self.preferred_api = preferred_api or settings.normalization_api
         self.clients = {}
+        # API正規化結果のキャッシュ（同じ主張・言語・APIなら再問い合わせしない）
+        self._cache = TwoTierCache(
+            os.path.join(settings.llm_cache_dir, "normalizer"),
+            maxsize=NORMALIZATION_CACHE_SIZE,
+            expire=settings.cache_ttl
+        )
+        # 実行中の正規化（キャッシュキー → Task）。専用ループ上でのみ操作する
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # API接続テストの結果（API名 → (確認時刻, 結果)）と実行中のテスト。専用ループ上でのみ操作する
+        self._api_test_results: Dict[str, Tuple[float, bool]] = {}
+        self._api_test_inflight: Dict[str, asyncio.Task] = {}
         
         # OpenAI
         if settings.openai_api_key:
             try:
-                self.clients["openai"] = OpenAI(api_key=settings.openai_api_key)
+                self.clients["openai"] = AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    http_client=io_loop.make_http_client()
+                )
                 logger.info("✅ OpenAI API クライアント初期化完了")
             except Exception as e:
                 logger.warning(f"❌ OpenAI API 初期化失敗: {e}")
@@ -70,9 +203,10 @@ class MedicalTermNormalizer:
         # DeepSeek (OpenAI互換)
         if settings.deepseek_api_key:
             try:
-                self.clients["deepseek"] = OpenAI(
+                self.clients["deepseek"] = AsyncOpenAI(
                     api_key=settings.deepseek_api_key,
-                    base_url="https://api.deepseek.com"
+                    base_url="https://api.deepseek.com",
+                    http_client=io_loop.make_http_client()
                 )
                 logger.info("✅ DeepSeek API クライアント初期化完了")
             except Exception as e:
@@ -82,6 +216,10 @@ class MedicalTermNormalizer:
         logger.info(f"🎯 優先API: {self.preferred_api}")
     
     def normalize_claim(self, claim_text: str, language: str = "ja", force_api: Optional[str] = None) -> NormalizedClaim:
+        """主張を医学用語に正規化する（同期版。引数・戻り値はanormalize_claimと同じ）"""
+        return io_loop.run_sync(self._normalize_claim(claim_text, language, force_api))
+    
+    async def anormalize_claim(self, claim_text: str, language: str = "ja", force_api: Optional[str] = None) -> NormalizedClaim:
         """
         主張を医学用語に正規化する
         
@@ -93,6 +231,10 @@ class MedicalTermNormalizer:
         Returns:
             NormalizedClaim: 正規化結果
         """
+        return await io_loop.run(self._normalize_claim(claim_text, language, force_api))
+    
+    async def _normalize_claim(self, claim_text: str, language: str, force_api: Optional[str]) -> NormalizedClaim:
+        """正規化の本体（APIクライアント用の専用ループ上で実行）"""
         api_to_use = force_api or self.preferred_api
         
         # 利用可能なAPIの順序で試行
@@ -103,50 +245,88 @@ class MedicalTermNormalizer:
             logger.warning("⚠️ 利用可能なAPIがありません。フォールバック正規化を実行します。")
             return self._fallback_normalize(claim_text)
         
-        for api_name in apis_to_try:
-            try:
-                logger.info(f"🔄 {api_name} APIで正規化を試行中...")
-                
-                if api_name == "gemini":
-                    result = self._normalize_with_gemini(claim_text, language)
-                elif api_name in ["openai", "deepseek"]:
-                    result = self._normalize_with_openai_compatible(claim_text, language, api_name)
-                else:
-                    continue
-                
-                result.api_used = api_name
-                logger.info(f"✅ {api_name} APIで正規化成功 (信頼度: {result.confidence:.2f})")
-                return result
+        cache_key = make_cache_key(claim_text, language, api_to_use)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"💾 正規化キャッシュヒット ({cached['api_used']})")
+            return NormalizedClaim(**{**cached, "cache_hit": True})
+        
+        # 同じ主張の正規化が実行中なら（段階評価と文献検索の同時実行など）その結果を共有する
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            inflight = asyncio.create_task(self._normalize_with_apis(cache_key, apis_to_try, claim_text, language))
+            self._inflight[cache_key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        return await asyncio.shield(inflight)
+    
+    async def _normalize_with_apis(self, cache_key: str, apis_to_try: List[str], claim_text: str, language: str) -> NormalizedClaim:
+        """APIで正規化してキャッシュに保存（全API失敗時はフォールバック）"""
+        # 優先APIに先行時間を与え、間に合わなければ（または失敗したら）残りのAPIも並行実行して最初の成功を採用
+        first_api, *other_apis = apis_to_try
+        logger.info(f"🔄 {first_api} APIで正規化を試行中...")
+        first_task = asyncio.create_task(self._call_api(first_api, claim_text, language))
+        tasks = {first_task: first_api}
+        
+        try:
+            if other_apis:
+                await asyncio.wait([first_task], timeout=PREFERRED_API_HEAD_START)
+                if not first_task.done() or first_task.exception() is not None:
+                    for api_name in other_apis:
+                        logger.info(f"🔄 {api_name} APIで正規化を試行中...")
+                        tasks[asyncio.create_task(self._call_api(api_name, claim_text, language))] = api_name
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    api_name = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"❌ {api_name} API正規化失敗: {str(e)}")
+                        continue
                     
-            except Exception as e:
-                logger.warning(f"❌ {api_name} API正規化失敗: {str(e)}")
-                continue
+                    logger.info(f"✅ {api_name} APIで正規化成功 (信頼度: {result.confidence:.2f})")
+                    self._cache.set(cache_key, asdict(result))
+                    return result
+        finally:
+            # 採用されなかった（または呼び出し元でキャンセルされた）問い合わせは打ち切る
+            for task in tasks:
+                task.cancel()
         
         logger.error("🚨 全てのAPI試行が失敗。フォールバック正規化を実行します。")
         return self._fallback_normalize(claim_text)
     
-    def _normalize_with_openai_compatible(self, claim_text: str, language: str, api_name: str) -> NormalizedClaim:
+    async def _call_api(self, api_name: str, claim_text: str, language: str) -> NormalizedClaim:
+        """指定APIで正規化"""
+        if api_name == "gemini":
+            return await self._normalize_with_gemini(claim_text, language)
+        elif api_name in ["openai", "deepseek"]:
+            return await self._normalize_with_openai_compatible(claim_text, language, api_name)
+        else:
+            raise ValueError(f"未対応のAPI: {api_name}")
+    
+    async def _normalize_with_openai_compatible(self, claim_text: str, language: str, api_name: str) -> NormalizedClaim:
         """OpenAI互換API（OpenAI/DeepSeek）での正規化"""
         client = self.clients[api_name]
         prompt = self._get_normalization_prompt(claim_text, language)
         
         model_name = "gpt-4o-mini" if api_name == "openai" else "deepseek-chat"
-        system_msg = ("あなたは医学研究の専門家です。健康に関する一般的な表現を科学的で中立的な医学用語に正規化することが得意です。" 
-                     if language == "ja" else 
-                     "You are a medical research expert specializing in normalizing health claims into scientific terminology.")
+        system_msg = NORMALIZATION_SYSTEM_PROMPT_JA if language == "ja" else NORMALIZATION_SYSTEM_PROMPT_EN
         
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model_name,
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.1,
-            max_tokens=1000
+            max_tokens=1000,
+            response_format={"type": "json_object"}
         )
         
-        content = response.choices[0].message.content.strip()
-        result = self._parse_json_response(content)
+        log_prompt_cache_usage(response)
+        result = orjson.loads(response.choices[0].message.content)
         
         confidence_boost = 0.9 if api_name == "openai" else 0.85
         
@@ -163,12 +343,14 @@ class MedicalTermNormalizer:
             api_used=api_name
         )
     
-    def _normalize_with_gemini(self, claim_text: str, language: str) -> NormalizedClaim:
+    async def _normalize_with_gemini(self, claim_text: str, language: str) -> NormalizedClaim:
         """Gemini APIでの正規化"""
         model = self.clients["gemini"]
-        prompt = self._get_normalization_prompt(claim_text, language)
+        # Geminiはsystemメッセージを使わないため、指示と主張文を連結して送る
+        instructions = NORMALIZATION_INSTRUCTIONS_JA if language == "ja" else NORMALIZATION_INSTRUCTIONS_EN
+        prompt = instructions + "\n\n" + self._get_normalization_prompt(claim_text, language)
         
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
         content = response.text.strip()
         result = self._parse_json_response(content)
         
@@ -186,96 +368,30 @@ class MedicalTermNormalizer:
         )
     
     def _parse_json_response(self, content: str) -> dict:
-        """APIレスポンスからJSONを抽出・パース"""
-        # JSON部分を抽出
-        if "```json" in content:
-            json_str = content.split("```json")[1].split("```")[0]
-        elif "{" in content and "}" in content:
-            start = content.find("{")
-            end = content.rfind("}") + 1
-            json_str = content[start:end]
-        else:
-            json_str = content
-        
-        return json.loads(json_str)
+        """APIレスポンスからJSONを抽出・パース（JSONモードのないGemini用）"""
+        return extract_json(content)
     
     def _get_normalization_prompt(self, claim_text: str, language: str) -> str:
-        """正規化用プロンプトを生成"""
-        if language == "ja":
-            return f"""
-以下の日本語の健康・医学に関する主張を分析し、医学研究に適した形式に正規化してください。
-
-主張: "{claim_text}"
-
-以下の情報をJSON形式で出力してください：
-
-{{
-    "medical_terms": ["専門的な医学用語のリスト"],
-    "search_query": "PubMed検索用の英語クエリ（中立的な表現）",
-    "key_concepts": ["評価対象となる核心概念"],
-    "medical_field": "関連医学分野（例：cardiology, immunology, nutrition）",
-    "intervention": "介入・要因（例：vitamin D, exercise, drug name）",
-    "outcome": "結果・効果（例：immune function, mortality, disease risk）",
-    "population": "対象集団（例：adults, elderly, patients）",
-    "confidence": 0.0から1.0の数値（正規化の信頼度）
-}}
-
-重要な指針：
-1. 検索クエリは中立的な表現を使用（"効果がある"→"effect", "良い"→"association"）
-2. 医学用語は正確で具体的なものを選択
-3. PubMed検索に適したキーワードを含める
-4. バイアスのない客観的な表現に変換
-"""
-        else:
-            return f"""
-Analyze the following health/medical claim and normalize it for medical research.
-
-Claim: "{claim_text}"
-
-Output the following information in JSON format:
-
-{{
-    "medical_terms": ["list of specific medical terms"],
-    "search_query": "neutral PubMed search query",
-    "key_concepts": ["core concepts for evaluation"],
-    "medical_field": "relevant medical field",
-    "intervention": "intervention or factor",
-    "outcome": "outcome or effect",
-    "population": "target population",
-    "confidence": "confidence score from 0.0 to 1.0"
-}}
-
-Guidelines:
-1. Use neutral terminology for search queries
-2. Convert subjective terms to objective medical language
-3. Include relevant MeSH terms where appropriate
-4. Focus on evidence-based terminology
-"""
+        """正規化用のuserメッセージ（主張文）を生成"""
+        template = NORMALIZATION_PROMPT_JA if language == "ja" else NORMALIZATION_PROMPT_EN
+        return template.substitute(claim_text=claim_text)
     
     def _fallback_normalize(self, claim_text: str) -> NormalizedClaim:
         """APIが利用できない場合のフォールバック正規化"""
         
-        # 基本的なキーワード抽出
-        medical_keywords = {
-            "ビタミンD": ["vitamin D", "cholecalciferol"],
-            "免疫": ["immune", "immunity", "immunomodulation"],
-            "心臓": ["cardiac", "cardiovascular", "heart"],
-            "血圧": ["blood pressure", "hypertension"],
-            "コレステロール": ["cholesterol", "lipid"],
-            "糖尿病": ["diabetes", "glucose", "insulin"],
-            "運動": ["exercise", "physical activity"],
-            "食事": ["diet", "nutrition", "dietary"],
-            "オメガ3": ["omega-3", "n-3 fatty acids"],
-            "緑茶": ["green tea", "catechins", "EGCG"],
-        }
+        # 基本的なキーワード抽出（出現したキーワードを辞書の順序で採用）
+        if _FALLBACK_AUTOMATON is not None:
+            hits = {order for _, order in _FALLBACK_AUTOMATON.iter(claim_text)}
+        else:
+            hits = {_FALLBACK_ORDER[m.group(0)] for m in _FALLBACK_PATTERN.finditer(claim_text)}
         
         search_terms = []
         key_concepts = []
         
-        for japanese_term, english_terms in medical_keywords.items():
-            if japanese_term in claim_text:
-                search_terms.extend(english_terms)
-                key_concepts.append(japanese_term)
+        for order in sorted(hits):
+            japanese_term = _FALLBACK_TERMS[order]
+            search_terms.extend(FALLBACK_MEDICAL_KEYWORDS[japanese_term])
+            key_concepts.append(japanese_term)
         
         search_query = " ".join(search_terms) if search_terms else claim_text
         
@@ -301,16 +417,53 @@ Guidelines:
         if api_name not in self.clients:
             return False
         
+        return io_loop.run_sync(self._cached_api_connection(api_name))
+    
+    async def atest_api_connection(self, api_name: str) -> bool:
+        """指定されたAPIの接続テスト（async版。引数・戻り値はtest_api_connectionと同じ）"""
+        if api_name == "fallback":
+            return True
+            
+        if api_name not in self.clients:
+            return False
+        
+        return await io_loop.run(self._cached_api_connection(api_name))
+    
+    def warm_up(self) -> None:
+        """全APIへ接続確認を送って接続を確立しておく（専用ループ上で実行し、完了を待たない）"""
+        for api_name in self.clients:
+            io_loop.submit(self._cached_api_connection(api_name))
+    
+    async def _cached_api_connection(self, api_name: str) -> bool:
+        """接続テスト（結果はAPI_TEST_TTL秒再利用し、同時のテストは1回の呼び出しを共有。専用ループ上で実行）"""
+        cached = self._api_test_results.get(api_name)
+        if cached is not None and time.monotonic() - cached[0] < API_TEST_TTL:
+            return cached[1]
+        
+        inflight = self._api_test_inflight.get(api_name)
+        if inflight is None:
+            inflight = asyncio.create_task(self._test_api_connection(api_name))
+            self._api_test_inflight[api_name] = inflight
+            inflight.add_done_callback(lambda task: self._remember_api_test(api_name, task))
+        return await asyncio.shield(inflight)
+    
+    def _remember_api_test(self, api_name: str, task: asyncio.Task) -> None:
+        self._api_test_inflight.pop(api_name, None)
+        if not task.cancelled():
+            self._api_test_results[api_name] = (time.monotonic(), task.result())
+    
+    async def _test_api_connection(self, api_name: str) -> bool:
+        """接続テストの本体（専用ループ上で実行）"""
         try:
             test_claim = "test"
             if api_name == "gemini":
                 model = self.clients[api_name]
-                response = model.generate_content("Say 'OK' if you can understand this.")
+                response = await model.generate_content_async("Say 'OK' if you can understand this.")
                 return "OK" in response.text
             else:
                 client = self.clients[api_name]
                 model_name = "gpt-4o-mini" if api_name == "openai" else "deepseek-chat"
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=model_name,
                     messages=[{"role": "user", "content": "Say 'OK'"}],
                     max_tokens=10
@@ -322,4 +475,6 @@ Guidelines:
 
 
 # グローバルインスタンス
-normalizer = MedicalTermNormalizer()
\ No newline at end of file
+normalizer = MedicalTermNormalizer()
+if settings.warmup_apis:
+    normalizer.warm_up()
\ No newline at end of file
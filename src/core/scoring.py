@@ -1,13 +1,46 @@
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+from dataclasses import dataclass, fields
 import re
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from src.core.extract import ExtractedClaim
 from src.utils.pubmed import PubMedArticle
-from src.core.nli import analyze_claim_evidence_stance
+from src.core.nli import analyze_claim_evidence_stance, analyze_claims_evidence_stance
+
 
+class PhraseMatcher:
+    """複数フレーズの出現をテキスト1回の走査で検出（pyahocorasick未導入時は部分文字列検索）"""
+    
+    def __init__(self, phrases: List[Tuple[str, Hashable]]):
+        """
+        Args:
+            phrases: (フレーズ, 検出時に返す値) のリスト
+        """
+        self.phrases = phrases
+        self._automaton = None
+        if ahocorasick:
+            self._automaton = ahocorasick.Automaton()
+            for phrase, payload in phrases:
+                self._automaton.add_word(phrase, (phrase, payload))
+            self._automaton.make_automaton()
+    
+    def find(self, text: str) -> Set[Tuple[str, Hashable]]:
+        """テキストに出現した (フレーズ, 値) の集合"""
+        if self._automaton is not None:
+            return {entry for _, entry in self._automaton.iter(text)}
+        return {(phrase, payload) for phrase, payload in self.phrases if phrase in text}
 
-@dataclass
+
+@dataclass(slots=True)
 class ScoreComponents:
     """スコア構成要素"""
     clarity: int = 0
@@ -21,9 +54,77 @@ class ScoreComponents:
     correction_response: int = 0
 
 
+# ScoreComponentsのフィールド順（重み配列と対応）
+_SCORE_FIELDS = tuple(f.name for f in fields(ScoreComponents))
+
+# 研究デザインごとの質スコア（未知のデザインは1）
+STUDY_QUALITY_SCORES = {
+    "meta-analysis": 5,
+    "randomized_controlled_trial": 4,
+    "cohort_study": 3,
+    "case_control": 2,
+    "cross_sectional": 2,
+    "case_report": 1,
+    "review": 2,
+    "other": 1
+}
+
+
+@lru_cache(maxsize=1024)
+def _quality_from_study_types(study_types: frozenset, count_bonus: bool) -> int:
+    """研究デザインの集合から証拠の質スコアを計算（3件以上ならボーナス+1、上限5）"""
+    max_quality = max(STUDY_QUALITY_SCORES.get(study_type, 1) for study_type in study_types)
+    if count_bonus:
+        max_quality = min(5, max_quality + 1)
+    return max_quality
+
+
 class EvidenceScorer:
     """エビデンスベースのスコアリングクラス"""
     
+    # 各軸の重み（_SCORE_FIELDSの順、合計100）。合計点は重み付き和を5で割った0-100
+    _WEIGHTS = np.array([10, 20, 15, 10, 10, 10, 15, 5, 5], dtype=np.int32)
+    
+    # 非現実的な主張
+    _IMPLAUSIBLE_PATTERNS = [re.compile(p) for p in [
+        r"水だけで.*(治る|完治)",
+        r"思考だけで.*(治療|治る)",
+        r"100[%％].*効果",
+        r"副作用.*一切.*ない",
+        r"即座に.*治る"
+    ]]
+    
+    # 妥当性のある表現
+    _PLAUSIBLE_PATTERNS = [re.compile(p) for p in [
+        r"改善.*可能性",
+        r"リスク.*低減",
+        r"効果.*報告",
+        r"研究.*示唆"
+    ]]
+    
+    # 相関と因果の混同
+    _CAUSAL_PATTERNS = [re.compile(p) for p in [
+        r"(.+)が(.+)を引き起こす",
+        r"(.+)が原因で(.+)",
+        r"(.+)のせいで(.+)"
+    ]]
+    
+    # 過剰一般化
+    _OVERGEN_PATTERNS = [re.compile(p) for p in [
+        r"すべて.*",
+        r"必ず.*",
+        r"絶対.*",
+        r"100[%％].*"
+    ]]
+    
+    # センセーショナルな表現（互いに重ならない語なので、出現した語の種類数を1回の走査で数えられる）
+    _VIRAL_RE = re.compile("驚愕|衝撃|緊急|拡散希望|シェア|信じられない")
+    
+    # 方法論・根拠・限界への言及（いずれかの出現を1回の走査で判定）
+    _METHODOLOGY_RE = re.compile("研究|調査|実験|分析|統計|被験者")
+    _CAUSAL_EVIDENCE_RE = re.compile("研究|実験|証明|エビデンス")
+    _LIMITATION_RE = re.compile("限界|制限|条件|個人差|場合による")
+    
     def __init__(self):
         # 危険なフレーズ辞書
         self.harmful_phrases = {
@@ -32,6 +133,16 @@ class EvidenceScorer:
             "差別誘発": ["○○人は", "○○は劣っている", "遺伝的に"],
             "経済詐欺": ["必ず痩せる", "絶対に治る", "副作用なし", "今だけ特価"]
         }
+        # カテゴリごとの害スコア上限（検出されたカテゴリの最小値がスコアになる）
+        self.harm_category_caps = {
+            "医療忌避": 0,  # 最も危険
+            "科学否定": 1,
+            "差別誘発": 1,
+            "経済詐欺": 2
+        }
+        
+        # 安全性への言及
+        self.safety_keywords = ["安全", "副作用", "リスク", "注意", "医師に相談"]
         
         # 信頼できる機関のキーワード
         self.trusted_sources = [
@@ -39,17 +150,17 @@ class EvidenceScorer:
             "Cochrane", "PubMed", "NEJM", "Lancet", "JAMA"
         ]
         
+        # フレーズ検出器（テキストごとに1回の走査）
+        # 害の評価は有害フレーズ（値はカテゴリ）と安全性キーワード（値はNone）を1つの辞書でまとめて検出する
+        self._harm_matcher = PhraseMatcher([
+            (phrase, category)
+            for category, phrases in self.harmful_phrases.items()
+            for phrase in phrases
+        ] + [(keyword, None) for keyword in self.safety_keywords])
+        self._trusted_matcher = PhraseMatcher([(source, source) for source in self.trusted_sources])
+        
         # 研究デザインの質的評価
-        self.study_quality_scores = {
-            "meta-analysis": 5,
-            "randomized_controlled_trial": 4,
-            "cohort_study": 3,
-            "case_control": 2,
-            "cross_sectional": 2,
-            "case_report": 1,
-            "review": 2,
-            "other": 1
-        }
+        self.study_quality_scores = STUDY_QUALITY_SCORES
     
     def calculate_comprehensive_score(
         self,
@@ -60,10 +171,46 @@ class EvidenceScorer:
     ) -> Dict:
         """包括的なスコア計算"""
         
-        scores = ScoreComponents()
+        # NLI分析を実行（呼び出しごとに用意されたエビデンスなので、立場はコピーせず直接書き込む）
+        analyzed_evidence, stance_summary = analyze_claim_evidence_stance(claim.text, evidence_list, copy_evidence=False)
         
-        # NLI分析を実行
-        analyzed_evidence, stance_summary = analyze_claim_evidence_stance(claim.text, evidence_list)
+        return self._score_with_stance(
+            claim, evidence_list, original_text, source_url, analyzed_evidence, stance_summary
+        )
+    
+    def score_batch(
+        self,
+        claims: List[ExtractedClaim],
+        evidence_lists: List[List[Dict]],
+        original_texts: List[str],
+        source_urls: Optional[List[Optional[str]]] = None
+    ) -> List[Dict]:
+        """複数の主張をまとめてスコア計算（NLIのエンコードは全主張で1回）"""
+        if source_urls is None:
+            source_urls = [None] * len(claims)
+        
+        # NLI分析を全主張まとめて実行
+        stance_results = analyze_claims_evidence_stance(
+            [claim.text for claim in claims], evidence_lists, copy_evidence=False
+        )
+        
+        return [
+            self._score_with_stance(claim, evidence_list, original_text, source_url, analyzed_evidence, stance_summary)
+            for claim, evidence_list, original_text, source_url, (analyzed_evidence, stance_summary)
+            in zip(claims, evidence_lists, original_texts, source_urls, stance_results)
+        ]
+    
+    def _score_with_stance(
+        self,
+        claim: ExtractedClaim,
+        evidence_list: List[Dict],
+        original_text: str,
+        source_url: Optional[str],
+        analyzed_evidence: List[Dict],
+        stance_summary: Dict
+    ) -> Dict:
+        """NLI分析結果を使って各軸のスコアと総合スコアを計算"""
+        scores = ScoreComponents()
         
         # 1. 主張の明確性 (10%)
         scores.clarity = self._score_clarity(claim)
@@ -93,17 +240,7 @@ class EvidenceScorer:
         scores.correction_response = 0  # 初回評価では0
         
         # 重み付き合計計算
-        total_score = (
-            scores.clarity * 10 +
-            scores.evidence_quality * 20 +
-            scores.consensus * 15 +
-            scores.biological_plausibility * 10 +
-            scores.transparency * 10 +
-            scores.context_distortion * 10 +
-            scores.harm_potential * 15 +
-            scores.virality * 5 +
-            scores.correction_response * 5
-        ) // 5
+        total_score = self._weighted_total(scores)
         
         # 安全装置：害の可能性が高い場合の最大スコア制限
         if scores.harm_potential <= 1:
@@ -121,6 +258,15 @@ class EvidenceScorer:
             "stance_summary": stance_summary
         }
     
+    def _weighted_total(self, scores: ScoreComponents) -> int:
+        """重み付き合計点（0-100）"""
+        values = np.fromiter(
+            (getattr(scores, name) for name in _SCORE_FIELDS),
+            dtype=np.int32,
+            count=len(_SCORE_FIELDS)
+        )
+        return int(values @ self._WEIGHTS) // 5
+    
     def _score_clarity(self, claim: ExtractedClaim) -> int:
         """主張の明確性を評価"""
         score = 2  # ベーススコア
@@ -149,18 +295,9 @@ class EvidenceScorer:
         if not evidence_list:
             return 0
         
-        max_quality = 0
-        for evidence in evidence_list:
-            study_type = evidence.get("study_type", "other")
-            quality = self.study_quality_scores.get(study_type, 1)
-            max_quality = max(max_quality, quality)
-        
-        # エビデンス数によるボーナス
-        evidence_count = len(evidence_list)
-        if evidence_count >= 3:
-            max_quality = min(5, max_quality + 1)
-        
-        return max_quality
+        # 結果は研究デザインの種類の集合と件数ボーナスの有無だけで決まる
+        study_types = frozenset(evidence.get("study_type", "other") for evidence in evidence_list)
+        return _quality_from_study_types(study_types, len(evidence_list) >= 3)
     
     def _score_evidence_quality_with_nli(self, evidence_list: List[Dict], stance_summary: Dict) -> int:
         """NLI結果を考慮した証拠の質評価"""
@@ -207,7 +344,7 @@ class EvidenceScorer:
         
         # 信頼できる機関からの引用があるか
         text_combined = claim.text + " " + " ".join([e.get("title", "") for e in evidence_list])
-        trusted_mentions = sum(1 for source in self.trusted_sources if source in text_combined)
+        trusted_mentions = len(self._trusted_matcher.find(text_combined))
         if trusted_mentions >= 1:
             score += 1
         
@@ -250,29 +387,14 @@ class EvidenceScorer:
         score = 3  # ベーススコア（中立）
         
         # 非現実的な主張のチェック
-        implausible_patterns = [
-            r"水だけで.*(治る|完治)",
-            r"思考だけで.*(治療|治る)",
-            r"100[%％].*効果",
-            r"副作用.*一切.*ない",
-            r"即座に.*治る"
-        ]
-        
-        for pattern in implausible_patterns:
-            if re.search(pattern, claim.text):
+        for pattern in self._IMPLAUSIBLE_PATTERNS:
+            if pattern.search(claim.text):
                 score -= 2
                 break
         
         # 妥当性のある表現
-        plausible_patterns = [
-            r"改善.*可能性",
-            r"リスク.*低減",
-            r"効果.*報告",
-            r"研究.*示唆"
-        ]
-        
-        for pattern in plausible_patterns:
-            if re.search(pattern, claim.text):
+        for pattern in self._PLAUSIBLE_PATTERNS:
+            if pattern.search(claim.text):
                 score += 1
                 break
         
@@ -291,8 +413,7 @@ class EvidenceScorer:
             score += 2
         
         # 方法論の言及があるか
-        methodology_keywords = ["研究", "調査", "実験", "分析", "統計", "被験者"]
-        if any(keyword in text for keyword in methodology_keywords):
+        if self._METHODOLOGY_RE.search(text):
             score += 1
         
         return max(0, min(5, score))
@@ -302,35 +423,19 @@ class EvidenceScorer:
         score = 3  # ベーススコア
         
         # 相関と因果の混同
-        causal_without_evidence = [
-            r"(.+)が(.+)を引き起こす",
-            r"(.+)が原因で(.+)",
-            r"(.+)のせいで(.+)"
-        ]
-        
-        for pattern in causal_without_evidence:
-            if re.search(pattern, text) and not any(
-                keyword in text for keyword in ["研究", "実験", "証明", "エビデンス"]
-            ):
+        for pattern in self._CAUSAL_PATTERNS:
+            if pattern.search(text) and not self._CAUSAL_EVIDENCE_RE.search(text):
                 score -= 1
                 break
         
         # 過剰一般化
-        overgeneralization_patterns = [
-            r"すべて.*",
-            r"必ず.*",
-            r"絶対.*",
-            r"100[%％].*"
-        ]
-        
-        for pattern in overgeneralization_patterns:
-            if re.search(pattern, text):
+        for pattern in self._OVERGEN_PATTERNS:
+            if pattern.search(text):
                 score -= 1
                 break
         
         # 限界の言及があるか
-        limitation_keywords = ["限界", "制限", "条件", "個人差", "場合による"]
-        if any(keyword in text for keyword in limitation_keywords):
+        if self._LIMITATION_RE.search(text):
             score += 1
         
         return max(0, min(5, score))
@@ -339,22 +444,15 @@ class EvidenceScorer:
         """害の可能性を評価（高スコア = 低害）"""
         score = 5  # ベーススコア（無害）
         
-        # 有害フレーズのチェック
-        for category, phrases in self.harmful_phrases.items():
-            for phrase in phrases:
-                if phrase in text:
-                    if category == "医療忌避":
-                        score = 0  # 最も危険
-                    elif category == "科学否定":
-                        score = min(score, 1)
-                    elif category == "差別誘発":
-                        score = min(score, 1)
-                    elif category == "経済詐欺":
-                        score = min(score, 2)
+        safety_mentions = 0
+        for _, category in self._harm_matcher.find(text):
+            if category is None:
+                # 安全性への言及
+                safety_mentions += 1
+            else:
+                # 有害フレーズ
+                score = min(score, self.harm_category_caps[category])
         
-        # 安全性への言及
-        safety_keywords = ["安全", "副作用", "リスク", "注意", "医師に相談"]
-        safety_mentions = sum(1 for keyword in safety_keywords if keyword in text)
         if safety_mentions >= 2:
             score = min(5, score + 1)
         
@@ -365,16 +463,7 @@ class EvidenceScorer:
         score = 3  # ベーススコア
         
         # センセーショナルな表現
-        viral_patterns = [
-            r"驚愕",
-            r"衝撃",
-            r"緊急",
-            r"拡散希望",
-            r"シェア",
-            r"信じられない"
-        ]
-        
-        viral_count = sum(1 for pattern in viral_patterns if re.search(pattern, text))
+        viral_count = len(set(self._VIRAL_RE.findall(text)))
         score -= viral_count
         
         return max(0, min(5, score))
@@ -465,10 +554,23 @@ class EvidenceScorer:
         return rationales
 
 
-def calculate_evidence_score(claim_dict: Dict, evidence_list: List[Dict], original_text: str, source_url: Optional[str] = None) -> Dict:
-    """メイン関数：エビデンスベースのスコア計算"""
-    # ExtractedClaimオブジェクトを再構築
-    claim = ExtractedClaim(
+_scorer: Optional[EvidenceScorer] = None
+_scorer_lock = threading.Lock()
+
+
+def _get_scorer() -> EvidenceScorer:
+    """共有のEvidenceScorerを取得（リクエストごとの状態を持たないため使い回せる）"""
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = EvidenceScorer()
+    return _scorer
+
+
+def _claim_from_dict(claim_dict: Dict, original_text: str) -> ExtractedClaim:
+    """抽出結果の辞書からExtractedClaimオブジェクトを再構築"""
+    return ExtractedClaim(
         text=claim_dict.get("text", original_text),
         confidence=claim_dict.get("confidence", 0.5),
         claim_type=claim_dict.get("type", "general"),
@@ -477,8 +579,27 @@ def calculate_evidence_score(claim_dict: Dict, evidence_list: List[Dict], origin
         object=claim_dict.get("object"),
         effect_size=claim_dict.get("effect_size")
     )
+
+
+def calculate_evidence_score(claim_dict: Dict, evidence_list: List[Dict], original_text: str, source_url: Optional[str] = None) -> Dict:
+    """メイン関数：エビデンスベースのスコア計算"""
+    claim = _claim_from_dict(claim_dict, original_text)
     
-    scorer = EvidenceScorer()
+    scorer = _get_scorer()
     result = scorer.calculate_comprehensive_score(claim, evidence_list, original_text, source_url)
     
-    return result
\ No newline at end of file
+    return result
+
+
+def calculate_evidence_scores(
+    claim_dicts: List[Dict],
+    evidence_lists: List[List[Dict]],
+    original_texts: List[str],
+    source_urls: Optional[List[Optional[str]]] = None
+) -> List[Dict]:
+    """複数の主張のスコア計算（NLIは全主張のエビデンスをまとめて1回で処理）"""
+    claims = [
+        _claim_from_dict(claim_dict, original_text)
+        for claim_dict, original_text in zip(claim_dicts, original_texts)
+    ]
+    return _get_scorer().score_batch(claims, evidence_lists, original_texts, source_urls)
\ No newline at end of file
@@ -6,18 +6,52 @@ Stage 3: 段階的AI評価システム
 scoring_byClaude.mdとprompt_byChatgpt.mdの仕様に基づく
 """
 
-import json
-from typing import Dict, List, Optional, Tuple
+from typing import ClassVar, Dict, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+from types import MappingProxyType
 import asyncio
 import os
+import re
+import time
+
+import orjson
 
 # 既存の正規化・文献検索機能を使用
-from .medical_normalizer_v2 import MedicalTermNormalizer, NormalizationResult
-from .literature_searcher import LiteratureSearcher, SearchResult
+from .medical_normalizer_v2 import MedicalTermNormalizer, NormalizedClaim, normalizer as shared_normalizer
+from .literature_searcher import LiteratureSearcher, LiteratureSearchResult, literature_searcher as shared_literature_searcher
+
+# 論文解釈（LLM呼び出し予定）の同時実行数
+INTERPRETATION_CONCURRENCY = 8
+
+# 1件の論文解釈の待ち時間上限（秒）。超えた論文は解釈失敗として扱い、残りの論文で総合評価に進む
+INTERPRETATION_TIMEOUT = 5.0
+
+# 段階的評価全体の待ち時間上限（秒）。超えた場合は完了済みの段階だけを失敗結果として返す
+EVALUATION_TIMEOUT = 30.0
+
+# evaluate_batchで同時に評価する主張数（PubMedの3req/秒制限はPubMedSearcher側で守られる）
+BATCH_CONCURRENCY = 8
+
+# 検索結果に載せるアブストラクト抜粋の最大文字数
+ABSTRACT_SUMMARY_CHARS = 150
 
-@dataclass 
+# A. Evidence Alignmentの配点（scoring_byClaude.mdのA-1マトリクス: 整合性 × GRADE確実性）
+_ALIGNMENT_SCORES = {
+    "supports": {"high": 58, "moderate": 50, "low": 40, "very_low": 30},
+    "partially_supports": {"high": 44, "moderate": 34, "low": 24, "very_low": 14},
+    "neutral": {"high": 19, "moderate": 19, "low": 19, "very_low": 19},
+    "contradicts": {"high": 5, "moderate": 9, "low": 14, "very_low": 14},
+    "insufficient": {"high": 15, "moderate": 15, "low": 15, "very_low": 15}
+}
+
+
+def _truncate(text: str, limit: int) -> str:
+    """limit文字を超える場合のみ切り詰めて「...」を付ける（短い文字列はそのまま返す）"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+@dataclass(slots=True)
 class EvaluationStage:
     """評価段階の結果"""
     stage: str
@@ -27,7 +61,7 @@ class EvaluationStage:
     success: bool
     error_message: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class StagedEvaluationResult:
     """段階的評価の最終結果"""
     claim_text: str
@@ -39,82 +73,127 @@ class StagedEvaluationResult:
     audit_log: Dict
     timestamp: str
     
+    def to_json_bytes(self) -> bytes:
+        """評価結果全体（各段階の入出力を含む）をorjsonでJSONバイト列に変換"""
+        return orjson.dumps(self)
+    
 class StagedEvaluator:
     """段階的AI評価システム"""
     
-    def __init__(self):
-        self.normalizer = MedicalTermNormalizer()
-        self.literature_searcher = LiteratureSearcher()
-        self.scoring_rubric = self._load_scoring_rubric()
-        
-    def _load_scoring_rubric(self) -> Dict:
-        """スコアリングルーブリックv3.0を読み込み"""
-        return {
-            "evidence_alignment": {"max": 60, "description": "エビデンス整合性"},
-            "citation_quality": {"max": 22, "description": "引用品質"},
-            "scope_nuance": {"max": 12, "description": "適切な限定"},
-            "quantitative_accuracy": {"max": 6, "description": "量的正確性"},
-            "safety_risk_handling": {"max": 6, "description": "安全配慮"},
-            "penalties": {"max": -100, "description": "減点項目"},
-            "bonus": {"max": 15, "description": "加点項目"}
-        }
+    # スコアリングルーブリックv3.0（読み取り専用）
+    SCORING_RUBRIC: ClassVar[Mapping[str, Dict]] = MappingProxyType({
+        "evidence_alignment": {"max": 60, "description": "エビデンス整合性"},
+        "citation_quality": {"max": 22, "description": "引用品質"},
+        "scope_nuance": {"max": 12, "description": "適切な限定"},
+        "quantitative_accuracy": {"max": 6, "description": "量的正確性"},
+        "safety_risk_handling": {"max": 6, "description": "安全配慮"},
+        "penalties": {"max": -100, "description": "減点項目"},
+        "bonus": {"max": 15, "description": "加点項目"}
+    })
+    
+    # アブストラクトから集団・比較対照を判定する語句（1回の走査でまとめて検出）
+    _FEATURE_RE = re.compile(r"patient|adult|placebo|control", re.IGNORECASE)
     
-    async def evaluate_staged(self, claim_text: str, language: str = "ja") -> StagedEvaluationResult:
-        """段階的評価のメイン処理"""
+    def __init__(self, normalizer: Optional[MedicalTermNormalizer] = None, literature_searcher: Optional[LiteratureSearcher] = None):
+        """
+        Args:
+            normalizer: 主張の正規化器（None=モジュール共通のインスタンス）
+            literature_searcher: 文献検索器（None=モジュール共通のインスタンス）
+        """
+        # 評価器はリクエストごとに生成されるため、既定ではAPIクライアント・PubMed接続を持つ共通インスタンスを使い回す
+        self.normalizer = normalizer or shared_normalizer
+        self.literature_searcher = literature_searcher or shared_literature_searcher
+        self._interpretation_semaphore = asyncio.Semaphore(INTERPRETATION_CONCURRENCY)
+        
+    async def evaluate_staged(self, claim_text: str, language: str = "ja", timeout: Optional[float] = EVALUATION_TIMEOUT) -> StagedEvaluationResult:
+        """
+        段階的評価のメイン処理
+        
+        Args:
+            timeout: 評価全体の待ち時間上限（秒、None=無制限）。超えた場合は完了済みの段階を含む失敗結果を返す
+        """
+        # 完了した段階から順に追加される（タイムアウト時もここまでの結果を返せる）
         stages = []
-        timestamp = datetime.now().isoformat()
         
         try:
-            # Stage 1: 主張正規化
+            return await asyncio.wait_for(self._run_stages(claim_text, language, stages), timeout)
+        except asyncio.TimeoutError:
+            return self._create_failed_result(
+                claim_text, stages, f"評価が{timeout}秒以内に完了しませんでした", truncated=True
+            )
+        except Exception as e:
+            return self._create_failed_result(claim_text, stages, str(e))
+    
+    async def _run_stages(self, claim_text: str, language: str, stages: List[EvaluationStage]) -> StagedEvaluationResult:
+        """各段階を順に実行し、完了した段階をstagesに追加する"""
+        # 評価開始時刻（結果のタイムスタンプ・検索日・新しさ評価の基準年に共通で使う）
+        now = datetime.now()
+        timestamp = now.isoformat()
+        
+        # Stage 1: 主張正規化 / Stage 2: 文献探索
+        # 文献検索は元の主張文から行うため、両段階を並行実行する（正規化が先に終われば時間切れでも結果に残る）
+        search_task = asyncio.ensure_future(self._stage2_literature_search(claim_text, {}, now))
+        try:
             stage1 = await self._stage1_normalization(claim_text, language)
             stages.append(stage1)
             
             if not stage1.success:
                 return self._create_failed_result(claim_text, stages, "正規化段階でエラー")
             
-            # Stage 2: 文献探索
-            stage2 = await self._stage2_literature_search(claim_text, stage1.output_data)
-            stages.append(stage2)
-            
-            if not stage2.success:
-                return self._create_failed_result(claim_text, stages, "文献検索段階でエラー") 
-                
-            # Stage 3: 論文内容解釈・総合分析
-            stage3 = await self._stage3_paper_interpretation(stage1.output_data, stage2.output_data)
-            stages.append(stage3)
-            
-            # Stage 4: 段階的スコアリング
-            stage4 = await self._stage4_staged_scoring(
-                claim_text, stage1.output_data, stage2.output_data, stage3.output_data
-            )
-            stages.append(stage4)
-            
-            # 最終結果の構築
-            final_score = stage4.output_data.get("total_score", 0)
-            final_label = stage4.output_data.get("label", "Unknown")
-            confidence = stage4.output_data.get("confidence", "low")
-            
-            return StagedEvaluationResult(
-                claim_text=claim_text,
-                stages=stages,
-                final_score=final_score,
-                final_label=final_label,
-                confidence=confidence,
-                detailed_breakdown=stage4.output_data.get("score_breakdown", {}),
-                audit_log=self._create_audit_log(stages),
-                timestamp=timestamp
-            )
+            stage2 = await search_task
+        finally:
+            search_task.cancel()
+        stage2.input_data["normalization"] = stage1.output_data
+        stages.append(stage2)
+        
+        if not stage2.success:
+            return self._create_failed_result(claim_text, stages, "文献検索段階でエラー") 
             
-        except Exception as e:
-            return self._create_failed_result(claim_text, stages, str(e))
+        # Stage 3: 論文内容解釈・総合分析
+        stage3 = await self._stage3_paper_interpretation(stage1.output_data, stage2.output_data)
+        stages.append(stage3)
+        
+        # Stage 4: 段階的スコアリング
+        stage4 = await self._stage4_staged_scoring(
+            claim_text, stage1.output_data, stage2.output_data, stage3.output_data, now.year
+        )
+        stages.append(stage4)
+        
+        # 最終結果の構築（スコアリング失敗時は出力が空なので既定値になる）
+        scoring = stage4.output_data
+        
+        return StagedEvaluationResult(
+            claim_text=claim_text,
+            stages=stages,
+            final_score=scoring.get("total_score", 0),
+            final_label=scoring.get("label", "Unknown"),
+            confidence=scoring.get("confidence", "low"),
+            detailed_breakdown=scoring.get("score_breakdown", {}),
+            audit_log=self._create_audit_log(stages),
+            timestamp=timestamp
+        )
+    
+    async def evaluate_batch(self, claims: List[str], language: str = "ja", concurrency: int = BATCH_CONCURRENCY) -> List[StagedEvaluationResult]:
+        """複数の主張を並行して段階的評価（結果は入力順、失敗した主張も失敗結果として返す）"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def evaluate(claim_text: str) -> StagedEvaluationResult:
+            async with semaphore:
+                return await self.evaluate_staged(claim_text, language)
+        
+        results = await asyncio.gather(*(evaluate(claim) for claim in claims), return_exceptions=True)
+        return [
+            self._create_failed_result(claim, [], str(result)) if isinstance(result, Exception) else result
+            for claim, result in zip(claims, results)
+        ]
     
     async def _stage1_normalization(self, claim_text: str, language: str) -> EvaluationStage:
         """Stage 1: 主張正規化（PICO分析・検索語抽出）"""
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             # 正規化実行
-            normalized = self.normalizer.normalize_claim(claim_text, language)
+            normalized = await self.normalizer.anormalize_claim(claim_text, language)
             
             # prompt_byChatgpt.mdの1)主張正規化フォーマットに準拠
             output_data = {
@@ -142,10 +221,11 @@ class StagedEvaluator:
                     "date_window": "last 10 years"
                 },
                 "api_used": normalized.api_used,
+                "cache_hit": normalized.cache_hit,
                 "confidence": normalized.confidence
             }
             
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             return EvaluationStage(
                 stage="normalization",
@@ -156,7 +236,7 @@ class StagedEvaluator:
             )
             
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             return EvaluationStage(
                 stage="normalization",
                 input_data={"claim_text": claim_text, "language": language},
@@ -166,19 +246,20 @@ class StagedEvaluator:
                 error_message=str(e)
             )
     
-    async def _stage2_literature_search(self, claim_text: str, normalization_data: Dict) -> EvaluationStage:
+    async def _stage2_literature_search(self, claim_text: str, normalization_data: Dict, now: datetime) -> EvaluationStage:
         """Stage 2: 高精度文献検索・一次スクリーニング"""
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             # 文献検索実行
-            search_result = self.literature_searcher.search_literature(claim_text, max_articles=10)
+            search_result = await self.literature_searcher.asearch_literature(claim_text, max_articles=10)
             
             # prompt_byChatgpt.mdの2)文献探索フォーマットに準拠
             included_studies = []
             excluded_studies = []
             
             for article in search_result.articles:
+                features = self._extract_features(article.abstract)
                 # 各論文の基本情報を構造化
                 study_data = {
                     "pmid": article.pmid,
@@ -186,16 +267,16 @@ class StagedEvaluator:
                     "year": article.publication_date.year if article.publication_date else None,
                     "country": getattr(article, 'country', None),
                     "design": article.study_type,
-                    "population": self._extract_population(article.abstract),
-                    "intervention": self._extract_intervention(article.abstract),
-                    "comparator": self._extract_comparator(article.abstract),
-                    "primary_outcomes": self._extract_outcomes(article.abstract),
+                    "population": self._extract_population(features),
+                    "intervention": self._extract_intervention(features),
+                    "comparator": self._extract_comparator(features),
+                    "primary_outcomes": self._extract_outcomes(features),
                     "effect_direction": "not_reported",  # 要実装: アブストラクト解析
                     "effect_size": {"measure": None, "value": None, "ci": None, "p": None},
                     "bias_risk": "unclear",  # 要実装: 研究デザイン品質評価
                     "funding_coi": "unknown",
                     "retraction_status": "unknown",  # 要実装: Retraction Watch連携
-                    "abstract_150w": article.abstract[:150] + "..." if len(article.abstract) > 150 else article.abstract
+                    "abstract_150w": _truncate(article.abstract, ABSTRACT_SUMMARY_CHARS)
                 }
                 included_studies.append(study_data)
             
@@ -203,7 +284,7 @@ class StagedEvaluator:
                 "lang": "ja",
                 "search_log": {
                     "engine": ["PubMed"],
-                    "date": datetime.now().isoformat(),
+                    "date": now.isoformat(),
                     "queries": [{"q": q, "hits": len(search_result.articles)} for q in search_result.search_queries],
                     "filters_applied": {
                         "species": "Humans",
@@ -219,7 +300,7 @@ class StagedEvaluator:
                 "total_articles": len(included_studies)
             }
             
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             return EvaluationStage(
                 stage="literature_search",
@@ -230,7 +311,7 @@ class StagedEvaluator:
             )
             
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             return EvaluationStage(
                 stage="literature_search",
                 input_data={"claim_text": claim_text, "normalization": normalization_data},
@@ -242,16 +323,13 @@ class StagedEvaluator:
     
     async def _stage3_paper_interpretation(self, normalization_data: Dict, search_data: Dict) -> EvaluationStage:
         """Stage 3: 論文内容解釈・エビデンス総合（新機能）"""
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             included_studies = search_data.get("included_studies", [])
             
-            # 各論文の詳細解釈（AIベース）
-            interpreted_papers = []
-            for study in included_studies:
-                interpretation = await self._interpret_single_paper(study)
-                interpreted_papers.append(interpretation)
+            # 各論文の詳細解釈（AIベース）を並行実行し、失敗・時間切れの論文はエラー付きの項目に置き換える
+            interpreted_papers = await self._interpret_papers(included_studies)
             
             # エビデンス総合とGRADE評価
             evidence_synthesis = self._synthesize_evidence(interpreted_papers, normalization_data)
@@ -267,7 +345,7 @@ class StagedEvaluator:
                 "grade_assessment": evidence_synthesis["GRADE_certainty"]
             }
             
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             return EvaluationStage(
                 stage="paper_interpretation",
@@ -278,7 +356,7 @@ class StagedEvaluator:
             )
             
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             return EvaluationStage(
                 stage="paper_interpretation",
                 input_data={"normalization": normalization_data, "search": search_data},
@@ -288,9 +366,9 @@ class StagedEvaluator:
                 error_message=str(e)
             )
     
-    async def _stage4_staged_scoring(self, claim_text: str, norm_data: Dict, search_data: Dict, interp_data: Dict) -> EvaluationStage:
+    async def _stage4_staged_scoring(self, claim_text: str, norm_data: Dict, search_data: Dict, interp_data: Dict, current_year: int) -> EvaluationStage:
         """Stage 4: 段階的スコアリング（ルーブリックv3.0準拠）"""
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             # scoring_byClaude.mdの詳細ルーブリックに基づくスコアリング
@@ -301,7 +379,7 @@ class StagedEvaluator:
             score_breakdown["evidence_alignment"] = evidence_score
             
             # B. Citation Quality (最大22点)
-            citation_score = self._score_citation_quality(search_data)
+            citation_score = self._score_citation_quality(search_data, current_year)
             score_breakdown["citation_quality"] = citation_score
             
             # C. Scope & Nuance (最大12点)  
@@ -326,7 +404,9 @@ class StagedEvaluator:
             
             # ラベル判定（scoring_byClaude.mdの閾値に基づく）
             label = self._determine_label(total_score)
-            confidence = self._determine_confidence(total_score, interp_data)
+            grade = interp_data.get("grade_assessment", "very_low")
+            papers_count = len(interp_data.get("interpreted_papers", []))
+            confidence = self._determine_confidence(total_score, grade)
             
             output_data = {
                 "lang": "ja",
@@ -337,12 +417,12 @@ class StagedEvaluator:
                 "label": label,
                 "confidence": confidence,
                 "public_facing_summary_ja": self._generate_public_summary(
-                    claim_text, total_score, label, interp_data
+                    claim_text, total_score, label, grade, papers_count
                 ),
                 "detailed_rationale": self._generate_detailed_rationale(score_breakdown, interp_data)
             }
             
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             return EvaluationStage(
                 stage="staged_scoring",
@@ -358,7 +438,7 @@ class StagedEvaluator:
             )
             
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             return EvaluationStage(
                 stage="staged_scoring",
                 input_data={},
@@ -370,20 +450,51 @@ class StagedEvaluator:
     
     # 詳細解釈・評価メソッド群
     
+    async def _interpret_papers(self, studies: List[Dict]) -> List[Dict]:
+        """論文を並行して解釈（INTERPRETATION_TIMEOUT秒以内に終わらない論文は打ち切る）"""
+        if not studies:
+            return []
+        
+        tasks = [asyncio.ensure_future(self._interpret_single_paper(study)) for study in studies]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=INTERPRETATION_TIMEOUT)
+        finally:
+            # 時間切れ・呼び出し元のキャンセル時に残った解釈を止める
+            for task in tasks:
+                task.cancel()
+        
+        timeout_error = asyncio.TimeoutError(f"{INTERPRETATION_TIMEOUT}秒以内に解釈が完了しませんでした")
+        return [
+            self._failed_interpretation(study, timeout_error) if task in pending
+            else self._failed_interpretation(study, task.exception()) if task.exception() is not None
+            else task.result()
+            for study, task in zip(studies, tasks)
+        ]
+    
     async def _interpret_single_paper(self, study: Dict) -> Dict:
         """個別論文の詳細解釈"""
-        # AIによる論文内容の深い解釈（今後OpenAI/Geminiを利用）
-        # 現在は基本的な情報抽出のみ実装
+        async with self._interpretation_semaphore:
+            # AIによる論文内容の深い解釈（今後OpenAI/Geminiを利用）
+            # 現在は基本的な情報抽出のみ実装
+            return {
+                "pmid": study.get("pmid"),
+                "title": study.get("title", ""),
+                "study_design": study.get("design"),
+                "quality_rating": "moderate",  # RoB 2.0評価（要実装）
+                "effect_size_interpretation": "moderate_effect",  # 効果量解釈（要実装）
+                "clinical_significance": "unclear",  # 臨床的意義（要実装）
+                "limitations": [],  # 限界点（要実装）
+                "funding_bias_risk": "unknown",  # 資金バイアス（要実装）
+                "abstract_summary": study.get("abstract_150w", "")
+            }
+    
+    def _failed_interpretation(self, study: Dict, error: Exception) -> Dict:
+        """解釈に失敗した論文の代替項目"""
         return {
             "pmid": study.get("pmid"),
             "title": study.get("title", ""),
             "study_design": study.get("design"),
-            "quality_rating": "moderate",  # RoB 2.0評価（要実装）
-            "effect_size_interpretation": "moderate_effect",  # 効果量解釈（要実装）
-            "clinical_significance": "unclear",  # 臨床的意義（要実装）
-            "limitations": [],  # 限界点（要実装）
-            "funding_bias_risk": "unknown",  # 資金バイアス（要実装）
-            "abstract_summary": study.get("abstract_150w", "")
+            "error": str(error)
         }
     
     def _synthesize_evidence(self, papers: List[Dict], norm_data: Dict) -> Dict:
@@ -395,9 +506,16 @@ class StagedEvaluator:
                 "GRADE_certainty": "very_low"
             }
         
-        # 研究デザインの質に基づくGRADE評価
-        has_sr = any(p.get("study_design") == "systematic_review" for p in papers)
-        has_rct = any(p.get("study_design") == "randomized_controlled_trial" for p in papers)
+        # 研究デザインの質に基づくGRADE評価（論文リストは1回だけ走査し、両方見つかれば打ち切る）
+        has_sr = has_rct = False
+        for paper in papers:
+            design = paper.get("study_design")
+            if design == "systematic_review":
+                has_sr = True
+            elif design == "randomized_controlled_trial":
+                has_rct = True
+            if has_sr and has_rct:
+                break
         
         if has_sr:
             grade = "moderate"
@@ -434,18 +552,9 @@ class StagedEvaluator:
         alignment = interp_data.get("alignment_to_claim", "insufficient")
         grade = interp_data.get("evidence_synthesis", {}).get("GRADE_certainty", "very_low")
         
-        # scoring_byClaude.mdのA-1マトリクスに基づく
-        alignment_scores = {
-            "supports": {"high": 58, "moderate": 50, "low": 40, "very_low": 30},
-            "partially_supports": {"high": 44, "moderate": 34, "low": 24, "very_low": 14},
-            "neutral": {"high": 19, "moderate": 19, "low": 19, "very_low": 19},
-            "contradicts": {"high": 5, "moderate": 9, "low": 14, "very_low": 14},
-            "insufficient": {"high": 15, "moderate": 15, "low": 15, "very_low": 15}
-        }
-        
-        return alignment_scores.get(alignment, {}).get(grade, 15)
+        return _ALIGNMENT_SCORES.get(alignment, {}).get(grade, 15)
     
-    def _score_citation_quality(self, search_data: Dict) -> int:
+    def _score_citation_quality(self, search_data: Dict, current_year: int) -> int:
         """B. Citation Quality スコアリング（最大22点）"""
         included_studies = search_data.get("included_studies", [])
         if not included_studies:
@@ -455,7 +564,7 @@ class StagedEvaluator:
         verifiability = 6 if included_studies[0].get("pmid") else 3
         
         # B-2: ソース階層（最大7点）
-        study_types = [s.get("design", "") for s in included_studies]
+        study_types = {s.get("design", "") for s in included_studies}
         if "systematic_review" in study_types:
             hierarchy = 7
         elif "randomized_controlled_trial" in study_types:
@@ -466,10 +575,8 @@ class StagedEvaluator:
             hierarchy = 2
         
         # B-3: 新しさ（最大3点）
-        current_year = datetime.now().year
-        years = [s.get("year", 2000) for s in included_studies if s.get("year")]
-        if years:
-            newest_year = max(years)
+        newest_year = max((s["year"] for s in included_studies if s.get("year")), default=None)
+        if newest_year is not None:
             if current_year - newest_year <= 5:
                 recency = 3
             elif current_year - newest_year <= 10:
@@ -552,10 +659,8 @@ class StagedEvaluator:
         else:
             return "False / Harmful"
     
-    def _determine_confidence(self, score: int, interp_data: Dict) -> str:
+    def _determine_confidence(self, score: int, grade: str) -> str:
         """信頼度の判定"""
-        grade = interp_data.get("grade_assessment", "very_low")
-        
         if grade in ["high", "moderate"] and score >= 60:
             return "high"
         elif grade == "low" or score < 30:
@@ -563,11 +668,8 @@ class StagedEvaluator:
         else:
             return "medium"
     
-    def _generate_public_summary(self, claim: str, score: int, label: str, interp_data: Dict) -> str:
+    def _generate_public_summary(self, claim: str, score: int, label: str, grade: str, papers_count: int) -> str:
         """一般向けサマリーの生成"""
-        papers_count = len(interp_data.get("interpreted_papers", []))
-        grade = interp_data.get("grade_assessment", "very_low")
-        
         return f"「{claim}」について、{papers_count}件の医学論文を分析した結果、スコア{score}点（{label}）。エビデンスの確信度は{grade}レベルです。"
     
     def _generate_detailed_rationale(self, score_breakdown: Dict, interp_data: Dict) -> List[Dict]:
@@ -578,40 +680,44 @@ class StagedEvaluator:
             rationales.append({
                 "category": category,
                 "score": score,
-                "max_score": self.scoring_rubric.get(category, {}).get("max", 100),
-                "reasoning": f"{self.scoring_rubric.get(category, {}).get('description', category)}: {score}点"
+                "max_score": self.SCORING_RUBRIC.get(category, {}).get("max", 100),
+                "reasoning": f"{self.SCORING_RUBRIC.get(category, {}).get('description', category)}: {score}点"
             })
         
         return rationales
     
     # ヘルパーメソッド群
     
-    def _extract_population(self, abstract: str) -> str:
+    def _extract_features(self, abstract: str) -> Set[str]:
+        """アブストラクトに含まれる判定用語句（小文字）の集合"""
+        return {match.group(0).lower() for match in self._FEATURE_RE.finditer(abstract)}
+    
+    def _extract_population(self, features: Set[str]) -> str:
         """アブストラクトから対象集団を抽出"""
         # 簡易実装（今後NLP強化）
-        if "patient" in abstract.lower():
+        if "patient" in features:
             return "patients"
-        elif "adult" in abstract.lower():
+        elif "adult" in features:
             return "adults"
         else:
             return "unclear"
     
-    def _extract_intervention(self, abstract: str) -> str:
+    def _extract_intervention(self, features: Set[str]) -> str:
         """アブストラクトから介入を抽出"""
         # 簡易実装（今後NLP強化）
         return "unclear"
     
-    def _extract_comparator(self, abstract: str) -> str:
+    def _extract_comparator(self, features: Set[str]) -> str:
         """アブストラクトから比較対照を抽出"""
         # 簡易実装（今後NLP強化）
-        if "placebo" in abstract.lower():
+        if "placebo" in features:
             return "placebo"
-        elif "control" in abstract.lower():
+        elif "control" in features:
             return "control"
         else:
             return "unclear"
     
-    def _extract_outcomes(self, abstract: str) -> List[str]:
+    def _extract_outcomes(self, features: Set[str]) -> List[str]:
         """アブストラクトからアウトカムを抽出"""
         # 簡易実装（今後NLP強化）
         return ["unclear"]
@@ -648,8 +754,11 @@ class StagedEvaluator:
             ]
         }
     
-    def _create_failed_result(self, claim_text: str, stages: List[EvaluationStage], error_msg: str) -> StagedEvaluationResult:
-        """失敗時の結果作成"""
+    def _create_failed_result(self, claim_text: str, stages: List[EvaluationStage], error_msg: str, truncated: bool = False) -> StagedEvaluationResult:
+        """失敗時の結果作成（truncated=時間切れで途中までの段階しかない）"""
+        audit_log = {"error": error_msg}
+        if truncated:
+            audit_log["truncated"] = True
         return StagedEvaluationResult(
             claim_text=claim_text,
             stages=stages,
@@ -657,6 +766,6 @@ class StagedEvaluator:
             final_label="Error",
             confidence="low",
             detailed_breakdown={},
-            audit_log={"error": error_msg},
+            audit_log=audit_log,
             timestamp=datetime.now().isoformat()
         )
\ No newline at end of file
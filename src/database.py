@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import create_engine, event, inspect, or_, select, Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, relationship
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql import func
+from typing import Dict, List, Optional
 from src.config import settings
 
 Base = declarative_base()
@@ -20,8 +24,10 @@ class Claim(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    scores = relationship("Score", back_populates="claim", cascade="all, delete-orphan")
-    claim_evidence = relationship("ClaimEvidence", back_populates="claim", cascade="all, delete-orphan")
+    # 子行の削除はDBのON DELETE CASCADEに任せ、削除前に子行をSELECTしない（passive_deletes）
+    # 一覧取得時は query(Claim).options(selectinload(Claim.scores).selectinload(Score.rationales)) でまとめて読み込む
+    scores = relationship("Score", back_populates="claim", cascade="all, delete-orphan", passive_deletes=True)
+    claim_evidence = relationship("ClaimEvidence", back_populates="claim", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Evidence(Base):
@@ -41,14 +47,14 @@ class Evidence(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    claim_evidence = relationship("ClaimEvidence", back_populates="evidence")
+    claim_evidence = relationship("ClaimEvidence", back_populates="evidence", passive_deletes=True)
 
 
 class Score(Base):
     __tablename__ = "scores"
     
     id = Column(Integer, primary_key=True, index=True)
-    claim_id = Column(Integer, ForeignKey("claims.id"), nullable=False, unique=True)
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), nullable=False, unique=True)
     total_score = Column(Integer, nullable=False)
     label = Column(String(20), nullable=False)
     
@@ -70,14 +76,15 @@ class Score(Base):
     
     # Relationships
     claim = relationship("Claim", back_populates="scores")
-    rationales = relationship("Rationale", back_populates="score", cascade="all, delete-orphan")
+    # 1スコアにつき9軸分。参照時はスコア群の分をIN句1回でまとめて読み込む
+    rationales = relationship("Rationale", back_populates="score", cascade="all, delete-orphan", lazy="selectin", passive_deletes=True)
 
 
 class Rationale(Base):
     __tablename__ = "rationales"
     
     id = Column(Integer, primary_key=True, index=True)
-    score_id = Column(Integer, ForeignKey("scores.id"), nullable=False)
+    score_id = Column(Integer, ForeignKey("scores.id", ondelete="CASCADE"), nullable=False, index=True)
     axis = Column(String(50), nullable=False)
     axis_score = Column(Integer, nullable=False)
     reasoning = Column(Text, nullable=False)
@@ -89,10 +96,15 @@ class Rationale(Base):
 
 class ClaimEvidence(Base):
     __tablename__ = "claim_evidence"
+    __table_args__ = (
+        # 主張ごとのエビデンスを順位順に取得する
+        Index("ix_ce_claim_rank", "claim_id", "rank_position"),
+        Index("ix_ce_evidence", "evidence_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    claim_id = Column(Integer, ForeignKey("claims.id"), nullable=False)
-    evidence_id = Column(Integer, ForeignKey("evidence.id"), nullable=False)
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), nullable=False)
+    evidence_id = Column(Integer, ForeignKey("evidence.id", ondelete="CASCADE"), nullable=False)
     stance = Column(String(20))  # support, contradict, neutral
     relevance_score = Column(Float)
     summary = Column(Text)
@@ -101,15 +113,54 @@ class ClaimEvidence(Base):
     
     # Relationships
     claim = relationship("Claim", back_populates="claim_evidence")
-    evidence = relationship("Evidence", back_populates="claim_evidence")
+    # 中間行1件につき論文1件のため、JOINで同時に読み込む
+    evidence = relationship("Evidence", back_populates="claim_evidence", lazy="joined")
 
 
 # Database setup
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 接続プール: 同時リクエスト数に合わせて確保し、長時間使っていない接続は再接続する
+DB_POOL_SIZE = 20
+DB_MAX_OVERFLOW = 40
+DB_POOL_RECYCLE = 3600
+
+_is_sqlite = settings.database_url.startswith("sqlite")
+
+
+def _pool_options(database_url: str) -> Dict:
+    """URLが使うプール向けの引数（pool_size/max_overflowはQueuePoolのみが受け付ける）"""
+    url = make_url(database_url)
+    if not issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        # インメモリSQLite（SingletonThreadPool）などはサイズ指定なしで作る
+        return {}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
+
+engine = create_engine(
+    settings.database_url,
+    connect_args={"check_same_thread": False} if _is_sqlite else {},
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    **_pool_options(settings.database_url)
+)
+# commit後に属性を失効させない（commit直後の参照で再SELECTしない）
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+if _is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        """SQLite接続ごとの設定（WALで読み取りが書き込みにブロックされないようにし、ON DELETE CASCADEを有効にする）"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
 
 
 def create_tables():
+    """未作成のテーブルを作成（全テーブル作成済みならテーブル一覧の取得1回で終える）"""
+    if set(Base.metadata.tables) <= set(inspect(engine).get_table_names()):
+        return
     Base.metadata.create_all(bind=engine)
 
 
@@ -118,4 +169,56 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# ON CONFLICT DO NOTHING を使えるdialect（それ以外はORMで未登録の行だけを追加する）
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _add_new_evidence(db: Session, rows: List[Dict]) -> None:
+    """pmid・doiが登録済み（またはrows内で重複）の行を除いてORMで追加する"""
+    pmids = {row["pmid"] for row in rows}
+    dois = {row["doi"] for row in rows if row.get("doi")}
+    existing = db.execute(
+        select(Evidence.pmid, Evidence.doi).where(or_(Evidence.pmid.in_(pmids), Evidence.doi.in_(dois)))
+    ).all()
+    seen_pmids = {pmid for pmid, _ in existing}
+    seen_dois = {doi for _, doi in existing if doi}
+    
+    new_rows = []
+    for row in rows:
+        doi = row.get("doi")
+        if row["pmid"] in seen_pmids or (doi and doi in seen_dois):
+            continue
+        seen_pmids.add(row["pmid"])
+        if doi:
+            seen_dois.add(doi)
+        new_rows.append(Evidence(**row))
+    db.add_all(new_rows)
+    db.flush()
+
+
+def bulk_save_evidence(db: Session, rows: List[Dict]) -> List[Optional[int]]:
+    """論文情報を1回の複数行INSERTで保存し、rowsの順にEvidence.idを返す
+    
+    登録済みのpmidは挿入せず既存のidを返す（doiだけが別の論文と重複した行は保存されずNone）。
+    ON CONFLICTに対応していないDB（MySQLなど）では未登録の行だけをORMで追加する。
+    commitは呼び出し側で行う。
+    
+    Args:
+        db: セッション
+        rows: Evidenceの列名をキーとするdict（pmid必須）のリスト
+    """
+    if not rows:
+        return []
+    
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        db.execute(insert(Evidence).on_conflict_do_nothing(), rows)
+    else:
+        _add_new_evidence(db, rows)
+    
+    pmids = [row["pmid"] for row in rows]
+    ids = dict(db.execute(select(Evidence.pmid, Evidence.id).where(Evidence.pmid.in_(pmids))).all())
+    return [ids.get(pmid) for pmid in pmids]
@@ -1,32 +1,53 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from src.config import settings
 from src.database import create_tables, get_db
 from src.api.health import router as health_router
 from src.api.score import router as score_router
+from src.core.nli import get_nli
+from src.core.scoring import calculate_evidence_score
+
+
+def _warm_up_models():
+    """NLIモデルの読み込みと初回推論、スコアラーの初期化を起動時に済ませる"""
+    nli = get_nli()
+    if nli.sentence_model:
+        nli.encode_batch(["ウォームアップ"])
+    calculate_evidence_score({"text": "ウォームアップ"}, [], "ウォームアップ")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # データベース初期化（同期APIのためスレッドで実行）
+    await asyncio.to_thread(create_tables)
+    # 最初のリクエストがモデル読み込みを待たないよう起動時に温めておく
+    await asyncio.to_thread(_warm_up_models)
+    yield
+
 
 # アプリケーション初期化
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="医学・健康情報のエビデンスを9軸100点ルーブリックで自動評価するAPI"
+    description="医学・健康情報のエビデンスを9軸100点ルーブリックで自動評価するAPI",
+    # レスポンスのJSONエンコードはorjsonで行う
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS設定
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# データベース初期化
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
-
 # ルーター登録
 app.include_router(health_router, prefix="/health", tags=["health"])
 app.include_router(score_router, prefix=settings.api_v1_prefix, tags=["score"])
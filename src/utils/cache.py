@@ -0,0 +1,94 @@
+"""
+LLM応答の再利用キャッシュ
+
+同じ主張・論文に対するAPI呼び出しを省くため、メモリ上のLRUと
+diskcacheによるディスク永続化（プロセス再起動後も有効）の2段構成で保持する。
+diskcacheが未導入の場合はメモリのみで動作する。
+ディスク側は最初のget/setで開く（importやインスタンス生成だけではディレクトリを作らない）。
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """キー要素を連結したSHA-256ハッシュ"""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class TwoTierCache:
+    """メモリLRU + ディスクの2段キャッシュ（値はJSON互換のdict/listを想定）"""
+
+    def __init__(self, directory: str, maxsize: int = 1024, expire: Optional[int] = None):
+        """
+        Args:
+            directory: ディスクキャッシュの保存先
+            maxsize: メモリ上に保持する最大件数
+            expire: ディスク上の有効期限（秒、None=無期限）
+        """
+        self.directory = directory
+        self.maxsize = maxsize
+        self.expire = expire
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._disk = None
+        # diskcache未導入なら開く処理自体を行わない
+        self._disk_opened = diskcache is None
+
+    def _get_disk(self):
+        """ディスクキャッシュを初回利用時に開く（失敗した場合はNoneでメモリのみ）"""
+        if not self._disk_opened:
+            with self._lock:
+                if not self._disk_opened:
+                    try:
+                        self._disk = diskcache.Cache(self.directory)
+                    except Exception as e:
+                        logger.warning(f"❌ ディスクキャッシュ初期化失敗（メモリのみで動作）: {e}")
+                    self._disk_opened = True
+        return self._disk
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        disk = self._get_disk()
+        if disk is not None:
+            try:
+                value = disk.get(key)
+            except Exception as e:
+                logger.warning(f"ディスクキャッシュ読み込みエラー: {e}")
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                return value
+
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        disk = self._get_disk()
+        if disk is not None:
+            try:
+                disk.set(key, value, expire=self.expire)
+            except Exception as e:
+                logger.warning(f"ディスクキャッシュ書き込みエラー: {e}")
+
+    def _remember(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
@@ -1,28 +1,180 @@
 import pandas as pd
+import atexit
 import os
+import threading
+from collections import deque
+from itertools import islice
 from datetime import datetime
 from typing import Dict, List, Optional
 import json
 from pathlib import Path
+from openpyxl import Workbook
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+# JSONLへの書き出し間隔（秒）と、間隔を待たずに書き出す未書き出し件数
+LOG_FLUSH_INTERVAL = 2.0
+LOG_FLUSH_BATCH = 256
+
+# メモリに保持する直近の記録数（それより古い記録はJSONLから読み出す）
+LOG_RECENT_ROWS = 1000
+
+# 9軸の (英語名, スコア列, 理由列)。列名はimport時に1回だけ組み立てる
+_AXIS_COLUMNS = tuple(
+    (eng_axis, f"{jp_axis}_スコア", f"{jp_axis}_理由")
+    for eng_axis, jp_axis in [
+        ("clarity", "明確性"),
+        ("evidence_quality", "証拠の質"),
+        ("consensus", "学術合意"),
+        ("biological_plausibility", "生物学的妥当性"),
+        ("transparency", "データ透明性"),
+        ("context_distortion", "文脈歪曲リスク"),
+        ("harm_potential", "害の可能性"),
+        ("virality", "拡散性"),
+        ("correction_response", "訂正対応")
+    ]
+)
+
+# 数値・真偽値の列のdtype（それ以外の列は推論に任せる）。object列に数値を格納せず、統計計算をベクトル化する
+_COLUMN_DTYPES = {
+    **{score_column: "Int32" for _, score_column, _ in _AXIS_COLUMNS},
+    "支持エビデンス数": "Int32",
+    "反対エビデンス数": "Int32",
+    "中立エビデンス数": "Int32",
+    # 簡易フォーマットでは小数になり得るためfloat
+    "総合スコア": "float64",
+    "処理時間_秒": "float64",
+    "主張の信頼度": "float64",
+    "全体的な信頼度": "float64",
+    **{f"エビデンス{i}_信頼度": "float64" for i in range(1, 4)},
+    "レビュー済み": "boolean"
+}
 
 
 class EvaluationLogger:
-    """評価結果をログとして記録するクラス"""
+    """評価結果をログとして記録するクラス
+    
+    評価ごとの記録はJSONLファイルへバックグラウンドでまとめて追記する
+    （最大LOG_FLUSH_INTERVAL秒遅れ。終了時には残りを書き出す）。
+    メモリには直近LOG_RECENT_ROWS件だけを保持し、ログ全体が必要な統計・エクスポートではJSONLを読む。
+    Excelはsave_to_excel()で必要なときだけ書き出す。
+    """
     
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
         self.excel_file = self.log_dir / "evaluation_log.xlsx"
+        self.jsonl_file = self.log_dir / "evaluation_log.jsonl"
+        self._lock = threading.Lock()
+        
+        # 旧形式（Excelのみ）のログがあればJSONLへ移行
+        if not self.jsonl_file.exists() and self.excel_file.exists():
+            self._migrate_excel_log()
         
-        # 既存のログファイルを読み込み、なければ新規作成
-        if self.excel_file.exists():
+        # 記録件数（=次のID）と直近の記録
+        self._recent: "deque[Dict]" = deque(maxlen=LOG_RECENT_ROWS)
+        self._count = 0
+        for row in self._read_rows():
+            self._recent.append(row)
+            self._count += 1
+        self._file = open(self.jsonl_file, "a", encoding="utf-8")
+        
+        # 未書き出しの行。書き出し順（=ID順）を保つため、取り出しから書き込みまでを_write_lockで直列化する
+        self._pending: List[str] = []
+        self._write_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        threading.Thread(target=self._flush_loop, name="evaluation-log-flush", daemon=True).start()
+        atexit.register(self.flush)
+    
+    def __len__(self) -> int:
+        """記録済みの評価件数"""
+        return self._count
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """ログ全体のデータフレーム（参照のたびに未書き出し分を追記してからJSONLを読んで構築）"""
+        self.flush()
+        return self._to_dataframe(list(self._read_rows()))
+    
+    def _recent_rows(self, start: int, stop: int) -> Optional[List[Dict]]:
+        """IDがstart以上stop未満の記録（メモリに保持していない古い記録を含む場合はNone）"""
+        with self._lock:
+            first = self._count - len(self._recent)
+            if start < first:
+                return None
+            return list(islice(self._recent, start - first, stop - first))
+    
+    def _to_dataframe(self, rows: List[Dict], start: int = 0) -> pd.DataFrame:
+        """記録の行をデータフレーム化（インデックスは評価ID。startは先頭行のID）"""
+        empty = self._create_empty_dataframe()
+        if not rows:
+            return empty
+        
+        df = pd.DataFrame(rows, index=range(start, start + len(rows)))
+        columns = list(empty.columns) + [col for col in df.columns if col not in empty.columns]
+        df = df.reindex(columns=columns)
+        for column, dtype in _COLUMN_DTYPES.items():
             try:
-                self.df = pd.read_excel(self.excel_file, index_col=0)
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError):
+                pass  # 手入力などで数値以外が入った列は推論したdtypeのまま
+        return df
+    
+    def _read_rows(self):
+        """JSONLから記録を1件ずつ読み出す"""
+        if not self.jsonl_file.exists():
+            return
+        with open(self.jsonl_file, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    
+    def _migrate_excel_log(self):
+        """既存のExcelログをJSONLに書き出す"""
+        try:
+            old_df = pd.read_excel(self.excel_file, index_col=0)
+        except Exception as e:
+            print(f"既存ログファイル読み込みエラー: {e}")
+            return
+        
+        old_df = old_df.astype(object).where(old_df.notna(), None)
+        with open(self.jsonl_file, "w", encoding="utf-8") as f:
+            for row in old_df.to_dict("records"):
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+    
+    def _append_row(self, row: Dict) -> int:
+        """1件を記録してJSONLへの書き出し待ちに加え、そのIDを返す"""
+        line = json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._pending.append(line)
+            self._recent.append(row)
+            self._count += 1
+            if len(self._pending) >= LOG_FLUSH_BATCH:
+                self._flush_requested.set()
+            return self._count - 1
+    
+    def flush(self) -> None:
+        """未書き出しの記録をJSONLに追記"""
+        with self._write_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if lines:
+                self._file.write("".join(lines))
+                self._file.flush()
+    
+    def _flush_loop(self) -> None:
+        """LOG_FLUSH_INTERVAL秒ごと（または未書き出しがLOG_FLUSH_BATCH件に達したとき）に書き出す"""
+        while True:
+            self._flush_requested.wait(LOG_FLUSH_INTERVAL)
+            self._flush_requested.clear()
+            try:
+                self.flush()
             except Exception as e:
-                print(f"既存ログファイル読み込みエラー: {e}")
-                self.df = self._create_empty_dataframe()
-        else:
-            self.df = self._create_empty_dataframe()
+                print(f"ログ書き出しエラー: {e}")
     
     def _create_empty_dataframe(self) -> pd.DataFrame:
         """空のデータフレームを作成"""
@@ -97,7 +249,7 @@ class EvaluationLogger:
             "正解ラベル"  # 人手評価の正解
         ]
         
-        return pd.DataFrame(columns=columns)
+        return pd.DataFrame(columns=columns).astype(_COLUMN_DTYPES)
     
     def log_evaluation(
         self,
@@ -112,11 +264,8 @@ class EvaluationLogger:
         
         # 簡易ログデータフォーマットの場合
         if log_data is not None:
-            # 既存のデータフレームに追加（log_dataをそのまま使用）
-            new_row = pd.DataFrame([log_data])
-            self.df = pd.concat([self.df, new_row], ignore_index=True)
-            self.save_to_excel()
-            return len(self.df) - 1
+            # log_dataをそのまま1行として記録（呼び出し元での変更が記録に及ばないようコピー）
+            return self._append_row(dict(log_data))
         
         # 従来の詳細フォーマットの場合
         new_row = {
@@ -162,24 +311,9 @@ class EvaluationLogger:
             reasons_by_axis[axis] = reasoning
         
         # 各軸のスコアと理由を記録
-        axis_mapping = {
-            "clarity": "明確性",
-            "evidence_quality": "証拠の質",
-            "consensus": "学術合意",
-            "biological_plausibility": "生物学的妥当性",
-            "transparency": "データ透明性",
-            "context_distortion": "文脈歪曲リスク",
-            "harm_potential": "害の可能性",
-            "virality": "拡散性",
-            "correction_response": "訂正対応"
-        }
-        
-        for eng_axis, jp_axis in axis_mapping.items():
-            score = axis_scores.get(eng_axis, 0)
-            reason = reasons_by_axis.get(eng_axis, "理由なし")
-            
-            new_row[f"{jp_axis}_スコア"] = score
-            new_row[f"{jp_axis}_理由"] = reason
+        for eng_axis, score_column, reason_column in _AXIS_COLUMNS:
+            new_row[score_column] = axis_scores.get(eng_axis, 0)
+            new_row[reason_column] = reasons_by_axis.get(eng_axis, "理由なし")
         
         # 総合評価
         new_row["総合スコア"] = response_data.get("total_score", 0) if response_data else 0
@@ -200,45 +334,57 @@ class EvaluationLogger:
         new_row["レビュー済み"] = False
         new_row["正解ラベル"] = ""  # 後で人手で入力
         
-        # データフレームに追加
-        self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
-        
-        # Excelファイルに保存
-        self.save_to_excel()
-        
-        # 追加された行のインデックスを返す
-        return len(self.df) - 1
+        # 追記して、追加された行のインデックスを返す
+        return self._append_row(new_row)
     
     def save_to_excel(self):
-        """データフレームをExcelファイルに保存"""
+        """ログ全体をExcelファイルに書き出す（ダウンロード・確認用）"""
         try:
-            # インデックス列も含めて保存
-            self.df.to_excel(self.excel_file, index=True, index_label="ID")
+            df = self.df
+            # 欠損値は空セルにする（NaNのままだと不正なセル値になる）
+            df = df.astype(object).where(df.notna(), None)
+            
+            # 書式なしの行をストリーミングで書き込む（IDとしてインデックス列も含める）
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet("Sheet1")
+            sheet.append(["ID"] + list(df.columns))
+            for eval_id, row in enumerate(df.itertuples(index=False, name=None)):
+                sheet.append((eval_id,) + row)
+            workbook.save(self.excel_file)
             print(f"ログが保存されました: {self.excel_file}")
         except Exception as e:
             print(f"Excelファイル保存エラー: {e}")
     
     def get_evaluation_by_id(self, eval_id: int) -> Optional[Dict]:
-        """IDで評価結果を取得"""
-        if eval_id < len(self.df):
+        """IDで評価結果を取得（直近の記録はメモリから、それ以外はJSONLから）"""
+        if eval_id < len(self):
+            rows = self._recent_rows(eval_id, eval_id + 1) if eval_id >= 0 else None
+            if rows:
+                return self._to_dataframe(rows, start=eval_id).iloc[0].to_dict()
             return self.df.iloc[eval_id].to_dict()
         return None
     
     def get_recent_evaluations(self, n: int = 10) -> pd.DataFrame:
         """最近のn件の評価を取得"""
+        count = len(self)
+        start = max(count - n, 0)
+        rows = self._recent_rows(start, count) if n > 0 else None
+        if rows is not None:
+            return self._to_dataframe(rows, start=start)
         return self.df.tail(n)
     
     def get_statistics(self) -> Dict:
         """評価統計を取得"""
-        if len(self.df) == 0:
+        if len(self) == 0:
             return {"total_evaluations": 0}
         
+        df = self.df
         stats = {
-            "total_evaluations": len(self.df),
-            "average_score": self.df["総合スコア"].mean(),
-            "label_distribution": self.df["判定ラベル"].value_counts().to_dict(),
-            "average_processing_time": self.df["処理時間_秒"].mean(),
-            "latest_evaluation": self.df["評価日時"].max()
+            "total_evaluations": len(df),
+            "average_score": df["総合スコア"].mean(),
+            "label_distribution": df["判定ラベル"].value_counts().to_dict(),
+            "average_processing_time": df["処理時間_秒"].mean(),
+            "latest_evaluation": df["評価日時"].max()
         }
         
         return stats
@@ -257,15 +403,20 @@ class EvaluationLogger:
             "評価者コメント", "正解ラベル", "レビュー済み"
         ]
         
-        # IDを列として追加
-        review_df = self.df.copy()
+        # IDを列として追加（dfは参照ごとに新しく構築されるのでコピー不要）
+        review_df = self.df
         review_df.insert(0, "ID", review_df.index)
         
         # 指定した列のみを含むデータフレームを作成
         available_columns = [col for col in review_columns if col in review_df.columns]
         review_df = review_df[available_columns]
         
-        review_df.to_excel(output_file, index=False)
+        if xlsxwriter is not None:
+            # 行を順にディスクへ書き出し、ブック全体をメモリに保持しない
+            with pd.ExcelWriter(output_file, engine="xlsxwriter", engine_kwargs={"options": {"constant_memory": True}}) as writer:
+                review_df.to_excel(writer, index=False)
+        else:
+            review_df.to_excel(output_file, index=False)
         return str(output_file)
 
 
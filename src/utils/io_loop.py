@@ -0,0 +1,67 @@
+"""
+LLM APIクライアント用の専用イベントループ
+
+AsyncOpenAI等の非同期クライアントは、接続プールが最初に使われたイベントループに紐づく。
+そのため全ての呼び出しをバックグラウンドスレッド上の1つのループで実行し、
+同期コード（スレッド）からもFastAPIのイベントループ上のコードからも同じクライアント・接続を共有する。
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+import httpx
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+T = TypeVar("T")
+
+# プロバイダごとのHTTP接続上限（HTTP/2が使える場合は少数の接続上で多重化される）
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """専用ループを取得（初回呼び出し時にデーモンスレッドで起動）"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-io-loop", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """同期コードからコルーチンを専用ループで実行し、結果を待つ"""
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("専用ループ上ではrun_syncを使えません（コルーチンを直接awaitしてください）")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def submit(coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+    """コルーチンを専用ループに投入して待たずに戻る"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+async def run(coro: Awaitable[T]) -> T:
+    """任意のイベントループからコルーチンを専用ループで実行してawait（キャンセルも伝播）"""
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def make_http_client() -> httpx.AsyncClient:
+    """APIクライアント用のHTTPクライアント（h2が導入されていればHTTP/2）"""
+    return httpx.AsyncClient(http2=h2 is not None, limits=HTTP_LIMITS)
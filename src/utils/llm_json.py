@@ -0,0 +1,36 @@
+"""
+LLM応答からのJSON抽出
+
+```json フェンス付き・前後に説明文付きの応答から、JSON部分を取り出してパースする。
+"""
+
+import re
+from typing import Any
+
+import orjson
+
+# ```json ... ``` ブロック（閉じフェンスが欠けていても末尾までを対象にする）
+_JSON_FENCE = re.compile(rb"```json\s*(.*?)(?:```|\Z)", re.S)
+
+
+def extract_json(content: str) -> Any:
+    """
+    LLM応答テキストからJSON（オブジェクトまたは配列）を抽出してパース
+
+    フェンスがあればその中身、なければ最初の「{」「[」から最後の「}」「]」までを対象とする。
+
+    Raises:
+        orjson.JSONDecodeError: JSONとして解釈できない場合（ValueErrorのサブクラス）
+    """
+    buf = content.encode("utf-8")
+
+    match = _JSON_FENCE.search(buf)
+    if match:
+        return orjson.loads(match.group(1))
+
+    starts = [i for i in (buf.find(b"{"), buf.find(b"[")) if i != -1]
+    end = max(buf.rfind(b"}"), buf.rfind(b"]"))
+    if starts and end > min(starts):
+        return orjson.loads(buf[min(starts):end + 1])
+
+    return orjson.loads(buf)
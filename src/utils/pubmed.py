@@ -1,11 +1,106 @@
-import requests
+import asyncio
+import os
+import re
+import httpx
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 import time
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import AsyncIterator, List, Dict, Optional
 from urllib.parse import quote
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-import xml.etree.ElementTree as ET
+try:
+    # libxml2実装の方が記事XMLの解析が速い。APIは互換（find/iterfind/XMLPullParser/ParseError）
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from src.config import settings
+from src.utils import io_loop
+from src.utils.cache import TwoTierCache, make_cache_key
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """一時的なエラー（接続失敗・タイムアウト・429/5xx）のみ再試行する"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+_RETRY = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(min=0.5, max=4),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True
+)
+
+
+# 関連度評価プロンプトに含めるアブストラクトの最大文字数
+ABSTRACT_PROMPT_LENGTH = 800
+
+# APIレスポンスに含めるアブストラクトの最大文字数（超える分は「...」で省略）
+ABSTRACT_PREVIEW_LENGTH = 500
+
+# 検索結果・論文情報のキャッシュ有効期限（秒）。論文の書誌情報は公開後ほぼ変わらない
+PUBMED_CACHE_TTL = 24 * 60 * 60
+
+# EFetch 1回あたりのPMID数。超える分は分割して並行に取得する（受信・解析を重ねる）
+EFETCH_CHUNK_SIZE = 25
+# EFetchの相乗り待ち時間（秒）。この間に届いた他の評価の取得要求を同じリクエストにまとめる
+EFETCH_BATCH_WINDOW = 0.05
+
+# 関連度ランク付けでの研究タイプ別ボーナス（記載のないタイプは1.0）
+_STUDY_TYPE_BONUS = {
+    "meta-analysis": 3.0,
+    "randomized_controlled_trial": 2.5,
+    "cohort_study": 2.0,
+    "case_control": 1.5,
+    "review": 1.2
+}
+
+# 検索クエリの日本語から英語への簡易変換
+_QUERY_TRANSLATIONS = {
+    "ビタミンD": "vitamin D",
+    "免疫": "immune",
+    "感染": "infection",
+    "がん": "cancer",
+    "癌": "cancer",
+    "心臓病": "heart disease",
+    "糖尿病": "diabetes",
+    "高血圧": "hypertension",
+    "コレステロール": "cholesterol",
+    "血糖値": "blood glucose",
+    "予防": "prevention",
+    "治療": "treatment",
+    "効果": "effect",
+    "リスク": "risk",
+    "健康": "health"
+}
+# 全語を1回の走査で置換（長い語を優先）
+_QUERY_TRANSLATION_RE = re.compile("|".join(map(re.escape, sorted(_QUERY_TRANSLATIONS, key=len, reverse=True))))
+
+# 研究デザインのキーワードマッピング（先に並んだ研究タイプを優先）
+_STUDY_TYPE_KEYWORDS = {
+    "meta-analysis": ["meta-analysis", "systematic review", "pooled analysis"],
+    "randomized_controlled_trial": ["randomized controlled trial", "RCT", "randomized", "placebo"],
+    "cohort_study": ["cohort study", "prospective", "longitudinal"],
+    "case_control": ["case-control", "case control"],
+    "cross_sectional": ["cross-sectional", "cross sectional", "survey"],
+    "case_report": ["case report", "case series"],
+    "review": ["review", "narrative review"]
+}
+# 全キーワードを1回の走査で検出するオートマトン（値は (優先順位, 研究タイプ)。pyahocorasick未導入時はNone）
+_STUDY_TYPE_AUTOMATON = None
+if ahocorasick:
+    _STUDY_TYPE_AUTOMATON = ahocorasick.Automaton()
+    for _priority, (_study_type, _keywords) in enumerate(_STUDY_TYPE_KEYWORDS.items()):
+        for _keyword in _keywords:
+            _STUDY_TYPE_AUTOMATON.add_word(_keyword, (_priority, _study_type))
+    _STUDY_TYPE_AUTOMATON.make_automaton()
 
 
 @dataclass
@@ -20,10 +115,55 @@ class PubMedArticle:
     doi: Optional[str]
     study_type: Optional[str]
     url: str
+    abstract_truncated: str = field(init=False, repr=False)  # 関連度評価プロンプト用に切り詰めたアブストラクト
+    abstract_preview: str = field(init=False, repr=False)  # APIレスポンス用に省略したアブストラクト
+    title_words: frozenset = field(init=False, repr=False)  # ランク付け用の小文字化した単語集合
+    abstract_words: frozenset = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.abstract_truncated = self.abstract[:ABSTRACT_PROMPT_LENGTH] if self.abstract else ""
+        abstract = self.abstract or ""
+        self.abstract_preview = abstract[:ABSTRACT_PREVIEW_LENGTH] + "..." if len(abstract) > ABSTRACT_PREVIEW_LENGTH else abstract
+        self.title_words = frozenset((self.title or "").lower().split())
+        self.abstract_words = frozenset((self.abstract or "").lower().split())
+    
+    def to_cache(self) -> Dict:
+        """キャッシュ保存用のJSON互換dict"""
+        return {
+            "pmid": self.pmid,
+            "title": self.title,
+            "abstract": self.abstract,
+            "authors": self.authors,
+            "journal": self.journal,
+            "publication_date": self.publication_date.isoformat() if self.publication_date else None,
+            "doi": self.doi,
+            "study_type": self.study_type,
+            "url": self.url
+        }
+    
+    @classmethod
+    def from_cache(cls, data: Dict) -> "PubMedArticle":
+        """to_cache()の結果から復元"""
+        publication_date = data["publication_date"]
+        return cls(**{**data, "publication_date": datetime.fromisoformat(publication_date) if publication_date else None})
 
 
 class PubMedSearcher:
-    """PubMed検索クラス"""
+    """PubMed検索クラス
+    
+    E-utilitiesへのHTTP呼び出しはAPIクライアント用の専用ループ上で非同期に行う。
+    同期メソッドは専用ループでの実行結果を待つラッパー。
+    """
+    
+    # NCBIのレート制限はプロセス単位で守る必要があるため、リクエスト時刻の割り当てをインスタンス間で共有（専用ループ上でのみ更新）
+    _next_request_time = 0.0
+    # 接続（TCP/TLS）もインスタンス間で使い回す
+    _client = io_loop.make_http_client()
+    # ESearch結果（クエリ単位）と論文情報（PMID単位）のキャッシュ。同じ主張の再評価ではNCBIに問い合わせない
+    _cache = TwoTierCache(os.path.join(settings.llm_cache_dir, "pubmed"), maxsize=4096, expire=PUBMED_CACHE_TTL)
+    # 次のEFetchで取得するPMID（PMID → 結果を受け取るFuture）と送信待ちのタスク（専用ループ上でのみ操作）
+    _pending_fetches: Dict[str, asyncio.Future] = {}
+    _dispatch_task: Optional[asyncio.Task] = None
     
     def __init__(self):
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
@@ -32,29 +172,29 @@ class PubMedSearcher:
         self.rate_limit_delay = 0.34 if not self.api_key else 0.1  # API キーありなら10req/sec、なしなら3req/sec
         
         # 研究デザインのキーワードマッピング
-        self.study_type_keywords = {
-            "meta-analysis": ["meta-analysis", "systematic review", "pooled analysis"],
-            "randomized_controlled_trial": ["randomized controlled trial", "RCT", "randomized", "placebo"],
-            "cohort_study": ["cohort study", "prospective", "longitudinal"],
-            "case_control": ["case-control", "case control"],
-            "cross_sectional": ["cross-sectional", "cross sectional", "survey"],
-            "case_report": ["case report", "case series"],
-            "review": ["review", "narrative review"]
-        }
+        self.study_type_keywords = _STUDY_TYPE_KEYWORDS
     
     def search_articles(self, query: str, max_results: int = 10) -> List[PubMedArticle]:
+        """主張に関連する記事を検索（同期版。引数・戻り値はasearch_articlesと同じ）"""
+        return io_loop.run_sync(self._search_articles(query, max_results))
+    
+    async def asearch_articles(self, query: str, max_results: int = 10) -> List[PubMedArticle]:
         """主張に関連する記事を検索"""
+        return await io_loop.run(self._search_articles(query, max_results))
+    
+    async def _search_articles(self, query: str, max_results: int) -> List[PubMedArticle]:
+        """記事検索の本体（専用ループ上で実行）"""
         try:
             # 検索クエリの最適化
             optimized_query = self._optimize_query(query)
             
             # PubMed IDを検索
-            pmids = self._search_pmids(optimized_query, max_results)
+            pmids = await self._search_pmids(optimized_query, max_results)
             if not pmids:
                 return []
             
             # 詳細情報を取得
-            articles = self._fetch_article_details(pmids)
+            articles = await self._fetch_article_details(pmids)
             
             # 関連度でソート
             articles = self._rank_articles(articles, query)
@@ -65,30 +205,55 @@ class PubMedSearcher:
             print(f"PubMed検索エラー: {e}")
             return []
     
+    def search_pmids(self, query: str, max_results: int = 10) -> List[str]:
+        """クエリに一致するPMIDを関連度順に取得（同期版。引数・戻り値はasearch_pmidsと同じ）"""
+        return io_loop.run_sync(self._search_pmids(self._optimize_query(query), max_results))
+    
+    async def asearch_pmids(self, query: str, max_results: int = 10) -> List[str]:
+        """クエリに一致するPMIDを関連度順に取得（ESearchのみ。詳細は取得しない）"""
+        return await io_loop.run(self._search_pmids(self._optimize_query(query), max_results))
+    
+    def fetch_details(self, pmids: List[str]) -> List[PubMedArticle]:
+        """PMIDの詳細情報を取得（同期版。引数・戻り値はafetch_detailsと同じ）"""
+        return io_loop.run_sync(self._fetch_details(pmids))
+    
+    async def afetch_details(self, pmids: List[str]) -> List[PubMedArticle]:
+        """PMIDの詳細情報を1回のEFetchで取得（pmidsの順序で返す）"""
+        return await io_loop.run(self._fetch_details(pmids))
+    
+    async def _fetch_details(self, pmids: List[str]) -> List[PubMedArticle]:
+        articles_by_pmid = {article.pmid: article for article in await self._fetch_article_details(pmids)}
+        return [articles_by_pmid[pmid] for pmid in pmids if pmid in articles_by_pmid]
+    
+    @_RETRY
+    async def _request(self, method: str, url: str, **kwargs) -> bytes:
+        """E-utilitiesへのリクエスト（レート制限を守り、一時的なエラーは指数バックオフで最大3回まで試行）"""
+        await self._wait_for_rate_limit()
+        response = await PubMedSearcher._client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response.content
+    
+    @_RETRY
+    async def _request_articles(self, method: str, url: str, **kwargs) -> List[PubMedArticle]:
+        """記事XMLを返すリクエスト（応答は受信しながら解析し、全体をメモリに溜めない）"""
+        await self._wait_for_rate_limit()
+        async with PubMedSearcher._client.stream(method, url, **kwargs) as response:
+            response.raise_for_status()
+            return await self._parse_articles_stream(response.aiter_bytes())
+    
+    async def _wait_for_rate_limit(self) -> None:
+        """前回のリクエストからrate_limit_delay以上空くまで待機（並行呼び出しでも順番に枠を割り当てる）"""
+        # 専用ループ上でのみ呼ばれ、割り当てまでの間にawaitがないためロックは不要
+        now = time.monotonic()
+        scheduled = max(now, PubMedSearcher._next_request_time)
+        PubMedSearcher._next_request_time = scheduled + self.rate_limit_delay
+        if scheduled > now:
+            await asyncio.sleep(scheduled - now)
+    
     def _optimize_query(self, query: str) -> str:
         """検索クエリを最適化"""
         # 日本語から英語への簡易変換
-        translations = {
-            "ビタミンD": "vitamin D",
-            "免疫": "immune",
-            "感染": "infection",
-            "がん": "cancer",
-            "癌": "cancer",
-            "心臓病": "heart disease",
-            "糖尿病": "diabetes",
-            "高血圧": "hypertension",
-            "コレステロール": "cholesterol",
-            "血糖値": "blood glucose",
-            "予防": "prevention",
-            "治療": "treatment",
-            "効果": "effect",
-            "リスク": "risk",
-            "健康": "health"
-        }
-        
-        optimized = query
-        for jp, en in translations.items():
-            optimized = optimized.replace(jp, en)
+        optimized = _QUERY_TRANSLATION_RE.sub(lambda m: _QUERY_TRANSLATIONS[m.group(0)], query)
         
         # 研究の質を向上させるフィルターを追加
         filters = [
@@ -99,7 +264,7 @@ class PubMedSearcher:
         
         return optimized + " " + " ".join(filters)
     
-    def _search_pmids(self, query: str, max_results: int) -> List[str]:
+    async def _search_pmids(self, query: str, max_results: int) -> List[str]:
         """PubMed IDを検索"""
         url = f"{self.base_url}esearch.fcgi"
         params = {
@@ -115,30 +280,83 @@ class PubMedSearcher:
         if self.api_key:
             params["api_key"] = self.api_key
         
-        time.sleep(self.rate_limit_delay)
+        cache_key = make_cache_key("esearch", query, max_results)
+        cached = PubMedSearcher._cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            content = await self._request("GET", url, params=params, timeout=10)
             
-            root = ET.fromstring(response.content)
-            pmids = [id_elem.text for id_elem in root.findall(".//Id")]
+            root = ET.fromstring(content)
+            pmids = [id_elem.text for id_elem in root.iterfind("IdList/Id")]
             
+            PubMedSearcher._cache.set(cache_key, pmids)
             return pmids
             
         except Exception as e:
             print(f"PMID検索エラー: {e}")
             return []
     
-    def _fetch_article_details(self, pmids: List[str]) -> List[PubMedArticle]:
-        """記事の詳細情報を取得"""
+    async def _fetch_article_details(self, pmids: List[str]) -> List[PubMedArticle]:
+        """記事の詳細情報を取得（キャッシュ済みのPMIDはEFetchしない）"""
         if not pmids:
             return []
         
+        articles = []
+        missing = []
+        for pmid in pmids:
+            cached = PubMedSearcher._cache.get(make_cache_key("efetch", pmid))
+            if cached is not None:
+                articles.append(PubMedArticle.from_cache(cached))
+            else:
+                missing.append(pmid)
+        
+        if not missing:
+            return articles
+        
+        fetched = await self._fetch_batched(missing)
+        articles.extend(article for article in fetched if article is not None)
+        return articles
+    
+    async def _fetch_batched(self, pmids: List[str]) -> List[Optional[PubMedArticle]]:
+        """同時期の他の取得要求とまとめてEFetchし、pmidsの順に結果を返す（取得できなかったPMIDはNone）"""
+        loop = asyncio.get_running_loop()
+        pending = PubMedSearcher._pending_fetches
+        futures = []
+        for pmid in pmids:
+            future = pending.get(pmid)
+            if future is None:
+                future = pending[pmid] = loop.create_future()
+            futures.append(future)
+        
+        if PubMedSearcher._dispatch_task is None:
+            PubMedSearcher._dispatch_task = asyncio.create_task(self._dispatch_fetches())
+        
+        # Futureは他の呼び出しと共有するため、この呼び出しのキャンセルが波及しないようにする
+        return await asyncio.gather(*(asyncio.shield(future) for future in futures))
+    
+    async def _dispatch_fetches(self) -> None:
+        """待ち時間の間に集まったPMIDをまとめてEFetchし、各Futureに結果を渡す"""
+        await asyncio.sleep(EFETCH_BATCH_WINDOW)
+        pending = PubMedSearcher._pending_fetches
+        PubMedSearcher._pending_fetches = {}
+        PubMedSearcher._dispatch_task = None
+        
+        fetched = {}
+        try:
+            for article in await self._request_article_chunks(list(pending)):
+                fetched[article.pmid] = article
+        finally:
+            for pmid, future in pending.items():
+                if not future.done():
+                    future.set_result(fetched.get(pmid))
+    
+    async def _request_article_chunks(self, pmids: List[str]) -> List[PubMedArticle]:
+        """PMIDをEFETCH_CHUNK_SIZEずつ並行にEFetchし、取得した記事をキャッシュに保存"""
         url = f"{self.base_url}efetch.fcgi"
         params = {
             "db": "pubmed",
-            "id": ",".join(pmids),
             "retmode": "xml",
             "rettype": "abstract"
         }
@@ -148,68 +366,85 @@ class PubMedSearcher:
         if self.api_key:
             params["api_key"] = self.api_key
         
-        time.sleep(self.rate_limit_delay)
+        # PMIDが多いとURLが長くなるためPOSTで送信し、応答はストリームのまま解析
+        # 分割したリクエストはレート制限の枠で順に送られ、先に届いた応答から解析が進む
+        chunks = [pmids[i:i + EFETCH_CHUNK_SIZE] for i in range(0, len(pmids), EFETCH_CHUNK_SIZE)]
+        results = await asyncio.gather(
+            *(self._request_articles("POST", url, data={**params, "id": ",".join(chunk)}, timeout=15) for chunk in chunks),
+            return_exceptions=True
+        )
         
-        try:
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            
-            return self._parse_articles_xml(response.content)
-            
-        except Exception as e:
-            print(f"記事詳細取得エラー: {e}")
-            return []
+        articles = []
+        for fetched in results:
+            if isinstance(fetched, Exception):
+                print(f"記事詳細取得エラー: {fetched}")
+                continue
+            for article in fetched:
+                PubMedSearcher._cache.set(make_cache_key("efetch", article.pmid), article.to_cache())
+                articles.append(article)
+        
+        return articles
     
-    def _parse_articles_xml(self, xml_content: bytes) -> List[PubMedArticle]:
-        """XMLから記事情報を解析"""
+    async def _parse_articles_stream(self, chunks: AsyncIterator[bytes]) -> List[PubMedArticle]:
+        """受信中のXMLから記事情報を解析（記事単位で逐次解析して解放）"""
         articles = []
+        parser = ET.XMLPullParser(events=("end",))
         
         try:
-            root = ET.fromstring(xml_content)
-            
-            for article_elem in root.findall(".//PubmedArticle"):
-                article = self._parse_single_article(article_elem)
-                if article:
-                    articles.append(article)
+            async for chunk in chunks:
+                parser.feed(chunk)
+                self._collect_articles(parser, articles)
+            parser.close()
+            self._collect_articles(parser, articles)
                     
-        except Exception as e:
+        except ET.ParseError as e:
             print(f"XML解析エラー: {e}")
         
         return articles
     
+    def _collect_articles(self, parser: ET.XMLPullParser, articles: List[PubMedArticle]) -> None:
+        """解析済みの記事要素を取り出してarticlesに追加"""
+        for _, elem in parser.read_events():
+            if elem.tag != "PubmedArticle":
+                continue
+            article = self._parse_single_article(elem)
+            if article:
+                articles.append(article)
+            elem.clear()
+    
     def _parse_single_article(self, article_elem) -> Optional[PubMedArticle]:
-        """単一記事の情報を解析"""
+        """単一記事の情報を解析（要素はPubmedArticle直下からのパスで指定し、サブツリー全体の探索を避ける）"""
         try:
             # PMID
-            pmid_elem = article_elem.find(".//PMID")
+            pmid_elem = article_elem.find("MedlineCitation/PMID")
             pmid = pmid_elem.text if pmid_elem is not None else ""
             
             # タイトル
-            title_elem = article_elem.find(".//ArticleTitle")
+            title_elem = article_elem.find("MedlineCitation/Article/ArticleTitle")
             title = title_elem.text if title_elem is not None else ""
             
             # アブストラクト
-            abstract_elem = article_elem.find(".//Abstract/AbstractText")
+            abstract_elem = article_elem.find("MedlineCitation/Article/Abstract/AbstractText")
             abstract = abstract_elem.text if abstract_elem is not None else ""
             
             # 著者
-            author_elems = article_elem.findall(".//Author")
+            author_elems = article_elem.iterfind("MedlineCitation/Article/AuthorList/Author")
             authors = []
-            for author_elem in author_elems[:5]:  # 最初の5人まで
+            for author_elem in islice(author_elems, 5):  # 最初の5人まで
                 lastname = author_elem.find("LastName")
                 firstname = author_elem.find("ForeName")
                 if lastname is not None and firstname is not None:
                     authors.append(f"{firstname.text} {lastname.text}")
             
             # ジャーナル
-            journal_elem = article_elem.find(".//Journal/Title")
+            journal_elem = article_elem.find("MedlineCitation/Article/Journal/Title")
             journal = journal_elem.text if journal_elem is not None else ""
             
             # 出版日
             pub_date = self._parse_publication_date(article_elem)
             
             # DOI
-            doi_elem = article_elem.find(".//ELocationID[@EIdType='doi']")
+            doi_elem = article_elem.find("MedlineCitation/Article/ELocationID[@EIdType='doi']")
             doi = doi_elem.text if doi_elem is not None else None
             
             # 研究タイプの推定
@@ -237,7 +472,7 @@ class PubMedSearcher:
     def _parse_publication_date(self, article_elem) -> Optional[datetime]:
         """出版日を解析"""
         try:
-            pub_date_elem = article_elem.find(".//PubDate")
+            pub_date_elem = article_elem.find("MedlineCitation/Article/Journal/JournalIssue/PubDate")
             if pub_date_elem is None:
                 return None
             
@@ -270,6 +505,16 @@ class PubMedSearcher:
         """研究タイプを推定"""
         text_lower = text.lower()
         
+        if _STUDY_TYPE_AUTOMATON is not None:
+            # 一致したキーワードのうち最も優先順位の高い研究タイプ
+            best = None
+            for _, (priority, study_type) in _STUDY_TYPE_AUTOMATON.iter(text_lower):
+                if best is None or priority < best[0]:
+                    best = (priority, study_type)
+                    if priority == 0:
+                        break
+            return best[1] if best else "other"
+        
         for study_type, keywords in self.study_type_keywords.items():
             for keyword in keywords:
                 if keyword in text_lower:
@@ -280,33 +525,25 @@ class PubMedSearcher:
     def _rank_articles(self, articles: List[PubMedArticle], query: str) -> List[PubMedArticle]:
         """記事を関連度でランク付け"""
         query_words = set(query.lower().split())
+        now = datetime.now()
         
         def calculate_relevance(article: PubMedArticle) -> float:
             score = 0.0
             
             # タイトルでの一致
-            title_words = set(article.title.lower().split())
-            title_matches = len(query_words & title_words)
+            title_matches = len(query_words & article.title_words)
             score += title_matches * 3.0
             
             # アブストラクトでの一致
-            abstract_words = set(article.abstract.lower().split())
-            abstract_matches = len(query_words & abstract_words)
+            abstract_matches = len(query_words & article.abstract_words)
             score += abstract_matches * 1.0
             
             # 研究タイプによるボーナス
-            type_bonus = {
-                "meta-analysis": 3.0,
-                "randomized_controlled_trial": 2.5,
-                "cohort_study": 2.0,
-                "case_control": 1.5,
-                "review": 1.2
-            }
-            score += type_bonus.get(article.study_type, 1.0)
+            score += _STUDY_TYPE_BONUS.get(article.study_type, 1.0)
             
             # 出版日による重み（新しいほど高い）
             if article.publication_date:
-                years_old = (datetime.now() - article.publication_date).days / 365
+                years_old = (now - article.publication_date).days / 365
                 if years_old < 5:
                     score += 1.0
                 elif years_old < 10:
@@ -331,7 +568,7 @@ def search_evidence(claim_text: str, max_results: int = 5) -> List[Dict]:
         evidence_list.append({
             "pmid": article.pmid,
             "title": article.title,
-            "abstract": article.abstract[:500] + "..." if len(article.abstract) > 500 else article.abstract,
+            "abstract": article.abstract_preview,
             "authors": article.authors[:3],  # 最初の3人まで
             "journal": article.journal,
             "publication_date": article.publication_date.isoformat() if article.publication_date else None,
@@ -1,20 +1,27 @@
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from pydantic import BaseModel
+import asyncio
+import msgspec
+import orjson
 import os
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 # 正規化機能をインポート
+# 各機能はモジュールの共有インスタンスを使い回す（APIクライアント・キャッシュをリクエストごとに作り直さない）
 try:
-    from src.core.medical_normalizer_v2 import MedicalTermNormalizer
+    from src.core.medical_normalizer_v2 import normalizer
     normalizer_available = True
 except ImportError:
     normalizer_available = False
 
 # 文献検索機能をインポート
 try:
-    from src.core.literature_searcher import LiteratureSearcher
+    from src.core.literature_searcher import literature_searcher
     literature_searcher_available = True
 except ImportError:
     literature_searcher_available = False
@@ -23,6 +30,7 @@ except ImportError:
 try:
     from src.core.staged_evaluator import StagedEvaluator
     staged_evaluator_available = True
+    staged_evaluator = StagedEvaluator()
 except ImportError:
     staged_evaluator_available = False
 
@@ -36,7 +44,12 @@ try:
 except ImportError:
     logger_available = False
 
-app = FastAPI(title="Evidence Checker with Normalizer Test", version="0.2.0")
+app = FastAPI(
+    title="Evidence Checker with Normalizer Test",
+    version="0.2.0",
+    # レスポンスのJSONエンコードはorjsonで行う
+    default_response_class=ORJSONResponse
+)
 
 class ClaimRequest(BaseModel):
     claim_text: str
@@ -48,28 +61,114 @@ class LiteratureSearchRequest(BaseModel):
     language: Optional[str] = "ja"
     max_articles: Optional[int] = 10
 
+# 文献検索・段階的評価のレスポンス要素（dictを組み立てずに構造体のままmsgspecでエンコードする）
+class ArticleOut(msgspec.Struct):
+    pmid: str
+    title: str
+    abstract: str
+    authors: List[str]
+    journal: str
+    publication_date: Optional[str]
+    study_type: Optional[str]
+    url: str
+
+class NormalizationOut(msgspec.Struct):
+    medical_terms: List[str]
+    search_query: str
+    key_concepts: List[str]
+    medical_field: str
+    intervention: Optional[str]
+    outcome: Optional[str]
+    population: Optional[str]
+    confidence: float
+    api_used: str
+
+class StageKeyOutputsOut(msgspec.Struct):
+    normalization: Optional[object] = None
+    articles_found: Optional[int] = None
+    grade_certainty: Optional[object] = None
+    total_score: Optional[float] = None
+
+class StageSummaryOut(msgspec.Struct):
+    stage: str
+    success: bool
+    processing_time: float
+    error: Optional[str]
+    key_outputs: StageKeyOutputsOut
+
+def _encode_fallback(obj):
+    """msgspecが直接扱えない値の変換（numpyの値はPythonの値に、それ以外はFastAPIのエンコーダに任せる）"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return jsonable_encoder(obj)
+
+_msgspec_encoder = msgspec.json.Encoder(enc_hook=_encode_fallback)
+
+class MsgspecResponse(Response):
+    """msgspecでエンコードするJSONレスポンス"""
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        return _msgspec_encoder.encode(content)
+
+# 段階的評価の結果キャッシュ（(主張, 言語) → (評価時刻, 結果)）。正規化・文献検索はそれぞれのキャッシュで再利用される
+STAGED_RESULT_CACHE_SIZE = 256
+STAGED_RESULT_TTL = 3600  # 秒
+_staged_results: "OrderedDict[Tuple[str, str], Tuple[float, object]]" = OrderedDict()
+# 実行中の段階的評価（同じ主張の同時リクエストは1回の評価を共有する）
+_staged_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+async def evaluate_staged_cached(claim_text: str, language: str):
+    """段階的評価（全段階が成功した結果はSTAGED_RESULT_TTL秒再利用）"""
+    key = (claim_text, language)
+    cached = _staged_results.get(key)
+    if cached is not None and time.monotonic() - cached[0] < STAGED_RESULT_TTL:
+        _staged_results.move_to_end(key)
+        return cached[1]
+    
+    inflight = _staged_inflight.get(key)
+    if inflight is None:
+        inflight = asyncio.create_task(_evaluate_staged_and_cache(key))
+        _staged_inflight[key] = inflight
+        inflight.add_done_callback(lambda _: _staged_inflight.pop(key, None))
+    return await asyncio.shield(inflight)
+
+async def _evaluate_staged_and_cache(key: Tuple[str, str]):
+    result = await staged_evaluator.evaluate_staged(*key)
+    # 途中で失敗・時間切れになった評価（監査ログにerrorがある）は再評価できるようキャッシュしない
+    if "error" not in result.audit_log and all(stage.success for stage in result.stages):
+        _staged_results[key] = (time.monotonic(), result)
+        _staged_results.move_to_end(key)
+        if len(_staged_results) > STAGED_RESULT_CACHE_SIZE:
+            _staged_results.popitem(last=False)
+    return result
+
+# / と /health/ の内容は起動後に変わらない（機能の有無・APIクライアントはimport時に確定）ため、シリアライズ済みのバイト列を返す
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "Evidence Checker with Staged AI Evaluation System", 
+    "status": "running",
+    "normalizer_available": normalizer_available,
+    "literature_searcher_available": literature_searcher_available,
+    "staged_evaluator_available": staged_evaluator_available
+})
+
+if normalizer_available:
+    HEALTH_RESPONSE_BODY = orjson.dumps({
+        "status": "healthy", 
+        "normalizer": normalizer_available,
+        "available_apis": normalizer.get_available_apis(),
+        "preferred_api": normalizer.preferred_api
+    })
+else:
+    HEALTH_RESPONSE_BODY = orjson.dumps({"status": "healthy", "normalizer": normalizer_available})
+
 @app.get("/")
 async def root():
-    return {
-        "message": "Evidence Checker with Staged AI Evaluation System", 
-        "status": "running",
-        "normalizer_available": normalizer_available,
-        "literature_searcher_available": literature_searcher_available,
-        "staged_evaluator_available": staged_evaluator_available
-    }
+    return Response(ROOT_RESPONSE_BODY, media_type="application/json")
 
 @app.get("/health/")
 async def health():
-    if normalizer_available:
-        normalizer = MedicalTermNormalizer()
-        available_apis = normalizer.get_available_apis()
-        return {
-            "status": "healthy", 
-            "normalizer": normalizer_available,
-            "available_apis": available_apis,
-            "preferred_api": normalizer.preferred_api
-        }
-    return {"status": "healthy", "normalizer": normalizer_available}
+    return Response(HEALTH_RESPONSE_BODY, media_type="application/json")
 
 @app.get("/api/v1/apis/test")
 async def test_apis():
@@ -77,13 +176,15 @@ async def test_apis():
     if not normalizer_available:
         return {"error": "Normalizer not available"}
     
-    normalizer = MedicalTermNormalizer()
+    # 各APIの接続テストは並行に実行する
+    api_names = normalizer.get_available_apis()
+    connection_tests = await asyncio.gather(*(normalizer.atest_api_connection(api_name) for api_name in api_names))
     results = {}
     
-    for api_name in normalizer.get_available_apis():
+    for api_name, connection_test in zip(api_names, connection_tests):
         results[api_name] = {
             "available": api_name in normalizer.clients or api_name == "fallback",
-            "connection_test": normalizer.test_api_connection(api_name)
+            "connection_test": connection_test
         }
     
     return {
@@ -92,10 +193,28 @@ async def test_apis():
         "total_apis": len(results)
     }
 
+# Web UIのファイル情報は起動時に一度だけ取得する（HTMLを差し替えた場合は再起動で反映）
+WEB_INTERFACE_FILE = "evidence_checker_web.html"
+try:
+    WEB_INTERFACE_STAT: Optional[os.stat_result] = os.stat(WEB_INTERFACE_FILE)
+except OSError:
+    WEB_INTERFACE_STAT = None
+
+def _file_etag(stat_result: os.stat_result) -> str:
+    """更新時刻(ns)とサイズから作るETag"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+def _file_response(request: Request, path: str, stat_result: os.stat_result, headers: Optional[Dict[str, str]] = None, **kwargs) -> Response:
+    """取得済みのstatでファイルを返す（If-None-Matchが一致すれば304）"""
+    headers = {**(headers or {}), "ETag": _file_etag(stat_result)}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, stat_result=stat_result, headers=headers, **kwargs)
+
 @app.get("/web")
-async def web_interface():
-    if os.path.exists("evidence_checker_web.html"):
-        return FileResponse("evidence_checker_web.html")
+async def web_interface(request: Request):
+    if WEB_INTERFACE_STAT is not None:
+        return _file_response(request, WEB_INTERFACE_FILE, WEB_INTERFACE_STAT)
     return JSONResponse({"error": "Web interface not found"})
 
 @app.post("/api/v1/normalize")
@@ -112,8 +231,7 @@ async def normalize_claim(request: ClaimRequest):
         })
     
     try:
-        normalizer = MedicalTermNormalizer()
-        result = normalizer.normalize_claim(request.claim_text, request.language, request.force_api)
+        result = await normalizer.anormalize_claim(request.claim_text, request.language, request.force_api)
         
         return {
             "original_text": result.original_text,
@@ -134,7 +252,7 @@ async def normalize_claim(request: ClaimRequest):
             "original_text": request.claim_text
         }, status_code=500)
 
-@app.post("/api/v1/literature-search")
+@app.post("/api/v1/literature-search", response_class=MsgspecResponse)
 async def literature_search(request: LiteratureSearchRequest):
     """Stage 2: 高精度文献検索API"""
     if not literature_searcher_available:
@@ -144,43 +262,44 @@ async def literature_search(request: LiteratureSearchRequest):
         }, status_code=503)
     
     try:
-        searcher = LiteratureSearcher()
-        result = searcher.search_literature(request.claim_text, request.max_articles)
+        result = await literature_searcher.asearch_literature(request.claim_text, request.max_articles)
         
-        # APIレスポンス用にフォーマット
-        articles_data = []
-        for article in result.articles:
-            articles_data.append({
-                "pmid": article.pmid,
-                "title": article.title,
-                "abstract": article.abstract[:500] + "..." if len(article.abstract) > 500 else article.abstract,
-                "authors": article.authors[:3],
-                "journal": article.journal,
-                "publication_date": article.publication_date.isoformat() if article.publication_date else None,
-                "study_type": article.study_type,
-                "url": article.url
-            })
+        # APIレスポンス用にフォーマット（アブストラクトは記事生成時に省略済み）
+        articles_data = [
+            ArticleOut(
+                pmid=article.pmid,
+                title=article.title,
+                abstract=article.abstract_preview,
+                authors=article.authors[:3],
+                journal=article.journal,
+                publication_date=article.publication_date.isoformat() if article.publication_date else None,
+                study_type=article.study_type,
+                url=article.url
+            )
+            for article in result.articles
+        ]
+        normalized = result.normalized_claim
         
-        return {
+        return MsgspecResponse({
             "original_claim": result.original_claim,
-            "normalization": {
-                "medical_terms": result.normalized_claim.medical_terms,
-                "search_query": result.normalized_claim.search_query,
-                "key_concepts": result.normalized_claim.key_concepts,
-                "medical_field": result.normalized_claim.medical_field,
-                "intervention": result.normalized_claim.intervention,
-                "outcome": result.normalized_claim.outcome,
-                "population": result.normalized_claim.population,
-                "confidence": result.normalized_claim.confidence,
-                "api_used": result.normalized_claim.api_used
-            },
+            "normalization": NormalizationOut(
+                medical_terms=normalized.medical_terms,
+                search_query=normalized.search_query,
+                key_concepts=normalized.key_concepts,
+                medical_field=normalized.medical_field,
+                intervention=normalized.intervention,
+                outcome=normalized.outcome,
+                population=normalized.population,
+                confidence=normalized.confidence,
+                api_used=normalized.api_used
+            ),
             "search_queries": result.search_queries,
             "articles": articles_data,
             "search_summary": result.search_summary,
             "confidence": result.confidence,
             "api_used": result.api_used,
             "total_articles": len(articles_data)
-        }
+        })
         
     except Exception as e:
         return JSONResponse({
@@ -188,7 +307,7 @@ async def literature_search(request: LiteratureSearchRequest):
             "original_claim": request.claim_text
         }, status_code=500)
 
-@app.post("/api/v1/staged-evaluation")
+@app.post("/api/v1/staged-evaluation", response_class=MsgspecResponse)
 async def staged_evaluation(request: ClaimRequest):
     """Stage 3: 段階的AI評価システム（問題解決）"""
     if not staged_evaluator_available:
@@ -198,24 +317,24 @@ async def staged_evaluation(request: ClaimRequest):
         }, status_code=503)
     
     try:
-        evaluator = StagedEvaluator()
-        result = await evaluator.evaluate_staged(request.claim_text, request.language)
+        result = await evaluate_staged_cached(request.claim_text, request.language)
         
         # 詳細な評価結果をAPIレスポンス用にフォーマット
-        stages_summary = []
-        for stage in result.stages:
-            stages_summary.append({
-                "stage": stage.stage,
-                "success": stage.success,
-                "processing_time": stage.processing_time,
-                "error": stage.error_message,
-                "key_outputs": {
-                    "normalization": stage.output_data.get("normalized_claim") if stage.stage == "normalization" else None,
-                    "articles_found": stage.output_data.get("total_articles") if stage.stage == "literature_search" else None,
-                    "grade_certainty": stage.output_data.get("grade_assessment") if stage.stage == "paper_interpretation" else None,
-                    "total_score": stage.output_data.get("total_score") if stage.stage == "staged_scoring" else None
-                }
-            })
+        stages_summary = [
+            StageSummaryOut(
+                stage=stage.stage,
+                success=stage.success,
+                processing_time=stage.processing_time,
+                error=stage.error_message,
+                key_outputs=StageKeyOutputsOut(
+                    normalization=stage.output_data.get("normalized_claim") if stage.stage == "normalization" else None,
+                    articles_found=stage.output_data.get("total_articles") if stage.stage == "literature_search" else None,
+                    grade_certainty=stage.output_data.get("grade_assessment") if stage.stage == "paper_interpretation" else None,
+                    total_score=stage.output_data.get("total_score") if stage.stage == "staged_scoring" else None
+                )
+            )
+            for stage in result.stages
+        ]
         
         # 論文詳細情報（上位3件）
         paper_details = []
@@ -232,7 +351,7 @@ async def staged_evaluation(request: ClaimRequest):
                     "abstract_summary": paper.get("abstract_summary")
                 })
         
-        return {
+        return MsgspecResponse({
             "original_claim": result.claim_text,
             "final_evaluation": {
                 "total_score": result.final_score,
@@ -249,9 +368,10 @@ async def staged_evaluation(request: ClaimRequest):
                 "grade_assessment": result.stages[2].output_data.get("grade_assessment") if len(result.stages) >= 3 else None
             },
             "audit_log": result.audit_log,
+            "truncated": result.audit_log.get("truncated", False),
             "timestamp": result.timestamp,
             "system_version": "staged_v1.0"
-        }
+        })
         
     except Exception as e:
         return JSONResponse({
@@ -259,25 +379,78 @@ async def staged_evaluation(request: ClaimRequest):
             "original_claim": request.claim_text
         }, status_code=500)
 
+# 最後に書き出したExcelの（書き出し時の評価件数, ファイル情報）。ログは追記のみなので件数が変われば書き出し直す
+_excel_export: Optional[Tuple[int, os.stat_result]] = None
+
 @app.get("/api/v1/logs/download")
-async def download_logs():
+async def download_logs(request: Request):
     """評価ログのダウンロード"""
     if not logger_available:
         return JSONResponse({
             "error": "Logger not available"
         }, status_code=503)
     
-    if not evaluation_logger.excel_file.exists():
+    if len(evaluation_logger) == 0:
         return JSONResponse({
             "error": "No log file found"
         }, status_code=404)
     
-    return FileResponse(
-        path=str(evaluation_logger.excel_file),
+    # ログはJSONLに追記されているため、前回の書き出し以降に記録が増えていればExcelへ書き出す
+    global _excel_export
+    count = len(evaluation_logger)
+    if _excel_export is None or _excel_export[0] != count:
+        await asyncio.to_thread(evaluation_logger.save_to_excel)
+        _excel_export = (count, os.stat(evaluation_logger.excel_file))
+    
+    return _file_response(
+        request,
+        str(evaluation_logger.excel_file),
+        _excel_export[1],
+        # ログは追記されるため、ブラウザには毎回ETagで再検証させる（未更新なら304で本文を送らない）
+        headers={"Cache-Control": "no-cache"},
         filename="evaluation_log.xlsx",
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
+# 段階的評価の内訳から5点満点に換算する軸（軸, 内訳のキー, 内訳の満点）
+STAGED_AXIS_SCALES = (
+    ("clarity", "scope_nuance", 12),
+    ("evidence_quality", "evidence_alignment", 60),
+    ("transparency", "citation_quality", 22),
+    ("harm_potential", "safety_risk_handling", 6)
+)
+# 軸スコアの雛形（レスポンスでの軸の順序）。換算しない軸は固定値（詳細評価は段階的システムで実施）
+STAGED_AXIS_SCORES = {
+    "clarity": 0,
+    "evidence_quality": 0,
+    "consensus": 4,
+    "biological_plausibility": 4,
+    "transparency": 0,
+    "context_distortion": 4,
+    "harm_potential": 0,
+    "virality": 3,
+    "correction_response": 4
+}
+
+# 段階的評価の結果を従来フォーマットの組み立てで使う簡易オブジェクト（リクエストごとにクラスを作らないようモジュールで定義）
+class SimpleLiteratureResult:
+    def __init__(self, articles_count, summary):
+        self.confidence = 0.8
+        self.articles = [{"pmid": f"staged_{i}"} for i in range(articles_count)]
+        self.search_summary = summary
+
+class SimpleNormalized:
+    def __init__(self, stage_data):
+        self.confidence = stage_data.get("confidence", 0.8)
+        self.medical_terms = stage_data.get("key_terms_ja", [])
+        self.search_query = stage_data.get("pubmed_query_candidates", [""])[0]
+        self.medical_field = stage_data.get("domain_tags", [""])[0] if stage_data.get("domain_tags") else ""
+        self.intervention = stage_data.get("PICO", {}).get("Intervention_or_Exposure", "")
+        self.outcome = stage_data.get("PICO", {}).get("Outcomes", [""])[0] if stage_data.get("PICO", {}).get("Outcomes") else ""
+        self.population = stage_data.get("PICO", {}).get("Population", "")
+        self.key_concepts = stage_data.get("key_terms_en", [])
+        self.api_used = stage_data.get("api_used", "staged_evaluator")
+
 @app.post("/api/v1/score")
 async def enhanced_score(request: ClaimRequest):
     """強化された評価API（段階的評価統合版）"""
@@ -285,8 +458,7 @@ async def enhanced_score(request: ClaimRequest):
     # 段階的評価システムが利用可能な場合は、それを使用
     if staged_evaluator_available:
         try:
-            evaluator = StagedEvaluator()
-            staged_result = await evaluator.evaluate_staged(request.claim_text, request.language)
+            staged_result = await evaluate_staged_cached(request.claim_text, request.language)
             
             # 段階的評価結果を従来フォーマットに変換
             total_score = staged_result.final_score
@@ -294,17 +466,9 @@ async def enhanced_score(request: ClaimRequest):
             
             # 各軸のスコアを段階的評価から抽出
             breakdown = staged_result.detailed_breakdown
-            axis_scores = {
-                "clarity": min(5, int(breakdown.get("scope_nuance", 0) * 5 / 12)),  # 12点満点を5点満点にスケール
-                "evidence_quality": min(5, int(breakdown.get("evidence_alignment", 0) * 5 / 60)),  # 60点満点を5点満点にスケール
-                "consensus": 4,  # 固定値（詳細評価は段階的システムで実施）
-                "biological_plausibility": 4,
-                "transparency": min(5, int(breakdown.get("citation_quality", 0) * 5 / 22)),  # 22点満点を5点満点にスケール
-                "context_distortion": 4,
-                "harm_potential": min(5, int(breakdown.get("safety_risk_handling", 0) * 5 / 6)),  # 6点満点を5点満点にスケール
-                "virality": 3,
-                "correction_response": 4
-            }
+            axis_scores = dict(STAGED_AXIS_SCORES)
+            for axis, breakdown_key, max_points in STAGED_AXIS_SCALES:
+                axis_scores[axis] = min(5, int(breakdown.get(breakdown_key, 0) * 5 / max_points))
             
             # 段階的評価結果からrationales作成
             rationales = []
@@ -331,12 +495,6 @@ async def enhanced_score(request: ClaimRequest):
                 search_stage = staged_result.stages[1]
                 if search_stage.success:
                     # 簡易的なliterature_resultsオブジェクト作成
-                    class SimpleLiteratureResult:
-                        def __init__(self, articles_count, summary):
-                            self.confidence = 0.8
-                            self.articles = [{"pmid": f"staged_{i}"} for i in range(articles_count)]
-                            self.search_summary = summary
-                    
                     articles_count = search_stage.output_data.get("total_articles", 0)
                     literature_results = SimpleLiteratureResult(articles_count, evidence_summary)
                 
@@ -344,18 +502,6 @@ async def enhanced_score(request: ClaimRequest):
                 if len(staged_result.stages) >= 1:
                     norm_stage = staged_result.stages[0]
                     if norm_stage.success:
-                        class SimpleNormalized:
-                            def __init__(self, stage_data):
-                                self.confidence = stage_data.get("confidence", 0.8)
-                                self.medical_terms = stage_data.get("key_terms_ja", [])
-                                self.search_query = stage_data.get("pubmed_query_candidates", [""])[0]
-                                self.medical_field = stage_data.get("domain_tags", [""])[0] if stage_data.get("domain_tags") else ""
-                                self.intervention = stage_data.get("PICO", {}).get("Intervention_or_Exposure", "")
-                                self.outcome = stage_data.get("PICO", {}).get("Outcomes", [""])[0] if stage_data.get("PICO", {}).get("Outcomes") else ""
-                                self.population = stage_data.get("PICO", {}).get("Population", "")
-                                self.key_concepts = stage_data.get("key_terms_en", [])
-                                self.api_used = stage_data.get("api_used", "staged_evaluator")
-                        
                         normalized = SimpleNormalized(norm_stage.output_data)
             
         except Exception as e:
@@ -394,7 +540,7 @@ async def enhanced_score(request: ClaimRequest):
             "search_summary": literature_results.search_summary if literature_results else None,
             "top_articles": []  # 段階的評価では詳細は別APIで提供
         } if literature_results else None,
-        "log_id": len(evaluation_logger.df) + 1 if logger_available else 1
+        "log_id": None  # ログ記録時に割り当てられた番号を設定
     }
     
     # ログ記録（改良版）
@@ -431,97 +577,119 @@ async def enhanced_score(request: ClaimRequest):
                             f"論文{i}_研究タイプ": "staged_evaluation"
                         })
             
-            evaluation_logger.log_evaluation(log_data)
+            # メモリへの追加のみ（ファイルへはロガーがバックグラウンドでまとめて書き出す）
+            # 番号はロガーが記録時に割り当てるため、同時リクエストでも重複しない
+            result["log_id"] = evaluation_logger.log_evaluation(log_data) + 1
         except Exception as e:
             print(f"ログ記録エラー: {e}")
     
     return result
 
+# 従来評価の判定ごとの固定値と根拠文の雛形（{articles}等はリクエストごとの値で埋める）
+_PRESET_EVIDENCE = {
+    # 文献検索結果に基づく高品質な評価
+    "total_score": 88,
+    "label": "Evidence-Based Evaluation",
+    "axis_scores": {
+        "clarity": 5,
+        "evidence_quality": 5,
+        "consensus": 4,
+        "biological_plausibility": 4,
+        "transparency": 4,
+        "context_distortion": 4,
+        "harm_potential": 5,
+        "virality": 3,
+        "correction_response": 4
+    },
+    "rationales": (
+        ("evidence_quality", 5, "PubMed検索で{articles}件の関連論文を発見。エビデンスベースでの評価が可能。"),
+        ("clarity", 5, "医学用語正規化: {concepts}")
+    ),
+    "evidence_summary": "文献検索: {articles}件の関連論文 | {search_summary}"
+}
+_PRESET_NORMALIZED = {
+    # 正規化のみ成功した場合
+    "total_score": 82,
+    "label": "Normalized Analysis",
+    "axis_scores": {
+        "clarity": 5,
+        "evidence_quality": 4,
+        "consensus": 4,
+        "biological_plausibility": 4,
+        "transparency": 3,
+        "context_distortion": 4,
+        "harm_potential": 5,
+        "virality": 3,
+        "correction_response": 3
+    },
+    "rationales": (
+        ("evidence_quality", 4, "医学用語正規化により「{query}」として検索。専門的な評価が可能。"),
+        ("clarity", 5, "主要概念: {concepts}として明確に特定")
+    ),
+    "evidence_summary": "正規化クエリ: {query}"
+}
+_PRESET_FALLBACK = {
+    # フォールバック評価
+    "total_score": 75,
+    "label": "Test Mode (Basic)",
+    "axis_scores": {"clarity": 4, "evidence_quality": 3},
+    "rationales": (("test", 4, "基本テストモード"),),
+    "evidence_summary": "正規化機能が利用できません"
+}
+# (文献あり, 正規化の信頼度>0.5) → 判定。文献検索は信頼度が高い場合のみ使うため(True, False)は起こらない
+LEGACY_SCORE_PRESETS = {
+    (True, True): _PRESET_EVIDENCE,
+    (True, False): _PRESET_EVIDENCE,
+    (False, True): _PRESET_NORMALIZED,
+    (False, False): _PRESET_FALLBACK
+}
+
 async def legacy_score_evaluation(request: ClaimRequest):
     """従来の評価システム（フォールバック用）"""
     
+    # 文献検索は正規化の結果を待たずに開始する（検索内部の正規化は実行中の正規化と共有される）
+    search_task = None
+    if normalizer_available and literature_searcher_available:
+        search_task = asyncio.create_task(literature_searcher.asearch_literature(request.claim_text, 5))
+    
     # Step 1: 正規化
     normalized = None
     if normalizer_available:
         try:
-            normalizer = MedicalTermNormalizer()
-            normalized = normalizer.normalize_claim(request.claim_text, request.language)
+            normalized = await normalizer.anormalize_claim(request.claim_text, request.language)
         except Exception as e:
             print(f"Normalization error: {e}")
     
-    # Step 2: 文献検索（Stage 2統合）
+    # Step 2: 文献検索（Stage 2統合）。正規化の信頼度が低ければ検索結果は使わないため中止する
     literature_results = None
-    if literature_searcher_available and normalized and normalized.confidence > 0.5:
-        try:
-            searcher = LiteratureSearcher()
-            literature_results = searcher.search_literature(request.claim_text, 5)
-        except Exception as e:
-            print(f"Literature search error: {e}")
+    if search_task is not None:
+        if normalized and normalized.confidence > 0.5:
+            try:
+                literature_results = await search_task
+            except Exception as e:
+                print(f"Literature search error: {e}")
+        else:
+            search_task.cancel()
     
-    # Step 3: エビデンスに基づく評価
-    if literature_results and len(literature_results.articles) > 0:
-        # 文献検索結果に基づく高品質な評価
-        total_score = 88
-        label = "Evidence-Based Evaluation"
-        axis_scores = {
-            "clarity": 5,
-            "evidence_quality": 5,
-            "consensus": 4,
-            "biological_plausibility": 4,
-            "transparency": 4,
-            "context_distortion": 4,
-            "harm_potential": 5,
-            "virality": 3,
-            "correction_response": 4
-        }
-        rationales = [
-            {
-                "axis": "evidence_quality", 
-                "score": 5, 
-                "reasoning": f"PubMed検索で{len(literature_results.articles)}件の関連論文を発見。エビデンスベースでの評価が可能。"
-            },
-            {
-                "axis": "clarity",
-                "score": 5,
-                "reasoning": f"医学用語正規化: {', '.join(normalized.key_concepts[:2])}"
-            }
-        ]
-        evidence_summary = f"文献検索: {len(literature_results.articles)}件の関連論文 | {literature_results.search_summary}"
-    elif normalized and normalized.confidence > 0.5:
-        # 正規化のみ成功した場合
-        total_score = 82
-        label = "Normalized Analysis"
-        axis_scores = {
-            "clarity": 5,
-            "evidence_quality": 4,
-            "consensus": 4,
-            "biological_plausibility": 4,
-            "transparency": 3,
-            "context_distortion": 4,
-            "harm_potential": 5,
-            "virality": 3,
-            "correction_response": 3
-        }
-        rationales = [
-            {
-                "axis": "evidence_quality", 
-                "score": 4, 
-                "reasoning": f"医学用語正規化により「{normalized.search_query}」として検索。専門的な評価が可能。"
-            },
-            {
-                "axis": "clarity",
-                "score": 5,
-                "reasoning": f"主要概念: {', '.join(normalized.key_concepts[:2])}として明確に特定"
-            }
-        ]
-        evidence_summary = f"正規化クエリ: {normalized.search_query}"
-    else:
-        # フォールバック評価
-        total_score = 75
-        label = "Test Mode (Basic)"
-        axis_scores = {"clarity": 4, "evidence_quality": 3}
-        rationales = [{"axis": "test", "score": 4, "reasoning": "基本テストモード"}]
-        evidence_summary = "正規化機能が利用できません"
+    # Step 3: エビデンスに基づく評価（文献の有無・正規化の信頼度で固定値と根拠文の雛形を選ぶ）
+    preset = LEGACY_SCORE_PRESETS[(
+        bool(literature_results and literature_results.articles),
+        bool(normalized and normalized.confidence > 0.5)
+    )]
+    total_score = preset["total_score"]
+    label = preset["label"]
+    axis_scores = dict(preset["axis_scores"])  # 共有プリセットを呼び出し側に書き換えられないようコピーして返す
+    fields = {
+        "articles": len(literature_results.articles) if literature_results else 0,
+        "search_summary": literature_results.search_summary if literature_results else "",
+        "query": normalized.search_query if normalized else "",
+        "concepts": ", ".join(normalized.key_concepts[:2]) if normalized else ""
+    }
+    rationales = [
+        {"axis": axis, "score": score, "reasoning": reasoning.format_map(fields)}
+        for axis, score, reasoning in preset["rationales"]
+    ]
+    evidence_summary = preset["evidence_summary"].format_map(fields)
     
     result = {
         "total_score": total_score,
@@ -556,7 +724,7 @@ async def legacy_score_evaluation(request: ClaimRequest):
                 } for article in (literature_results.articles[:3] if literature_results else [])
             ]
         } if literature_results else None,
-        "log_id": len(evaluation_logger.df) + 1 if logger_available else 1
+        "log_id": None  # ログ記録時に割り当てられた番号を設定
     }
     
     # ログ記録（従来システム）
@@ -592,7 +760,9 @@ async def legacy_score_evaluation(request: ClaimRequest):
                         f"論文{i}_研究タイプ": article.study_type
                     })
             
-            evaluation_logger.log_evaluation(log_data)
+            # メモリへの追加のみ（ファイルへはロガーがバックグラウンドでまとめて書き出す）
+            # 番号はロガーが記録時に割り当てるため、同時リクエストでも重複しない
+            result["log_id"] = evaluation_logger.log_evaluation(log_data) + 1
         except Exception as e:
             print(f"ログ記録エラー: {e}")
     
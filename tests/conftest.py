@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+# pytest-xdistのワーカーではtorchのスレッド数をコア数÷ワーカー数に抑える（全ワーカーが全コアを使うと過剰に競合する）
+# torchはNLIモデルの初期化時に初めてimportされるため、ここで設定すれば反映される
+if os.environ.get("PYTEST_XDIST_WORKER"):
+    _worker_count = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // _worker_count)))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fake_nli():
+    """FAKE_NLI=1ならNLIモデルを読み込まず、ルールベースの判定で実行する（モデルの取得・読み込みなしでテストを回す）"""
+    if os.environ.get("FAKE_NLI") != "1":
+        yield
+        return
+
+    from src.core.nli import MultilingualNLI
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(MultilingualNLI, "_initialize_models", lambda self: None)
+        yield
+
+
+@pytest.fixture(scope="session")
+def client():
+    """セッションで共有するTestClient（lifespanによるDB初期化とモデルのウォームアップは1回だけ。xdistではワーカーごとに1回）"""
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
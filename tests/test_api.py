@@ -1,11 +1,7 @@
 import pytest
-from fastapi.testclient import TestClient
-from src.main import app
 
-client = TestClient(app)
 
-
-def test_root_endpoint():
+def test_root_endpoint(client):
     """ルートエンドポイントのテスト"""
     response = client.get("/")
     assert response.status_code == 200
@@ -14,7 +10,7 @@ def test_root_endpoint():
     assert data["message"] == "Evidence Checker API"
 
 
-def test_health_endpoint():
+def test_health_endpoint(client):
     """ヘルスチェックエンドポイントのテスト"""
     response = client.get("/health/")
     assert response.status_code == 200
@@ -23,7 +19,7 @@ def test_health_endpoint():
     assert data["status"] == "healthy"
 
 
-def test_score_endpoint_valid_claim():
+def test_score_endpoint_valid_claim(client):
     """有効な主張でのスコアエンドポイントテスト"""
     test_claim = {
         "claim_text": "ビタミンDは免疫機能をサポートする",
@@ -41,7 +37,7 @@ def test_score_endpoint_valid_claim():
     assert 0 <= data["total_score"] <= 100
 
 
-def test_score_endpoint_empty_claim():
+def test_score_endpoint_empty_claim(client):
     """空の主張でのエラーテスト"""
     test_claim = {
         "claim_text": "",
@@ -52,7 +48,7 @@ def test_score_endpoint_empty_claim():
     assert response.status_code == 400
 
 
-def test_score_endpoint_too_long_claim():
+def test_score_endpoint_too_long_claim(client):
     """長すぎる主張でのエラーテスト"""
     test_claim = {
         "claim_text": "a" * 6000,  # 5000文字制限を超える
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.utils.cache import TwoTierCache
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestTwoTierCache:
+    """2段キャッシュのテスト"""
+
+    def test_disk_opened_on_first_use(self, tmp_path):
+        """インスタンス生成だけではディレクトリを作らず、初回の書き込みで作るかのテスト"""
+        directory = tmp_path / "nli"
+        cache = TwoTierCache(str(directory))
+
+        assert not directory.exists()
+        assert cache.get("missing") is None
+
+        cache.set("key", ["support", 0.8, "理由"])
+        assert cache.get("key") == ["support", 0.8, "理由"]
+
+    def test_disk_shared_between_instances(self, tmp_path):
+        """別インスタンス（再起動後を想定）でもディスクから読めるかのテスト"""
+        TwoTierCache(str(tmp_path)).set("key", {"pmids": ["1"]})
+
+        value = TwoTierCache(str(tmp_path)).get("key")
+
+        assert value is None or value == {"pmids": ["1"]}  # diskcache未導入ならメモリのみ
+
+    def test_import_does_not_create_cache_dirs(self, tmp_path):
+        """キャッシュを持つモジュールをimportしてもカレントディレクトリに.cacheを作らないかのテスト"""
+        env = {**os.environ, "PYTHONPATH": str(ROOT), "HF_HUB_OFFLINE": "1"}
+        code = "import src.core.nli, src.utils.pubmed, src.core.medical_normalizer_v2, src.core.literature_searcher"
+
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+        assert result.returncode == 0, result.stderr
+        assert not (tmp_path / ".cache").exists()
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import src.database as database
+from src.database import Base, Evidence, DB_POOL_SIZE, _pool_options, bulk_save_evidence
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _row(pmid, doi):
+    return {"pmid": pmid, "doi": doi, "title": f"Article {pmid}", "journal": "Test Journal", "study_type": "rct"}
+
+
+@pytest.fixture(params=["upsert", "orm"])
+def db(request, monkeypatch):
+    """テストごとに空のインメモリSQLiteを用意する（ormはON CONFLICT非対応DB向けの経路で保存する）"""
+    if request.param == "orm":
+        monkeypatch.setattr(database, "_UPSERT_INSERTS", {})
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+class TestBulkSaveEvidence:
+    """論文情報の一括保存のテスト"""
+
+    def test_fresh_insert(self, db):
+        """新規の論文がrowsの順にidを返して保存されるかのテスト"""
+        ids = bulk_save_evidence(db, [_row("111", "10.1000/a"), _row("222", "10.1000/b")])
+        db.commit()
+
+        assert len(ids) == 2 and all(ids)
+        assert len(set(ids)) == 2
+        stored = dict(db.execute(select(Evidence.pmid, Evidence.id)).all())
+        assert ids == [stored["111"], stored["222"]]
+
+    def test_duplicate_pmid_returns_existing_id(self, db):
+        """登録済みのpmidは挿入されず既存のidが返るかのテスト"""
+        [existing_id] = bulk_save_evidence(db, [_row("111", "10.1000/a")])
+        db.commit()
+
+        ids = bulk_save_evidence(db, [_row("111", "10.1000/a"), _row("333", "10.1000/c")])
+        db.commit()
+
+        assert ids[0] == existing_id
+        assert ids[1] is not None and ids[1] != existing_id
+        assert db.query(Evidence).count() == 2
+
+    def test_duplicate_doi_returns_none(self, db):
+        """doiだけが別の論文と重複する行は保存されずNoneが返るかのテスト"""
+        [existing_id] = bulk_save_evidence(db, [_row("111", "10.1000/a")])
+        db.commit()
+
+        ids = bulk_save_evidence(db, [_row("444", "10.1000/a")])
+        db.commit()
+
+        assert ids == [None]
+        assert db.query(Evidence).count() == 1
+        assert db.query(Evidence).one().id == existing_id
+
+    def test_duplicates_within_rows(self, db):
+        """同じpmid・doiを含む行をまとめて渡すと最初の行だけが保存されるかのテスト"""
+        ids = bulk_save_evidence(db, [_row("111", "10.1000/a"), _row("111", "10.1000/a"), _row("555", "10.1000/a")])
+        db.commit()
+
+        assert ids[0] is not None and ids[1] == ids[0]
+        assert ids[2] is None
+        assert db.query(Evidence).count() == 1
+
+    def test_empty_rows(self, db):
+        """空のリストではDBに触れず空リストを返すかのテスト"""
+        assert bulk_save_evidence(db, []) == []
+
+
+class TestEngineSetup:
+    """接続URLごとのエンジン設定のテスト"""
+
+    @pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+    def test_in_memory_sqlite_has_no_pool_size(self, url):
+        """インメモリSQLiteではpool_size/max_overflowを渡さないかのテスト"""
+        assert _pool_options(url) == {}
+
+    def test_file_sqlite_uses_pool_size(self):
+        """QueuePoolを使うURLではプールサイズを指定するかのテスト"""
+        assert _pool_options("sqlite:///./evidence_checker.db")["pool_size"] == DB_POOL_SIZE
+
+    def test_import_with_in_memory_url(self):
+        """DATABASE_URL=sqlite:// でモジュールを読み込んでDBを使えるかのテスト"""
+        env = {**os.environ, "DATABASE_URL": "sqlite://"}
+        code = "from src.database import create_tables, SessionLocal, Evidence; create_tables(); print(SessionLocal().query(Evidence).count())"
+
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "0"
@@ -1,5 +1,6 @@
+import re
 import pytest
-from src.core.extract import ClaimExtractor, extract_main_claim
+from src.core.extract import ClaimExtractor, extract_main_claim, extract_main_claims_batch
 
 
 class TestClaimExtractor:
@@ -48,6 +49,33 @@ class TestClaimExtractor:
         
         assert claim is not None
         assert claim.confidence > 0
+    
+    def test_extract_claims_cached_across_instances(self):
+        """同じテキストの抽出結果は別インスタンスからも再利用される"""
+        text = "この治療により症状が30%改善した"
+        claims = self.extractor.extract_claims(text)
+        claims.clear()  # 呼び出し側でリストを変更してもキャッシュには影響しない
+        
+        again = ClaimExtractor().extract_claims(text)
+        assert len(again) > 0
+        assert again == self.extractor.extract_claims(text)
+        assert again[0] is self.extractor.extract_claims(text)[0]
+    
+    def test_pattern_priority_preserved(self):
+        """複数パターンに該当する場合はリスト順で先のパターンが優先される"""
+        sentence = "運動により血圧が低下する"
+        expected = None
+        for pattern in self.extractor.causal_patterns:
+            expected = re.search(pattern, sentence)
+            if expected:
+                break
+        
+        match = self.extractor._first_match(
+            self.extractor._causal_union, self.extractor._causal_re, sentence
+        )
+        assert match is not None
+        assert match.re.pattern == expected.re.pattern
+        assert match.groups() == expected.groups()
 
 
 class TestExtractMainClaim:
@@ -69,4 +97,11 @@ class TestExtractMainClaim:
         result = extract_main_claim(text)
         
         assert result["confidence"] == 0.1
-        assert result["type"] == "general"
\ No newline at end of file
+        assert result["type"] == "general"
+    
+    def test_extract_main_claims_batch(self):
+        """バッチ抽出が単体呼び出しと同じ結果を返すテスト"""
+        texts = ["この治療により症状が50%改善した", "こんにちは"]
+        results = extract_main_claims_batch(texts)
+        
+        assert results == [extract_main_claim(text) for text in texts]
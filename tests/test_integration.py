@@ -1,15 +1,24 @@
 import pytest
 import time
-from fastapi.testclient import TestClient
-from src.main import app
+import numpy as np
 
-client = TestClient(app)
+# パフォーマンステスト用の主張（列ごとに取り出して使う）
+PERFORMANCE_CLAIMS = np.array(
+    [
+        ("ビタミンDは骨の健康に重要です", "health"),
+        ("定期的な運動は健康に良い", "health"),
+        ("バランスの取れた食事が大切です", "health"),
+        ("十分な睡眠は免疫力を高める", "health"),
+        ("ストレス管理は心の健康に重要", "health"),
+    ],
+    dtype=[("claim_text", "U64"), ("topic", "U16")]
+)
 
 
 class TestFullPipeline:
     """エンドツーエンドの統合テスト"""
     
-    def test_complete_evaluation_pipeline(self):
+    def test_complete_evaluation_pipeline(self, client):
         """完全な評価パイプラインのテスト"""
         test_claim = {
             "claim_text": "ビタミンDは免疫機能をサポートする効果があります",
@@ -40,24 +49,21 @@ class TestFullPipeline:
         valid_labels = ["True", "Mostly True", "Unsupported", "False", "Fabricated"]
         assert data["label"] in valid_labels
         
-        # 9軸スコアの確認
-        axis_scores = data["axis_scores"]
-        for axis, score in axis_scores.items():
-            assert 0 <= score <= 5
+        # 9軸スコアの確認（まとめて範囲判定）
+        axis_scores = np.fromiter(data["axis_scores"].values(), dtype=np.float64, count=len(data["axis_scores"]))
+        assert ((axis_scores >= 0) & (axis_scores <= 5)).all(), data["axis_scores"]
         
         # エビデンスの確認
-        assert len(data["evidence_top3"]) > 0
-        for evidence in data["evidence_top3"]:
-            assert "source" in evidence
-            assert "title" in evidence
-            assert "stance" in evidence
-            assert evidence["stance"] in ["support", "contradict", "neutral"]
+        evidence_top3 = data["evidence_top3"]
+        assert len(evidence_top3) > 0
+        assert all({"source", "title", "stance"} <= evidence.keys() for evidence in evidence_top3)
+        assert {evidence["stance"] for evidence in evidence_top3} <= {"support", "contradict", "neutral"}
         
         # 処理時間の確認
         processing_time = end_time - start_time
         assert processing_time < 30  # 30秒以内
     
-    def test_health_medical_claim(self):
+    def test_health_medical_claim(self, client):
         """医学関連主張のテスト"""
         test_claim = {
             "claim_text": "定期的な運動は心臓病のリスクを減少させる",
@@ -71,7 +77,7 @@ class TestFullPipeline:
         # 医学関連の主張は通常ある程度のスコアを持つはず
         assert data["total_score"] > 20
     
-    def test_harmful_claim_detection(self):
+    def test_harmful_claim_detection(self, client):
         """有害な主張の検出テスト"""
         test_claim = {
             "claim_text": "ワクチンは不要で危険です",
@@ -86,7 +92,7 @@ class TestFullPipeline:
         assert data["total_score"] <= 74  # "根拠薄い"まで制限
         assert data["label"] in ["Unsupported", "False", "Fabricated"]
     
-    def test_multiple_concurrent_requests(self):
+    def test_multiple_concurrent_requests(self, client):
         """同時リクエストのテスト"""
         import concurrent.futures
         
@@ -105,73 +111,123 @@ class TestFullPipeline:
         
         # すべてのリクエストが成功することを確認
         assert all(results)
+    
+    def test_batch_score_requests(self, client):
+        """バッチ評価エンドポイントのテスト"""
+        claims = [
+            {"claim_text": "ビタミンCは風邪予防に効果的です", "topic": "health"}
+            for _ in range(5)
+        ]
+        
+        response = client.post("/api/v1/batch-score", json=claims)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == len(claims)
+        for item in data:
+            assert 0 <= item["total_score"] <= 100
+            assert item["claim_review"]["claimReviewed"] == claims[0]["claim_text"]
+        
+        # 空のバッチ
+        response = client.post("/api/v1/batch-score", json=[])
+        assert response.status_code == 400
 
 
 class TestPerformance:
     """パフォーマンステスト"""
     
-    def test_response_time_under_load(self):
+    @pytest.mark.asyncio
+    async def test_response_time_under_load(self, client):
         """負荷下でのレスポンス時間テスト"""
-        test_claims = [
-            "ビタミンDは骨の健康に重要です",
-            "定期的な運動は健康に良い",
-            "バランスの取れた食事が大切です",
-            "十分な睡眠は免疫力を高める",
-            "ストレス管理は心の健康に重要"
-        ]
+        import asyncio
+        import httpx
         
-        response_times = []
+        test_claims = PERFORMANCE_CLAIMS
         
-        for claim_text in test_claims:
-            test_claim = {
-                "claim_text": claim_text,
-                "topic": "health"
-            }
-            
-            start_time = time.time()
-            response = client.post("/api/v1/score", json=test_claim)
-            end_time = time.time()
+        # 各リクエストの所要時間（ナノ秒の単調時計で計測し、インデックスごとに書き込む）
+        response_times_ns = np.empty(len(test_claims), dtype=np.int64)
+        
+        # clientフィクスチャでlifespan（モデルのウォームアップ）を済ませたアプリに、ASGIで直接同時送信する
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as async_client:
+            async def make_request(index):
+                test_claim = {
+                    "claim_text": str(test_claims["claim_text"][index]),
+                    "topic": str(test_claims["topic"][index])
+                }
+                
+                start_time = time.perf_counter_ns()
+                response = await async_client.post("/api/v1/score", json=test_claim)
+                response_times_ns[index] = time.perf_counter_ns() - start_time
+                return response.status_code
             
-            assert response.status_code == 200
-            response_times.append(end_time - start_time)
+            status_codes = await asyncio.gather(*(make_request(i) for i in range(len(test_claims))))
+        
+        assert all(status_code == 200 for status_code in status_codes)
+        
+        response_times = response_times_ns / 1e9
         
         # 平均レスポンス時間が20秒以内
-        avg_response_time = sum(response_times) / len(response_times)
-        assert avg_response_time < 20
+        assert response_times.mean() < 20
         
         # 最大レスポンス時間が30秒以内
-        max_response_time = max(response_times)
-        assert max_response_time < 30
+        assert response_times.max() < 30
     
-    def test_memory_usage_stability(self):
-        """メモリ使用量の安定性テスト"""
-        import psutil
-        import os
+    def test_batch_response_time(self, client):
+        """バッチ評価でのレスポンス時間テスト"""
+        claims = [
+            {"claim_text": claim_text, "topic": topic}
+            for claim_text, topic in zip(PERFORMANCE_CLAIMS["claim_text"].tolist(), PERFORMANCE_CLAIMS["topic"].tolist())
+        ]
         
-        process = psutil.Process(os.getpid())
-        initial_memory = process.memory_info().rss
+        start_time = time.perf_counter()
+        response = client.post("/api/v1/batch-score", json=claims)
+        processing_time = time.perf_counter() - start_time
         
-        # 10回のリクエストを実行
-        for i in range(10):
-            test_claim = {
-                "claim_text": f"健康に関する主張 {i}",
-                "topic": "health"
-            }
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == len(claims)
+        
+        total_scores = np.fromiter((item["total_score"] for item in data), dtype=np.float64, count=len(data))
+        assert ((total_scores >= 0) & (total_scores <= 100)).all()
+        
+        # 全件まとめても1件分の上限（30秒）以内
+        assert processing_time < 30
+    
+    def test_memory_usage_stability(self, client):
+        """メモリ使用量の安定性テスト"""
+        import tracemalloc
+        
+        # Python側の確保量を行単位で比較する（増加時に発生箇所を特定できる）
+        tracemalloc.start()
+        try:
+            initial_snapshot = tracemalloc.take_snapshot()
             
-            response = client.post("/api/v1/score", json=test_claim)
-            assert response.status_code == 200
+            # 10回のリクエストを実行
+            for i in range(10):
+                test_claim = {
+                    "claim_text": f"健康に関する主張 {i}",
+                    "topic": "health"
+                }
+                
+                response = client.post("/api/v1/score", json=test_claim)
+                assert response.status_code == 200
+            
+            final_snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
         
-        final_memory = process.memory_info().rss
-        memory_increase = final_memory - initial_memory
+        stats = final_snapshot.compare_to(initial_snapshot, "lineno")
+        memory_increase = sum(stat.size_diff for stat in stats)
         
-        # メモリ増加が100MB以下であることを確認
-        assert memory_increase < 100 * 1024 * 1024
+        # メモリ増加が100MB以下であることを確認（失敗時は増加の大きい上位5行を表示）
+        assert memory_increase < 100 * 1024 * 1024, "\n".join(str(stat) for stat in stats[:5])
 
 
 class TestErrorHandling:
     """エラーハンドリングのテスト"""
     
-    def test_invalid_input_handling(self):
+    def test_invalid_input_handling(self, client):
         """無効な入力のハンドリングテスト"""
         # 空の主張
         response = client.post("/api/v1/score", json={"claim_text": ""})
@@ -186,7 +242,7 @@ class TestErrorHandling:
         response = client.post("/api/v1/score", json={})
         assert response.status_code == 422  # Validation error
     
-    def test_system_error_fallback(self):
+    def test_system_error_fallback(self, client):
         """システムエラー時のフォールバックテスト"""
         # 通常のリクエスト（エラーが発生してもフォールバックで処理される）
         test_claim = {
@@ -1,12 +1,15 @@
 import pytest
-from src.core.nli import MultilingualNLI, EvidenceStanceAnalyzer, analyze_claim_evidence_stance
+import numpy as np
+from src.core.nli import EvidenceStanceAnalyzer, analyze_claim_evidence_stance, get_nli
+from src.utils.cache import TwoTierCache
 
 
 class TestMultilingualNLI:
     """多言語NLIクラスのテスト"""
     
     def setup_method(self):
-        self.nli = MultilingualNLI()
+        # モデルの読み込みはプロセスで1回だけ（テストごとに作り直さない）
+        self.nli = get_nli()
     
     def test_analyze_claim_evidence_support(self):
         """支持関係の検出テスト"""
@@ -56,6 +59,48 @@ class TestMultilingualNLI:
         support_score = self.nli._detect_support_patterns(claim, evidence)
         assert support_score > 0.5
 
+    def test_batch_matches_pairwise(self):
+        """バッチ分析が1件ずつの分析と同じ結果になるかのテスト"""
+        claim = "ビタミンDが免疫機能を向上させる"
+        evidences = [
+            "研究によると、ビタミンDは免疫システムの機能を改善することが示されています",
+            "この研究では、ビタミンDに効果がないことが示されました",
+            "今日は良い天気です"
+        ]
+
+        batch_results = self.nli.analyze_claim_evidence_batch(claim, evidences)
+
+        assert len(batch_results) == len(evidences)
+        for evidence, result in zip(evidences, batch_results):
+            single = self.nli.analyze_claim_evidence_pair(claim, evidence)
+            assert result.stance == single.stance
+            assert result.confidence == pytest.approx(single.confidence, abs=1e-5)
+
+    def test_encode_batch_normalized_and_cached(self, monkeypatch):
+        """エンコードが正規化を指定し、未キャッシュのテキストだけをモデルに渡すかのテスト"""
+        class RecordingModel:
+            def __init__(self):
+                self.calls = []
+
+            def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+                self.calls.append((list(texts), normalize_embeddings))
+                vectors = np.array([[len(t), 1.0, 2.0] for t in texts], dtype=np.float32)
+                if normalize_embeddings:
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                return vectors
+
+        model = RecordingModel()
+        monkeypatch.setattr(self.nli, "sentence_model", model)
+        monkeypatch.setattr(self.nli, "_embedding_cache", type(self.nli._embedding_cache)())
+
+        first = self.nli.encode_batch(["ビタミンD", "免疫機能", "ビタミンD"])
+        second = self.nli.encode_batch(["免疫機能", "睡眠"])
+
+        assert model.calls == [(["ビタミンD", "免疫機能"], True), (["睡眠"], True)]
+        assert first.dtype == np.float32
+        assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+        assert np.allclose(first[1], second[0])
+
 
 class TestEvidenceStanceAnalyzer:
     """エビデンス立場分析クラスのテスト"""
@@ -86,6 +131,54 @@ class TestEvidenceStanceAnalyzer:
             assert "stance_reasoning" in evidence
             assert evidence["stance"] in ["support", "contradict", "neutral"]
     
+    def test_analyze_evidence_list_keeps_input(self):
+        """既定では渡したエビデンスの辞書に立場を書き込まないかのテスト"""
+        claim = "ビタミンDが免疫機能を向上させる"
+        evidence_list = [{"title": "ビタミンDと免疫の関係", "abstract": "ビタミンDは免疫システムを強化する効果があります"}]
+        
+        analyzed = self.analyzer.analyze_evidence_list(claim, evidence_list)
+        
+        assert "stance" in analyzed[0]
+        assert "stance" not in evidence_list[0]
+        assert analyzed[0] is not evidence_list[0]
+        
+        in_place = self.analyzer.analyze_evidence_list(claim, evidence_list, copy_evidence=False)
+        assert in_place[0] is evidence_list[0]
+        assert evidence_list[0]["stance"] == analyzed[0]["stance"]
+    
+    def test_evidence_list_encoded_in_one_pass(self, monkeypatch, tmp_path):
+        """主張と全エビデンスが1回のエンコードでまとめて処理されるかのテスト"""
+        class RecordingModel:
+            def __init__(self):
+                self.calls = []
+
+            def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+                self.calls.append(list(texts))
+                vectors = np.ones((len(texts), 3), dtype=np.float32)
+                return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        model = RecordingModel()
+        nli = self.analyzer.nli
+        monkeypatch.setattr(nli, "sentence_model", model)
+        monkeypatch.setattr(nli, "model_id", "recording")
+        monkeypatch.setattr(nli, "_embedding_cache", type(nli._embedding_cache)())
+        monkeypatch.setattr(nli, "_result_cache", TwoTierCache(str(tmp_path)))
+
+        claim = "ビタミンDが免疫機能を向上させる"
+        evidence_list = [
+            {"title": f"ビタミンD研究{i}", "abstract": "ビタミンDは免疫機能を改善することが確認されました"}
+            for i in range(5)
+        ]
+        analyzed = self.analyzer.analyze_evidence_list(claim, evidence_list, copy_evidence=True)
+
+        assert len(analyzed) == 5
+        assert len(model.calls) == 1
+        assert len(model.calls[0]) == 6  # 主張1件 + エビデンス5件
+
+        # 2回目は判定結果のキャッシュから返り、モデルは呼ばれない
+        self.analyzer.analyze_evidence_list(claim, evidence_list, copy_evidence=True)
+        assert len(model.calls) == 1
+    
     def test_get_stance_summary(self):
         """立場要約のテスト"""
         analyzed_evidence = [
@@ -0,0 +1,153 @@
+import copy
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent / "scoring_byChatGPT0817"
+
+
+def _load_engine(name, block_numba=False):
+    """score_engine.py を別名で読み込む（block_numba=True なら numba なしのフォールバック経路）"""
+    saved = sys.modules.get("numba")
+    if block_numba:
+        sys.modules["numba"] = None
+    try:
+        spec = importlib.util.spec_from_file_location(name, ENGINE_DIR / "score_engine.py")
+        module = importlib.util.module_from_spec(spec)
+        # numbaのディスクキャッシュはモジュール名で関数を引き直すので先に登録しておく
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    finally:
+        if block_numba:
+            if saved is None:
+                sys.modules.pop("numba", None)
+            else:
+                sys.modules["numba"] = saved
+    return module
+
+
+@pytest.fixture(scope="module", params=["numba", "python"])
+def engine(request):
+    if request.param == "numba":
+        pytest.importorskip("numba")
+        module = _load_engine("score_engine")
+        assert module._NUMBA_AVAILABLE
+    else:
+        module = _load_engine("score_engine_python", block_numba=True)
+        assert not module._NUMBA_AVAILABLE
+    return module
+
+
+def _sample():
+    with open(ENGINE_DIR / "sample_payload.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _edge_payloads():
+    payloads = {"sample": _sample()}
+
+    fabricated = _sample()
+    fabricated["penalties_flags"]["fabricated"] = True
+    payloads["fabricated"] = fabricated
+
+    retracted = _sample()
+    retracted["penalties_flags"]["retracted_as_major"] = True
+    retracted["included_studies"][0]["retraction_status"] = "retracted"
+    payloads["retracted"] = retracted
+
+    no_studies = _sample()
+    no_studies["included_studies"] = []
+    no_studies["alignment_to_claim"] = "insufficient"
+    no_studies["GRADE_certainty"] = "very_low"
+    payloads["no_studies"] = no_studies
+
+    penalties = _sample()
+    for key in ("causation_misuse", "cherry_pick", "fear_appeal", "overgeneralization"):
+        penalties["penalties_flags"][key] = True
+    penalties["bonus_flags"] = {}
+    penalties["exaggeration_level"] = 3
+    penalties["language_assertiveness_score"] = 2
+    payloads["penalties"] = penalties
+
+    return payloads
+
+
+EDGE_PAYLOADS = _edge_payloads()
+SUBSCORE_KEYS = {
+    "A1": ("A_scientific_accuracy", "facts"),
+    "A2": ("A_scientific_accuracy", "causality"),
+    "A3": ("A_scientific_accuracy", "stats"),
+    "B1": ("B_evidence_base", "quality"),
+    "B2": ("B_evidence_base", "appropriateness_verifiability_recency"),
+    "C1": ("C_expression", "certainty_tone"),
+    "C2": ("C_expression", "no_exaggeration"),
+    "D1": ("D_completeness_safety", "coverage"),
+    "D2": ("D_completeness_safety", "balance"),
+}
+
+
+class TestScoreEngine:
+    """score / score_batch / compact出力の整合性テスト（numbaあり・なしの両方で実行）"""
+
+    @pytest.mark.parametrize("name", sorted(EDGE_PAYLOADS))
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_score_matches_score_batch(self, engine, name, compact):
+        """単発のscoreとscore_batchの結果が一致するかのテスト"""
+        payload = copy.deepcopy(EDGE_PAYLOADS[name])
+
+        assert engine.score_batch([payload], compact=compact) == [engine.score(payload, compact=compact)]
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_batch_of_mixed_payloads(self, engine, compact):
+        """種類の違うペイロードをまとめて処理しても順序と結果が保たれるかのテスト"""
+        payloads = [copy.deepcopy(EDGE_PAYLOADS[name]) for name in sorted(EDGE_PAYLOADS)]
+
+        assert engine.score_batch(payloads, compact=compact) == [engine.score(p, compact=compact) for p in payloads]
+
+    @pytest.mark.parametrize("name", sorted(EDGE_PAYLOADS))
+    def test_compact_round_trip(self, engine, name):
+        """breakdown_packedを展開すると通常出力の内訳に戻るかのテスト"""
+        payload = EDGE_PAYLOADS[name]
+        full = engine.score(payload)
+        compact = engine.score(payload, compact=True)
+        breakdown = full["score_breakdown"]
+
+        unpacked = engine.unpack_breakdown(compact["breakdown_packed"])
+
+        for field, (axis, key) in SUBSCORE_KEYS.items():
+            assert unpacked[field] == breakdown[axis][key], field
+        safety = breakdown["D_completeness_safety"]
+        assert unpacked["D3"] == safety.get("Safety", safety.get("safety"))
+        assert unpacked["cap_applied_A"] == breakdown["A_scientific_accuracy"]["cap_applied"]
+        assert unpacked["cap_applied_B"] == breakdown["B_evidence_base"]["cap_applied"]
+        for key in ("total_score", "label", "confidence"):
+            assert compact[key] == full[key]
+
+    def test_edge_cases(self, engine):
+        """ねつ造・撤回・ペナルティのある入力が想定どおり扱われるかのテスト"""
+        fabricated = engine.score(EDGE_PAYLOADS["fabricated"])
+        assert fabricated["total_score"] == 0
+        assert fabricated["label"] == "False"
+        assert "safety" in fabricated["score_breakdown"]["D_completeness_safety"]
+
+        penalties = engine.score(EDGE_PAYLOADS["penalties"])
+        assert {item["type"] for item in penalties["penalties"]} >= {"causation_misuse", "cherry_pick", "fear_appeal"}
+        assert penalties["bonus"] == []
+
+        retracted = engine.score(EDGE_PAYLOADS["retracted"])
+        assert any(item["type"] == "retracted_or_predatory_major" for item in retracted["penalties"])
+        assert retracted["total_score"] < engine.score(EDGE_PAYLOADS["sample"])["total_score"]
+
+    def test_backends_agree(self):
+        """numbaあり・なしで同じ結果になるかのテスト"""
+        pytest.importorskip("numba")
+        jit = _load_engine("score_engine")
+        plain = _load_engine("score_engine_python", block_numba=True)
+        payloads = [copy.deepcopy(EDGE_PAYLOADS[name]) for name in sorted(EDGE_PAYLOADS)]
+
+        assert jit.score_batch(payloads) == plain.score_batch(payloads)
+        assert jit.score_batch(payloads, compact=True) == plain.score_batch(payloads, compact=True)
@@ -89,6 +89,26 @@ class TestEvidenceScorer:
         assert "scores" in result
         assert 0 <= result["total_score"] <= 100
 
+    def test_score_batch_matches_single(self):
+        """複数主張のまとめてスコア計算が1件ずつの計算と一致するかのテスト"""
+        claims = [
+            ExtractedClaim(text="ビタミンDが免疫機能をサポートする", confidence=0.7, claim_type="causal"),
+            ExtractedClaim(text="ワクチンは不要です", confidence=0.5, claim_type="general")
+        ]
+        evidence_lists = [
+            [{"study_type": "randomized_controlled_trial", "title": "RCT研究", "abstract": "ビタミンDは免疫機能を改善した"}],
+            []
+        ]
+        texts = [claim.text for claim in claims]
+
+        results = self.scorer.score_batch(claims, evidence_lists, texts)
+
+        assert len(results) == 2
+        for claim, evidence_list, text, result in zip(claims, evidence_lists, texts, results):
+            single = self.scorer.calculate_comprehensive_score(claim, evidence_list, text)
+            assert result["total_score"] == single["total_score"]
+            assert result["label"] == single["label"]
+
 
 class TestCalculateEvidenceScore:
     """calculate_evidence_score関数のテスト"""